@@ -1,36 +1,230 @@
 # app/app.py
+from collections import deque
+
 from app.car import Car
+from app.mapfile import is_record_map
+from models.lane_index import LaneIndex
+
+CAR_WIDTH = 40
+
+
+class Checkpoint:
+    """
+    Saved game state. The obstacles are kept as roots of persistent trees,
+    so taking or restoring a checkpoint is O(1) in the number of obstacles.
+
+    Attributes
+    ----------
+    tick : int
+    car : tuple
+        (x, y, energy, is_jumping, jump_progress).
+    collisions : dict
+        tipo -> hit count.
+    tree, lanes
+        Root of the main tree and {lane: root} of the lane index.
+    pulled : int
+        How many streamed obstacles the trees had received.
+    """
+    def __init__(self, tick, car, collisions, tree, lanes, pulled):
+        self.tick = tick
+        self.car = car
+        self.collisions = collisions
+        self.tree = tree
+        self.lanes = lanes
+        self.pulled = pulled
+
 
 class App:
     """
     Game logic coordinator — moves the car, checks collisions and manages obstacles via AVLTree.
+
+    With a persistent tree (AVLTree(persistent=True)) the game state is
+    checkpointed every `checkpoint_every` ticks (default 100; the last
+    `checkpoint_keep` are kept) and at the start of the game, which makes
+    restart() and rewind() O(1) instead of rebuilding the tree.
+
+    Obstacles live both in `tree` (views, editor, drawing) and in the
+    per-lane `lanes` index (collisions, lookahead), so they are stored and
+    updated at least twice; see models.lane_index.LaneIndex.
     """
 
-    def __init__(self, config, tree, gui=None):
+    def __init__(self, config, tree, gui=None, verbose=True):
         self.config = config or {}
         self.tree = tree
+        self.persistent = getattr(tree, "persistent", False)
+        self.lanes = self._new_lanes()  # per-lane view of the same obstacles
         self.gui = gui
+        self.verbose = verbose
         self.car = Car(
             color=self.config.get("car_color", "blue"),
             speed=self.config.get("car_speed", 5),
-            jump_height=self.config.get("jump_height", 3)
+            jump_height=self.config.get("jump_height", 3),
+            jump_duration=self.config.get("jump_duration", 30)
         )
+        # road_length null means an endless road (e.g. a procedural track)
         self.road_length = self.config.get("road_length", 1000)
+        if self.road_length is None:
+            self.road_length = float("inf")
         self.refresh_time = self.config.get("refresh_time", 200)
+        self.tick = 0
+        self.collisions = {}  # tipo -> hit count
+        self.removed = 0  # obstacles taken out of play, by hits and trims (see app.telemetry)
+        self.game_over = None
+        self.source = None  # streaming obstacle source, see attach_source
+        self.lookahead = self.config.get("stream_lookahead", 1000)
+
+        # checkpoints (persistent trees only)
+        self.checkpoint_every = self.config.get("checkpoint_every", 100) if self.persistent else None
+        self.checkpoints = deque(maxlen=self.config.get("checkpoint_keep", 10))
+        self.start = None  # state at tick 0, see load_obstacles
+        self._pulled = []  # obstacles pulled from the source since the oldest checkpoint
+        self._pulled_base = 0  # how many were pulled before _pulled[0]
+        self._served = 0  # how many of those are in the trees of the current timeline
+
+    def _new_lanes(self):
+        return LaneIndex(type(self.tree), persistent=self.persistent)
 
     def load_obstacles(self, obstacles_list):
-        for obs in obstacles_list:
-            value = (obs["x1"], obs["y1"], obs["x2"], obs["y2"])
-            tipo = obs.get("tipo", "obstaculo")
+        """Load obstacle dicts, or every record of a record map (app.mapfile, e.g. a BinaryMap)."""
+        self._load_obstacles(obstacles_list)
+        # loaded before the game started: this is what restart() goes back to
+        self.start = self.checkpoint() if self.persistent and self.tick == 0 else None
+
+    def _load_obstacles(self, obstacles_list):
+        if is_record_map(obstacles_list):
+            # already sorted and unique by (x1, y1): no dicts in between
+            items = list(obstacles_list.sorted_items())
+            if self.tree.root is None:
+                self.tree.root = self.tree.build_sorted(items)
+                self.lanes = self._new_lanes()
+                self.lanes.load_sorted(items)
+                return
+        elif self.tree.root is None:
+            # empty tree: sort once and build it balanced in one pass; the lanes
+            # are built from its nodes so they share their value tuples
+            self.tree.root = self.tree.bulk_load(obstacles_list)
+            self.lanes = self._new_lanes()
+            self.lanes.load_sorted((node.value, node.tipo) for node in self.tree.inorder(self.tree.root))
+            return
+        else:
+            items = [((obs["x1"], obs["y1"], obs["x2"], obs["y2"]), obs.get("tipo", "obstaculo"))
+                     for obs in obstacles_list]
+        for value, tipo in items:
             self.tree.root = self.tree.insert(self.tree.root, value, tipo)
+            self.lanes.insert(value, tipo)
+
+    def append_obstacles(self, obstacles):
+        """Add obstacle dicts sorted by (x1, y1) that lie after the ones already loaded."""
+        items = [((obs["x1"], obs["y1"], obs["x2"], obs["y2"]), obs.get("tipo", "obstaculo"))
+                 for obs in obstacles]
+        self.tree.root = self.tree.append_sorted(self.tree.root, items)
+        self.lanes.append_sorted(items)
+
+    def attach_source(self, source):
+        """
+        Feed obstacles from a stream (e.g. app.streaming.ObstacleStream)
+        instead of loading them all up front: every tick pulls the ones that
+        come within `stream_lookahead` of the car.
+        """
+        self.source = source
+        self.start = None  # a stream cannot be replayed from the start
+        self.pull_obstacles()
+
+    def pull_obstacles(self):
+        if self.source is None:
+            return
+        limit = self.car.x + self.lookahead
+        if self.persistent:
+            incoming = self._pull_logged(limit)
+        else:
+            incoming = self.source.take_until(limit)
+        if incoming:
+            self.append_obstacles(incoming)
+            if self.gui:
+                self.gui.tree_changed()
 
     def update_game(self):
+        self.tick += 1
         self.car.move_forward()
         self.car.update_jump()
+        self.pull_obstacles()
         self.check_collision()
 
         if self.car.energy <= 0:
             self.end_game("Energy depleted")
+        elif self.checkpoint_every and self.tick % self.checkpoint_every == 0:
+            self.save_checkpoint()
+
+    def _pull_logged(self, limit):
+        # after a rewind, obstacles the source already handed out are served again from the log
+        log = self._pulled
+        i = self._served - self._pulled_base
+        j = i
+        while j < len(log) and log[j]["x1"] < limit:
+            j += 1
+        incoming = log[i:j]
+        self._served += j - i
+        if j == len(log):
+            fresh = self.source.take_until(limit)
+            log.extend(fresh)
+            self._served += len(fresh)
+            incoming.extend(fresh)
+        return incoming
+
+    # ---- Checkpoints ----
+    def checkpoint(self):
+        """Capture the current state; needs a persistent tree."""
+        if not self.persistent:
+            raise ValueError("checkpoints need a persistent tree")
+        car = self.car
+        return Checkpoint(
+            self.tick,
+            (car.x, car.y, car.energy, car.is_jumping, car.jump_progress),
+            dict(self.collisions),
+            self.tree.snapshot(),
+            self.lanes.snapshot(),
+            self._served,
+        )
+
+    def save_checkpoint(self):
+        """Add a checkpoint to the rewind history (the oldest one drops out when full)."""
+        cp = self.checkpoint()
+        self.checkpoints.append(cp)
+        # pulled obstacles older than every kept checkpoint are no longer needed
+        drop = self.checkpoints[0].pulled - self._pulled_base
+        if drop > 0:
+            del self._pulled[:drop]
+            self._pulled_base += drop
+        return cp
+
+    def restore(self, cp):
+        """Go back to a checkpoint. O(1) in the number of obstacles."""
+        self.tree.restore(cp.tree)
+        self.lanes.restore(cp.lanes)
+        car = self.car
+        car.x, car.y, car.energy, car.is_jumping, car.jump_progress = cp.car
+        self.tick = cp.tick
+        self.collisions = dict(cp.collisions)
+        self.game_over = None
+        self._served = cp.pulled
+        if self.gui:
+            self.gui.tree_changed()
+
+    def rewind(self, steps=1):
+        """Restore the steps-th latest checkpoint and forget the ones after it."""
+        if not 0 < steps <= len(self.checkpoints):
+            raise IndexError("no checkpoint that far back")
+        for _ in range(steps - 1):
+            self.checkpoints.pop()
+        self.restore(self.checkpoints[-1])
+
+    def restart(self):
+        """Go back to the state at tick 0. False if there is none to go back to."""
+        if self.start is None:
+            return False
+        self.restore(self.start)
+        self.checkpoints.clear()
+        return True
 
     def rect_collision(self, car_rect, obs_rect):
         cx1, cy1, cx2, cy2 = car_rect
@@ -40,53 +234,135 @@ class App:
     def check_collision(self):
         """
         Check collisions using rectangle intersection.
-        Car rectangle is built from car.x and car.y (lane).
+        The car covers [car.x, car.x + 40] in its lane; only the lane's own
+        index is queried, and an obstacle spanning lanes y1..y2 blocks all of them.
         """
-        # define car rectangle: x range [car.x, car.x + width], y as lane coordinate
-        # Use width and height heuristics — adjust if needed
-        car_width = 40
-        car_height = 1  # lane height conceptual (we compare lanes by integer)
-        car_x1 = self.car.x
-        car_x2 = self.car.x + car_width
-        # For y we map lane number to simple range: y * 1 ... y * 1 + 1
-        car_y1 = self.car.y
-        car_y2 = self.car.y + 1
-
-        visibles = self.tree.range_query(self.tree.root, self.car.x, self.car.x + 200, self.car.y, self.car.y)
+        car_width = CAR_WIDTH
 
         # Collision detection
         if not self.car.is_jumping:
-            for obs in visibles:
-                ox1, oy1, ox2, oy2 = obs["x1"], obs["y1"], obs["x2"], obs["y2"]
-
-                # Check X overlap (car has width ~40)
-                if ox1 <= self.car.x + 40 and self.car.x <= ox2:
-                    # Check same lane (y)
-                    if self.car.y in (oy1, oy2):
-                        print(f" Collision at ({ox1},{oy1}) - removing node")
-                        self.car.collide(obs)
-                        self.tree.root = self.tree.delete(self.tree.root, (ox1, oy1, ox2, oy2))
-
-                        if self.gui:
-                            self.gui.show_tree()
-
-        # remove obstacles behind car
-        for node in list(self.tree.inorder(self.tree.root)):
-            x1, y1, x2, y2 = node.value
-            if x2 < self.car.x - 200:
-                self.tree.root = self.tree.delete(self.tree.root, node.value)
+            # copy out (value, tipo) first: deleting may reuse the node objects
+            hits = [(node.value, node.tipo)
+                    for node in self.lanes.iter_query(self.car.y, self.car.x, self.car.x + car_width)]
+            for value, tipo in hits:
+                if self.verbose:
+                    print(f" Collision at ({value[0]},{value[1]}) - removing node")
+                self.car.hit(tipo)
+                self.collisions[tipo] = self.collisions.get(tipo, 0) + 1
+                self.tree.root = self.tree.delete(self.tree.root, value)
+                self.lanes.delete(value)
+                self.removed += 1
+
                 if self.gui:
-                    self.gui.show_tree()
+                    self.gui.tree_changed()
+
+        # remove obstacles behind car (nothing to do unless some x2 is stale: O(1) via min_x2)
+        behind = self.car.x - 200
+        root = self.tree.root
+        if root is not None and root.min_x2 < behind:
+            size = self.tree.get_size(root)
+            self.tree.root = self.tree.trim_before(root, behind)
+            self.removed += size - self.tree.get_size(self.tree.root)
+            self.lanes.trim_before(behind)
+            if self.gui:
+                self.gui.tree_changed()
+
+    # ---- Lookahead (for bots and auto-pilots) ----
+    def next_obstacle(self, x=None, lane=None):
+        """Nearest obstacle node in lane (default: the car's) that reaches x (default: car.x). O(log n)."""
+        car = self.car
+        return self.lanes.next_ahead(car.y if lane is None else lane, car.x if x is None else x)
+
+    def obstacles_ahead(self, x=None, lane=None, k=1):
+        """The next k obstacle nodes in lane that reach x, nearest first. O(log n + k)."""
+        car = self.car
+        return self.lanes.ahead(car.y if lane is None else lane, car.x if x is None else x, k)
+
+    def impact_window(self, lane=None):
+        """
+        (first, last) update_game calls from now during which the car, staying
+        in lane at its speed, overlaps the next obstacle there; 0 means it
+        overlaps already. None if the lane is clear.
+        """
+        car = self.car
+        node = self.next_obstacle(car.x, lane)
+        if node is None or car.speed <= 0:
+            return None
+        x1, _, x2, _ = node.value
+        # overlap while x1 <= car.x + CAR_WIDTH and car.x <= x2, with car.x growing by speed per tick
+        first = max(0, -(-(x1 - CAR_WIDTH - car.x) // car.speed))
+        last = (x2 - car.x) // car.speed
+        return first, last
+
+    def time_to_impact(self, lane=None):
+        """Ticks until the car touches the next obstacle in lane, or None if the lane is clear."""
+        window = self.impact_window(lane)
+        return window[0] if window else None
+
+    def jump_window(self, lane=None):
+        """
+        (earliest, latest) number of ticks to wait before jumping so that the
+        car is airborne over the whole impact window, or None if a jump cannot
+        clear it (already jumping, obstacle too long, or too late).
+        A jump started before update_game keeps the car up for the next
+        jump_duration - 1 ticks.
+        """
+        window = self.impact_window(lane)
+        if window is None or self.car.is_jumping:
+            return None
+        first, last = window
+        earliest = max(0, last - self.car.jump_duration + 1)
+        latest = first - 1
+        if earliest > latest:
+            return None
+        return earliest, latest
 
     def insert_obstacle(self, x1, y1, x2, y2, tipo="normal"):
         x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
         value = (x1, y1, x2, y2)
         self.tree.root = self.tree.insert(self.tree.root, value, tipo)
+        self.lanes.insert(value, tipo)
+        if self.start is not None:
+            # an editor change: restart() should see it too
+            def insert():
+                self.tree.root = self.tree.insert(self.tree.root, value, tipo)
+                self.lanes.insert(value, tipo)
+            self._edit_start(insert)
+
+    def remove_obstacle(self, x1, y1, x2, y2):
+        """
+        Editor delete of a map obstacle: remove it from the live trees if it
+        is still there (it may have been hit or left behind) and from the
+        restart state. Returns True if the live game had it. O(log n).
+        """
+        value = (int(x1), int(y1), int(x2), int(y2))
+        live = self.tree.search(self.tree.root, value) is not None
+        if live:
+            self.tree.root = self.tree.delete(self.tree.root, value)
+            self.lanes.delete(value)
+        if self.start is not None:
+            def delete():
+                self.tree.root = self.tree.delete(self.tree.root, value)
+                self.lanes.delete(value)
+            self._edit_start(delete)
+        return live
+
+    def _edit_start(self, edit):
+        """Apply edit() to the saved start state instead of the live one."""
+        live = self.tree.snapshot(), self.lanes.snapshot()
+        self.tree.restore(self.start.tree)
+        self.lanes.restore(self.start.lanes)
+        edit()
+        self.start.tree, self.start.lanes = self.tree.snapshot(), self.lanes.snapshot()
+        self.tree.restore(live[0])
+        self.lanes.restore(live[1])
+
+    def is_finished(self):
+        return self.car.x >= self.road_length or self.car.energy <= 0
 
     def end_game(self, msg):
+        self.game_over = msg
         if self.gui:
-            # Use messagebox in GUI thread
-            from tkinter import messagebox
-            messagebox.showinfo("Game Over", msg)
-        else:
-            print("Game Over:", msg)
\ No newline at end of file
+            self.gui.end_game(msg)
+        elif self.verbose:
+            print("Game Over:", msg)
@@ -0,0 +1,140 @@
+# app/batch.py
+import numpy as np
+
+from app.car import DAMAGE, DEFAULT_DAMAGE
+
+# action codes for BatchSimulation inputs
+NONE, UP, DOWN, JUMP = 0, 1, 2, 3
+
+CAR_WIDTH = 40
+
+
+class BatchSimulation:
+    """
+    Advance many independent cars against one shared obstacle set at once.
+
+    Car state (x, lane, energy, jump counters) lives in NumPy arrays and every
+    tick is resolved with vectorized lookups into the obstacles exported from
+    an AVLTree, sorted by (x1, y1). Instead of deleting an obstacle from a
+    shared tree after a hit, each car keeps a consumed bitmask over the
+    obstacle array. Per car the rules match App.update_game/check_collision.
+    """
+
+    def __init__(self, config, tree, n_cars, energy=100):
+        config = config or {}
+        self.n_cars = n_cars
+        self.road_length = config.get("road_length", 1000)
+        if self.road_length is None:
+            self.road_length = float("inf")
+        self.speed = config.get("car_speed", 5)
+        self.jump_duration = config.get("jump_duration", 30)
+
+        obstacles = tree.export_sorted(tree.root)
+        n = len(obstacles)
+        self.x1 = np.fromiter((o[0] for o in obstacles), dtype=np.int64, count=n)
+        self.y1 = np.fromiter((o[1] for o in obstacles), dtype=np.int64, count=n)
+        self.x2 = np.fromiter((o[2] for o in obstacles), dtype=np.int64, count=n)
+        self.y2 = np.fromiter((o[3] for o in obstacles), dtype=np.int64, count=n)
+        self.tipos = sorted({o[4] for o in obstacles})
+        codes = {tipo: i for i, tipo in enumerate(self.tipos)}
+        self.code = np.fromiter((codes[o[4]] for o in obstacles), dtype=np.int64, count=n)
+        self.damage = np.array([DAMAGE.get(t, DEFAULT_DAMAGE) for t in self.tipos], dtype=np.int64)
+        # widest obstacle bounds how far back a colliding x1 can be
+        self.max_width = int((self.x2 - self.x1).max()) if n else 0
+
+        self.x = np.zeros(n_cars, dtype=np.int64)
+        self.y = np.ones(n_cars, dtype=np.int64)
+        self.energy = np.full(n_cars, energy, dtype=np.int64)
+        self.is_jumping = np.zeros(n_cars, dtype=bool)
+        self.jump_progress = np.zeros(n_cars, dtype=np.int64)
+        self.ticks = np.zeros(n_cars, dtype=np.int64)
+        self.consumed = np.zeros((n_cars, (n + 7) // 8), dtype=np.uint8)
+        self.collisions = np.zeros((n_cars, len(self.tipos)), dtype=np.int64)
+        self.tick = 0
+
+    def active(self):
+        return (self.x < self.road_length) & (self.energy > 0)
+
+    def apply(self, actions, active):
+        """Apply one action code per car (NONE/UP/DOWN/JUMP) to the active cars."""
+        actions = np.asarray(actions)
+        up = active & (actions == UP) & (self.y > 0)
+        down = active & (actions == DOWN) & (self.y < 2)
+        jump = active & (actions == JUMP) & ~self.is_jumping
+        self.y -= up
+        self.y += down
+        self.is_jumping |= jump
+        self.jump_progress[jump] = 0
+
+    def step(self, actions=None):
+        """Advance every unfinished car by one tick. Returns the number of cars that moved."""
+        active = self.active()
+        if not active.any():
+            return 0
+        if actions is not None:
+            self.apply(actions, active)
+
+        self.x += self.speed * active
+        self.ticks += active
+        self.tick += 1
+
+        # jump countdown
+        jumping = active & self.is_jumping
+        self.jump_progress += jumping
+        landed = jumping & (self.jump_progress >= self.jump_duration)
+        self.is_jumping &= ~landed
+
+        self._collide(active & ~self.is_jumping)
+        return int(active.sum())
+
+    def _collide(self, cars):
+        if not len(self.x1) or not cars.any():
+            return
+        car_idx = np.nonzero(cars)[0]
+        x = self.x[car_idx]
+        y = self.y[car_idx]
+        # candidates: x1 in [x - max_width, x + CAR_WIDTH]
+        lo = np.searchsorted(self.x1, x - self.max_width, side="left")
+        hi = np.searchsorted(self.x1, x + CAR_WIDTH, side="right")
+        last = len(self.x1) - 1
+        for offset in range(int((hi - lo).max(initial=0))):
+            idx = lo + offset
+            valid = idx < hi
+            idx = np.minimum(idx, last)
+            y1, y2 = self.y1[idx], self.y2[idx]
+            byte, bit = idx >> 3, (idx & 7).astype(np.uint8)
+            taken = (self.consumed[car_idx, byte] >> bit) & 1
+            hit = (
+                valid
+                & (x <= self.x2[idx])
+                & (y1 <= y) & (y <= y2)
+                & (taken == 0)
+            )
+            if not hit.any():
+                continue
+            cars_hit, obs_hit = car_idx[hit], idx[hit]
+            self.energy[cars_hit] -= self.damage[self.code[obs_hit]]
+            np.add.at(self.collisions, (cars_hit, self.code[obs_hit]), 1)
+            self.consumed[cars_hit, obs_hit >> 3] |= (1 << (obs_hit & 7)).astype(np.uint8)
+
+    def run(self, policy=None, max_ticks=None):
+        """
+        Step until every car is done (or max_ticks). policy(tick, batch) returns
+        an array of action codes, one per car, or None for no input.
+        Returns the final state as a dict of per-car arrays.
+        """
+        while max_ticks is None or self.tick < max_ticks:
+            actions = policy(self.tick, self) if policy else None
+            if not self.step(actions):
+                break
+        return self.state()
+
+    def state(self):
+        return {
+            "ticks": self.ticks.copy(),
+            "x": self.x.copy(),
+            "y": self.y.copy(),
+            "energy": self.energy.copy(),
+            "completed": (self.x >= self.road_length) & (self.energy > 0),
+            "collisions": {tipo: self.collisions[:, i].copy() for i, tipo in enumerate(self.tipos)},
+        }
@@ -0,0 +1,235 @@
+# app/binmap.py
+"""
+Binary, memory-mapped obstacle maps (.avlmap).
+
+Layout (little endian):
+
+    magic    8 bytes  b"AVLMAP\\0\\0"
+    version  uint32
+    hlen     uint32   length of the JSON header
+    count    uint64   number of records
+    header   hlen bytes of JSON: {"config", "tipos", "max_width", "id"}
+    padding  up to a multiple of 8
+    records  count x RECORD, sorted by (x1, y1), one per (x1, y1) key
+
+Opening a map only reads the header; the records are a numpy.memmap, so
+pages are faulted in as range lookups binary-search them. Convert with:
+
+    py -m app.binmap to-bin json/ejemplo2.json json/ejemplo2.avlmap
+    py -m app.binmap to-json json/ejemplo2.avlmap out.json
+"""
+import argparse
+import json
+import os
+import struct
+import uuid
+
+import numpy as np
+
+from app.mapfile import MAGIC, is_binary_map  # noqa: F401 (re-exported)
+
+VERSION = 1
+PREFIX = struct.Struct("<8sIIQ")
+RECORD = np.dtype([("x1", "<i8"), ("y1", "<i4"), ("x2", "<i8"), ("y2", "<i4"), ("code", "<u2")])
+
+
+class BinaryMap:
+    """
+    Read-only view of an .avlmap file.
+
+    Attributes
+    ----------
+    config : dict
+        The map's config block.
+    tipos : list[str]
+        Obstacle type names, indexed by the records' code.
+    records : numpy.memmap
+        Structured array of RECORD, sorted by (x1, y1).
+    closed : bool
+        True once close() dropped the mapping.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, hlen, count = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not an obstacle map")
+            if version != VERSION:
+                raise ValueError(f"{path}: unsupported map version {version}")
+            header = json.loads(f.read(hlen))
+        self.config = header.get("config", {})
+        self.tipos = header["tipos"]
+        self.max_width = header["max_width"]
+        self.id = header["id"]
+        offset = _align(PREFIX.size + hlen)
+        if count:
+            self.records = np.memmap(path, dtype=RECORD, mode="r", offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD)
+        self.x1 = self.records["x1"]
+        self.closed = False
+
+    def close(self):
+        """
+        Drop the mapping, e.g. before the file is replaced (which Windows
+        refuses while it is mapped); the map reads as empty afterwards.
+        """
+        self.records = np.zeros(0, dtype=RECORD)
+        self.x1 = self.records["x1"]
+        self.closed = True
+
+    def __len__(self):
+        return len(self.records)
+
+    def _dicts(self, lo, hi):
+        chunk = self.records[lo:hi]
+        tipos = self.tipos
+        return [{"x1": int(r[0]), "y1": int(r[1]), "x2": int(r[2]), "y2": int(r[3]), "tipo": tipos[r[4]]}
+                for r in chunk.tolist()]
+
+    def obstacles(self, lo=0, hi=None):
+        """Records lo..hi (all by default) as obstacle dicts, in (x1, y1) order."""
+        return self._dicts(lo, len(self.records) if hi is None else hi)
+
+    def sorted_items(self, chunk_size=1 << 16):
+        """
+        Every record as a ((x1, y1, x2, y2), tipo) pair, in (x1, y1) order
+        (the app.mapfile record map protocol); no dicts are built.
+        """
+        tipos = self.tipos
+        for lo in range(0, len(self.records), chunk_size):
+            for x1, y1, x2, y2, code in self.records[lo:lo + chunk_size].tolist():
+                yield (x1, y1, x2, y2), tipos[code]
+
+    def range_query(self, x_min, x_max, y_min=None, y_max=None):
+        """
+        Obstacles overlapping [x_min, x_max] (and lanes [y_min, y_max] if
+        given), found by binary search on the mapped x1 column.
+        """
+        lo = int(np.searchsorted(self.x1, x_min - self.max_width, side="left"))
+        hi = int(np.searchsorted(self.x1, x_max, side="right"))
+        result = []
+        for obs in self._dicts(lo, hi):
+            if obs["x2"] < x_min:
+                continue
+            if y_min is not None and (obs["y2"] < y_min or obs["y1"] > y_max):
+                continue
+            result.append(obs)
+        return result
+
+    def source(self, chunk_size=1000):
+        """An obstacle source for App.attach_source that pages through the map."""
+        return BinaryMapSource(self, chunk_size)
+
+
+class BinaryMapSource:
+    """
+    take_until() over a BinaryMap, converting at most chunk_size records per
+    step. release() unmaps the file so it can be rewritten (ConfigManager
+    compaction); the next take_until maps it again and carries on after
+    the last limit taken.
+    """
+
+    def __init__(self, binary_map, chunk_size=1000):
+        self.map = binary_map
+        self.chunk_size = chunk_size
+        self._pos = 0
+        self._limit = float("-inf")  # largest x_limit taken so far
+        self.exhausted = not len(binary_map)
+
+    def release(self):
+        self.map.close()
+
+    def take_until(self, x_limit):
+        """Return the not yet taken obstacles with x1 < x_limit, sorted by (x1, y1)."""
+        if self.exhausted:
+            return []
+        if self.map.closed:
+            self.map = BinaryMap(self.map.path)
+            self._pos = int(np.searchsorted(self.map.x1, self._limit, side="left"))
+        self._limit = max(self._limit, x_limit)
+        end = int(np.searchsorted(self.map.x1, x_limit, side="left"))
+        taken = []
+        while self._pos < end:
+            hi = min(end, self._pos + self.chunk_size)
+            taken.extend(self.map.obstacles(self._pos, hi))
+            self._pos = hi
+        self.exhausted = self._pos >= len(self.map)
+        return taken
+
+    def close(self):
+        self.exhausted = True
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def normalize(obstacles):
+    """Obstacle dicts in record order: sorted by (x1, y1), first obstacle of each key only."""
+    ordered = []
+    last = None
+    for o in sorted(obstacles, key=lambda o: (o["x1"], o["y1"])):
+        key = (o["x1"], o["y1"])
+        if key != last:
+            ordered.append(o)
+            last = key
+    return ordered
+
+
+def write_binary(path, config, obstacles):
+    """
+    Write obstacle dicts as an .avlmap file, in normalize() order.
+    Returns the header id of the written map.
+    """
+    ordered = normalize(obstacles)
+    tipos = sorted({o.get("tipo", "obstaculo") for o in ordered})
+    codes = {tipo: i for i, tipo in enumerate(tipos)}
+    records = np.array([(o["x1"], o["y1"], o["x2"], o["y2"], codes[o.get("tipo", "obstaculo")])
+                        for o in ordered], dtype=RECORD)
+
+    map_id = uuid.uuid4().hex
+    header = json.dumps({
+        "config": config,
+        "tipos": tipos,
+        "max_width": int((records["x2"] - records["x1"]).max()) if len(records) else 0,
+        "id": map_id,
+    }).encode()
+    prefix = PREFIX.pack(MAGIC, VERSION, len(header), len(records))
+    with open(path, "wb") as f:
+        f.write(prefix)
+        f.write(header)
+        f.write(b"\0" * (_align(len(prefix) + len(header)) - len(prefix) - len(header)))
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    return map_id
+
+
+def json_to_binary(src, dst):
+    with open(src, "r") as f:
+        data = json.load(f)
+    write_binary(dst, data.get("config", {}), data.get("obstacles", []))
+
+
+def binary_to_json(src, dst):
+    binary_map = BinaryMap(src)
+    with open(dst, "w") as f:
+        json.dump({"config": binary_map.config, "obstacles": binary_map.obstacles()}, f, indent=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert obstacle maps between JSON and .avlmap.")
+    parser.add_argument("direction", choices=["to-bin", "to-json"])
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    args = parser.parse_args(argv)
+    if args.direction == "to-bin":
+        json_to_binary(args.src, args.dst)
+    else:
+        binary_to_json(args.src, args.dst)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,14 @@
+# energy lost per obstacle type
+DAMAGE = {
+    "roca": 20,
+    "hueco": 30,
+    "cono": 10,
+    "aceite": 15,
+    "peaton": 50,
+}
+DEFAULT_DAMAGE = 5
+
+
 class Car:
     def __init__(self, color="blue", energy=100, speed=5, jump_height=6, jump_duration=30):
         self.x = 0
@@ -52,16 +63,8 @@ class Car:
 
     def collide(self, obstacle):
         """Reduce energy depending on obstacle type"""
-        tipo = obstacle.get("tipo", "obstaculo")
-        if tipo == "roca":
-            self.energy -= 20
-        elif tipo == "hueco":
-            self.energy -= 30
-        elif tipo == "cono":
-            self.energy -= 10
-        elif tipo == "aceite":
-            self.energy -= 15
-        elif tipo == "peaton":
-            self.energy -= 50
-        else:
-            self.energy -= 5
\ No newline at end of file
+        self.hit(obstacle.get("tipo", "obstaculo"))
+
+    def hit(self, tipo):
+        """Reduce energy for hitting an obstacle of the given type"""
+        self.energy -= DAMAGE.get(tipo, DEFAULT_DAMAGE)
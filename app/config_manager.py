@@ -1,51 +1,277 @@
 # app/config_manager.py
+import hashlib
 import json
 import os
 
+from app.mapfile import is_binary_map
+from app.streaming import read_header
+from models.avl import AVLTree
+
 class ConfigManager:
     """
     Helper to load and save game configuration and obstacle list in a JSON file.
+
+    Edits are not written back to the JSON snapshot one by one: each one is
+    appended as a line to a journal next to it (<path>.log), which starts with
+    the hash of the snapshot it applies to. Loading replays snapshot + journal.
+    Once the journal grows past `log_limit` bytes it is compacted: the full
+    snapshot is written to a temp file and renamed over the old one, then the
+    journal restarts empty, also through a rename. A crash at any point
+    leaves either the old snapshot with its journal or the new snapshot, whose
+    hash no longer matches the stale journal, so nothing is applied twice; a
+    torn last journal line is ignored.
+
+    Binary .avlmap snapshots (app.binmap) and NDJSON maps (app.streaming)
+    are opened without reading their obstacles; the list is only built from
+    the file when it is first asked for (an edit, or get_obstacles()), and
+    compaction writes the same format back, so a streamed map stays
+    streamable.
+
+    Once edited, the obstacles are held in an order-statistic AVLTree keyed
+    by their position in the map (file order, duplicates included), so the
+    editor can pick and remove the k-th obstacle in O(log n); removals are
+    journaled by that position. The tree is only an index: get_obstacles()
+    lists the same dicts, in the same order, as the file plus the edits.
     """
 
-    def __init__(self, path="json/config.json"):
+    def __init__(self, path="json/config.json", log_limit=1 << 20):
         self.path = path
+        self.log_path = path + ".log"
+        self.log_limit = log_limit
         self.data = {"config": {}, "obstacles": []}
+        self._snapshot_hash = None  # hash of the snapshot on disk
+        self._log = None  # open journal file, lazily
+        self._stale = False  # data was replaced: the journal no longer applies
+        self.binary = None  # BinaryMap while the obstacles are not materialized
+        self._tree = None  # obstacles by position, see _index
+        self.format = "ndjson" if path.endswith(".ndjson") else "binary" if path.endswith(".avlmap") else "json"
+        self.pending = 0  # journal entries replayed on load
         self._load_if_exists()
 
     def _load_if_exists(self):
         if os.path.exists(self.path):
             try:
-                with open(self.path, "r") as f:
-                    loaded = json.load(f)
-                    if isinstance(loaded, dict):
-                        self.data = loaded
+                if self.format == "ndjson":
+                    # streamed map: only the header is read, see app.streaming
+                    self.data = {"config": read_header(self.path)}
+                    self._replay()
+                    return
+                if is_binary_map(self.path):
+                    from app.binmap import BinaryMap  # needs numpy
+                    self.binary = BinaryMap(self.path)
+                    self.format = "binary"
+                    self.data = {"config": self.binary.config}
+                    self._snapshot_hash = self.binary.id
+                    self._replay()
+                    return
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                loaded = json.loads(raw)
+                if isinstance(loaded, dict):
+                    self.data = loaded
+                    self._snapshot_hash = hashlib.sha1(raw).hexdigest()
             except Exception:
                 # keep defaults on error
                 self.data = {"config": {}, "obstacles": []}
+        self._replay()
+
+    # ---- Journal ----
+    def _replay(self):
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, "r") as f:
+            lines = f.read().split("\n")
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return
+        if header.get("snapshot") != self._current_hash():
+            return  # journal of an older snapshot (compaction finished before its reset)
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # torn write at the end
+            self._apply(entry)
+            self.pending += 1
+
+    def _current_hash(self):
+        # NDJSON maps can be large: only hash them once a journal has to be matched
+        if self._snapshot_hash is None and self.format == "ndjson" and os.path.exists(self.path):
+            digest = hashlib.sha1()
+            with open(self.path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            self._snapshot_hash = digest.hexdigest()
+        return self._snapshot_hash
+
+    def _apply(self, entry):
+        tree = self._index()
+        removed = None
+        if "add" in entry:
+            last = tree.max_key(tree.root)
+            tree.root = tree.insert(tree.root, _position(last[0] + 1 if last else 0, entry["add"]), entry["add"])
+        elif "remove" in entry:
+            node = tree.select(tree.root, entry["remove"])
+            if node is None:
+                return None
+            removed = node.tipo
+            tree.root = tree.delete(tree.root, node.value)
+        self.data.pop("obstacles", None)  # listed again on demand
+        return removed
+
+    def _append(self, entry):
+        """Apply an edit and journal it; compact once the journal is large."""
+        result = self._apply(entry)
+        if self._stale or self._log is None and not self._open_log():
+            self.compact()
+            return result
+        self._log.write(json.dumps(entry) + "\n")
+        self._log.flush()
+        if self._log.tell() > self.log_limit:
+            self.compact()
+        return result
+
+    def _open_log(self):
+        """Reopen the journal of the current snapshot; False if there is none to reuse."""
+        try:
+            with open(self.log_path, "rb") as f:
+                header = json.loads(f.readline())
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        except (OSError, ValueError):
+            return False
+        if torn or header.get("snapshot") != self._current_hash():
+            return False
+        self._log = open(self.log_path, "a")
+        return True
+
+    def compact(self):
+        """Write the full snapshot atomically and start an empty journal for it."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self.format == "binary":
+            from app.binmap import normalize, write_binary  # needs numpy
+            # the format keeps its records sorted: positions now refer to the new file
+            obstacles = self.data["obstacles"] = normalize(self.get_obstacles())
+            self._release_binary()  # the file is about to be replaced
+            self._tree = None
+            tmp = self.path + ".tmp"
+            self._snapshot_hash = write_binary(tmp, self.get_config(), obstacles)
+            os.replace(tmp, self.path)
+        elif self.format == "ndjson":
+            # header line, then the obstacles sorted by (x1, y1) as ObstacleStream needs
+            obstacles = self.data["obstacles"] = sorted(self.get_obstacles(), key=lambda o: (o["x1"], o["y1"]))
+            self._tree = None  # positions now refer to the new file
+            lines = [json.dumps({"config": self.get_config()})]
+            lines.extend(json.dumps(obs) for obs in obstacles)
+            raw = ("\n".join(lines) + "\n").encode()
+            self._replace(self.path, raw)
+            self._snapshot_hash = hashlib.sha1(raw).hexdigest()
+        else:
+            self.get_obstacles()
+            raw = json.dumps(self.data, indent=4).encode()
+            self._replace(self.path, raw)
+            self._snapshot_hash = hashlib.sha1(raw).hexdigest()
+        self._replace(self.log_path, (json.dumps({"snapshot": self._snapshot_hash}) + "\n").encode())
+        self._log = open(self.log_path, "a")
+        self._stale = False
+
+    @staticmethod
+    def _replace(path, raw):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
 
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self._release_binary()
+
+    def _release_binary(self):
+        if self.binary is not None:
+            self.binary.close()
+            self.binary = None
+
+    # ---- Data ----
     def get_config(self):
         return self.data.get("config", {})
 
     def get_obstacles(self):
-        return self.data.get("obstacles", [])
+        """The obstacle dicts, in map order."""
+        if "obstacles" not in self.data:
+            if self._tree is not None:
+                self.data["obstacles"] = [node.tipo for node in self._tree.inorder(self._tree.root)]
+            elif self.binary is not None:
+                self.data["obstacles"] = self.binary.obstacles()
+            elif self.format == "ndjson" and os.path.exists(self.path):
+                self.data["obstacles"] = self._read_ndjson()
+            else:
+                self.data["obstacles"] = []
+            self._release_binary()
+        return self.data["obstacles"]
+
+    def _index(self):
+        """
+        The obstacles as an AVLTree keyed by position (see _position), with
+        each dict as the node's payload; built in O(n) on first use.
+        """
+        if self._tree is None:
+            tree = AVLTree()
+            tree.root = tree.build_sorted((_position(i, obs), obs) for i, obs in enumerate(self.get_obstacles()))
+            self._tree = tree
+        return self._tree
+
+    def _read_ndjson(self):
+        with open(self.path, "r") as f:
+            f.readline()  # header
+            return [json.loads(line) for line in f if line.strip()]
+
+    def replace(self, data):
+        """
+        Swap in other map data (e.g. a loaded file); the next edit writes a
+        fresh snapshot, in this manager's file format.
+        """
+        self.data = data
+        self._release_binary()
+        self._tree = None
+        self._stale = True
 
     def add_obstacle(self, obs):
-        self.data.setdefault("obstacles", []).append(obs)
-        self._save()
+        self._append({"add": obs})
+
+    def count(self):
+        """Number of obstacles in the map."""
+        tree = self._index()
+        return tree.get_size(tree.root)
+
+    def select(self, idx):
+        """The idx-th obstacle of the map, or None. O(log n)."""
+        tree = self._index()
+        node = tree.select(tree.root, idx)
+        return node.tipo if node is not None else None
 
     def remove_obstacle_by_index(self, idx):
-        obs = self.data.get("obstacles", [])
-        if 0 <= idx < len(obs):
-            removed = obs.pop(idx)
-            self._save()
-            return removed
-        return None
-
-    def _save(self):
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        with open(self.path, "w") as f:
-            json.dump(self.data, f, indent=4)
+        """Remove the idx-th obstacle of the map; returns it, or None. O(log n)."""
+        if self.select(idx) is None:
+            return None
+        return self._append({"remove": idx})
 
     def save_file(self, path):
+        self.get_obstacles()
         with open(path, "w") as f:
-            json.dump(self.data, f, indent=4)
\ No newline at end of file
+            json.dump(self.data, f, indent=4)
+
+
+def _position(seq, obs):
+    # AVLTree orders by (value[0], value[1]): seq alone gives map order, duplicates included;
+    # the rest keeps the subtree bounds well-formed
+    return (seq, obs["y1"], obs["x2"], obs["y2"])
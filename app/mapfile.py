@@ -0,0 +1,29 @@
+# app/mapfile.py
+"""
+Map file detection that does not need numpy.
+
+app.binmap reads .avlmap files through numpy.memmap; the game itself only
+needs numpy for those, so App, ConfigManager, the replayer and the GUI
+check for a binary map here and import app.binmap only when they get one.
+
+A record map is any object with a sorted_items() method returning
+((x1, y1, x2, y2), tipo) pairs sorted and unique by (x1, y1), such as
+app.binmap.BinaryMap; App.load_obstacles builds its trees straight from
+those pairs instead of going through obstacle dicts.
+"""
+
+MAGIC = b"AVLMAP\0\0"
+
+
+def is_binary_map(path):
+    """True if path starts with the .avlmap magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def is_record_map(obj):
+    """True if obj follows the record map protocol (see above)."""
+    return callable(getattr(obj, "sorted_items", None))
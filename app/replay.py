@@ -0,0 +1,196 @@
+# app/replay.py
+"""
+Input recording and headless replay of GUI sessions.
+
+A Recorder is started whenever the GUI sets up a game at tick 0. It keeps
+the config, the obstacles loaded at that point (plus the path and hash of
+a streamed map, if any), the car's starting state, every key press and
+editor change stamped with the tick it landed on, and the car state after
+every tick. A recording is self-contained JSON:
+
+    {"version": 1, "config": {...}, "obstacles": [...], "source": null,
+     "source_hash": null, "map_hash": "...", "car": [x, y, energy, is_jumping, jump_progress],
+     "events": [[tick, "jump"], [tick, ["insert", x1, y1, x2, y2, tipo]], ...],
+     "trace": [[tick, x, y, energy, is_jumping], ...]}
+
+replay() feeds the events to a Simulation, which runs the ticks back to
+back, and verify() compares its trace with the recorded one:
+
+    py -m app.replay session.replay.json
+    py -m app.replay session.replay.json --backend array
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+
+from app.mapfile import is_binary_map
+from app.simulation import Simulation
+from app.streaming import ObstacleStream
+from models.array_avl import ArrayAVLTree
+from models.avl import AVLTree
+
+VERSION = 1
+BACKENDS = {"avl": AVLTree, "array": ArrayAVLTree}
+
+
+def file_hash(path):
+    """sha1 of a file's bytes, read in blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def map_hash(config, obstacles, source_hash=None):
+    """Hash of what a session is played on: config, loaded obstacles and streamed map."""
+    raw = json.dumps({"config": config, "obstacles": obstacles, "source": source_hash},
+                     sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class Recorder:
+    """
+    Tick-stamped log of one session, from tick 0.
+
+    record() is called with app.tick when a key press or an editor change
+    happens, i.e. before the update_game call it affects; record_tick()
+    after every update_game. After App.rewind, rewind(app.tick) forgets
+    whatever the restored checkpoint undid.
+    """
+
+    def __init__(self, app, obstacles=(), source=None):
+        car = app.car
+        self.config = app.config
+        self.obstacles = [dict(obs) for obs in obstacles]
+        self.source = source
+        self.source_hash = file_hash(source) if source else None
+        self.car = [car.x, car.y, car.energy, car.is_jumping, car.jump_progress]
+        self.events = []  # [tick, action]
+        self.trace = []  # [tick, x, y, energy, is_jumping]
+
+    def record(self, tick, action):
+        self.events.append([tick, action])
+
+    def record_tick(self, app):
+        car = app.car
+        self.trace.append([app.tick, car.x, car.y, car.energy, car.is_jumping])
+
+    def rewind(self, tick):
+        self.events = [e for e in self.events if e[0] < tick]
+        self.trace = [t for t in self.trace if t[0] <= tick]
+
+    def to_dict(self):
+        return {
+            "version": VERSION,
+            "config": self.config,
+            "obstacles": self.obstacles,
+            "source": self.source,
+            "source_hash": self.source_hash,
+            "map_hash": map_hash(self.config, self.obstacles, self.source_hash),
+            "car": self.car,
+            "events": self.events,
+            "trace": self.trace,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+
+def load(path):
+    with open(path, "r") as f:
+        recording = json.load(f)
+    if recording.get("version") != VERSION:
+        raise ValueError(f"{path}: unsupported recording version {recording.get('version')}")
+    return recording
+
+
+def simulation(recording, tree=None):
+    """
+    A Simulation at the recording's tick 0. Raises ValueError if the config,
+    the obstacles or the streamed map file no longer hash to map_hash.
+    """
+    source = recording.get("source")
+    source_hash = file_hash(source) if source else None
+    if source_hash != recording.get("source_hash"):
+        raise ValueError(f"{source}: streamed map differs from the recorded one")
+    if map_hash(recording["config"], recording["obstacles"], source_hash) != recording["map_hash"]:
+        raise ValueError("config or obstacles differ from the recorded ones")
+
+    config = recording["config"]
+    if source:
+        # the GUI does not generate a track on top of a streamed map
+        config = {k: v for k, v in config.items() if k != "track"}
+    sim = Simulation(config, recording["obstacles"], tree=tree)
+    if source:
+        if is_binary_map(source):
+            from app.binmap import BinaryMap  # needs numpy
+            sim.app.attach_source(BinaryMap(source).source())
+        else:
+            sim.app.attach_source(ObstacleStream(source))
+    car = sim.app.car
+    car.x, car.y, car.energy, car.is_jumping, car.jump_progress = recording["car"]
+    return sim
+
+
+def inputs(recording):
+    """{tick: [actions]} for Simulation.run."""
+    by_tick = {}
+    for tick, action in recording["events"]:
+        by_tick.setdefault(tick, []).append(action)
+    return by_tick
+
+
+def replay(recording, tree=None, max_ticks=None):
+    """Re-run a recording headless; returns the SimulationResult."""
+    sim = simulation(recording, tree)
+    try:
+        return sim.run(inputs(recording), max_ticks=max_ticks)
+    finally:
+        if sim.app.source is not None:
+            sim.app.source.close()
+
+
+def verify(recording, tree=None):
+    """
+    Replay up to the last recorded tick and compare the car state tick by
+    tick. Returns None if it matches, else (tick, recorded, replayed) for the
+    first tick that differs (replayed is None if the replay ended early).
+    """
+    trace = recording["trace"]
+    result = replay(recording, tree, max_ticks=trace[-1][0] if trace else 0)
+    replayed = result.trace
+    for i, expected in enumerate(trace):
+        expected = tuple(expected)
+        actual = replayed[i] if i < len(replayed) else None
+        if actual != expected:
+            return expected[0], expected, actual
+    if len(replayed) > len(trace):
+        return replayed[len(trace)][0], None, replayed[len(trace)]
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session headless and check it.")
+    parser.add_argument("recording")
+    parser.add_argument("--backend", default="avl", choices=sorted(BACKENDS))
+    args = parser.parse_args(argv)
+
+    recording = load(args.recording)
+    start = time.perf_counter()
+    mismatch = verify(recording, BACKENDS[args.backend]())
+    elapsed = time.perf_counter() - start
+    ticks = len(recording["trace"])
+    if mismatch is None:
+        print(f"{ticks} ticks replayed in {1000 * elapsed:.1f} ms: matches the recording")
+        return 0
+    tick, expected, actual = mismatch
+    print(f"Diverged at tick {tick}: recorded {expected}, replayed {actual}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# app/simulation.py
+from app.app import App
+from app.track import track_from_config
+from models.avl import AVLTree
+
+# input name -> Car method
+ACTIONS = {
+    "up": "move_up",
+    "down": "move_down",
+    "jump": "jump",
+}
+
+# editor action name -> App method, given as [name, *args]
+EDITS = {
+    "insert": "insert_obstacle",
+    "remove": "remove_obstacle",
+}
+
+
+class SimulationResult:
+    """
+    Outcome of a headless run.
+
+    Attributes
+    ----------
+    state : dict
+        Final state: ticks, x, y, energy, is_jumping, reason ("completed",
+        "energy" or "max_ticks") and collisions (tipo -> hits).
+    trace : list[tuple]
+        One (tick, x, y, energy, is_jumping) entry per simulated tick.
+    """
+    def __init__(self, state, trace):
+        self.state = state
+        self.trace = trace
+
+    def __repr__(self):
+        return f"SimulationResult({self.state})"
+
+
+class Simulation:
+    """
+    Headless fixed-step game runner built on App/Car/AVLTree.
+
+    Ticks run back to back with no Tk, PIL or matplotlib involved. Inputs for
+    tick t are applied right before the t-th update_game call, the same as a
+    key press landing between two game_loop callbacks.
+
+    inputs may be:
+      - None (no input),
+      - a dict {tick: action or [actions]},
+      - a sequence indexed by tick (action, list of actions or None),
+      - a callable policy(tick, app) returning an action, a list or None.
+    where an action is one of "up", "down", "jump", or an editor change
+    ["insert", x1, y1, x2, y2, tipo] / ["remove", x1, y1, x2, y2] (these only inside a
+    list of actions).
+
+    A config with a "track" entry also gets its procedural obstacles
+    (app.track), generated as the car advances.
+    """
+
+    def __init__(self, config, obstacles, tree=None, record_trace=True):
+        self.app = App(config, tree if tree is not None else AVLTree(), verbose=False)
+        self.app.load_obstacles(obstacles)
+        track = track_from_config(config)
+        if track is not None:
+            self.app.attach_source(track)
+        self.record_trace = record_trace
+        self.trace = []
+
+    @property
+    def tick(self):
+        return self.app.tick
+
+    def apply(self, actions):
+        """Apply one action name, a list of them, or None to the car."""
+        if not actions:
+            return
+        if isinstance(actions, str):
+            actions = (actions,)
+        car = self.app.car
+        for action in actions:
+            try:
+                if isinstance(action, str):
+                    getattr(car, ACTIONS[action])()
+                else:
+                    getattr(self.app, EDITS[action[0]])(*action[1:])
+            except KeyError:
+                raise ValueError(f"Unknown action: {action!r}") from None
+
+    def step(self, actions=None):
+        """Advance one tick. Returns False (and does nothing) once the game is over."""
+        app = self.app
+        if app.is_finished():
+            return False
+        self.apply(actions)
+        app.update_game()
+        if self.record_trace:
+            car = app.car
+            self.trace.append((app.tick, car.x, car.y, car.energy, car.is_jumping))
+        return True
+
+    def run(self, inputs=None, max_ticks=None):
+        """Step until the game ends (or max_ticks) and return a SimulationResult."""
+        app = self.app
+        if inputs is None:
+            next_input = lambda tick: None
+        elif callable(inputs):
+            next_input = lambda tick: inputs(tick, app)
+        elif isinstance(inputs, dict):
+            next_input = inputs.get
+        else:
+            count = len(inputs)
+            next_input = lambda tick: inputs[tick] if tick < count else None
+
+        while max_ticks is None or app.tick < max_ticks:
+            if not self.step(next_input(app.tick)):
+                break
+        return SimulationResult(self.state(), self.trace)
+
+    def state(self):
+        app, car = self.app, self.app.car
+        if car.energy <= 0:
+            reason = "energy"
+        elif car.x >= app.road_length:
+            reason = "completed"
+        else:
+            reason = "max_ticks"
+        return {
+            "ticks": app.tick,
+            "x": car.x,
+            "y": car.y,
+            "energy": car.energy,
+            "is_jumping": car.is_jumping,
+            "reason": reason,
+            "collisions": dict(app.collisions),
+        }
@@ -0,0 +1,160 @@
+# app/streaming.py
+"""
+Streaming obstacle loading for long tracks.
+
+Maps are stored as NDJSON: the first line holds the header
+{"config": {...}} and every following line is one obstacle dict, sorted by
+(x1, y1). ObstacleStream parses the file on a background thread, a chunk
+at a time, into a bounded queue; the game pulls only the obstacles that
+enter its lookahead window (App.attach_source), and App.check_collision
+trims the ones left behind, so memory stays bounded however long the
+road is.
+
+Convert an existing JSON map with:
+
+    py -m app.streaming json/config.json json/config.ndjson
+"""
+import json
+import queue
+import sys
+import threading
+
+_END = object()
+
+
+def read_header(path):
+    """Return the config dict stored on the first line of an NDJSON map."""
+    with open(path, "r") as f:
+        line = f.readline()
+    header = json.loads(line) if line.strip() else {}
+    return header.get("config", {})
+
+
+class ObstacleStream:
+    """
+    Sorted obstacles of an NDJSON map, read ahead on a daemon thread.
+
+    At most `prefetch` chunks of `chunk_size` obstacles are held in memory
+    besides the one being consumed. take_until(x) hands out, in order,
+    every obstacle with x1 < x that has not been handed out yet.
+
+    `timeout` is how long take_until waits for the reader thread when it
+    needs the next chunk. None (the default) waits until it arrives, so
+    headless runs and replays always see every obstacle. The GUI passes 0:
+    a tick never stalls on disk or parsing. It takes what has arrived so
+    far, and the rest comes on a later tick, within the lookahead window.
+    """
+
+    def __init__(self, path, chunk_size=1000, prefetch=4, timeout=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._chunk = []
+        self._pos = 0
+        self.exhausted = False
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+
+    # ---- Background side ----
+    def _reader(self):
+        try:
+            with open(self.path, "r") as f:
+                f.readline()  # header
+                chunk = []
+                last = None
+                for line in f:
+                    if not line.strip():
+                        continue
+                    obs = json.loads(line)
+                    key = (obs["x1"], obs["y1"])
+                    if last is not None and key < last:
+                        raise ValueError(f"{self.path}: obstacles are not sorted by (x1, y1) at {key}")
+                    last = key
+                    chunk.append(obs)
+                    if len(chunk) >= self.chunk_size:
+                        if not self._put(chunk):
+                            return
+                        chunk = []
+                if chunk and not self._put(chunk):
+                    return
+        except Exception as e:
+            self._put(e)
+            return
+        self._put(_END)
+
+    def _put(self, item):
+        # block while the consumer is behind, but wake up regularly to honour close()
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    # ---- Consumer side ----
+    def _next_chunk(self):
+        timeout = self.timeout
+        try:
+            item = self._queue.get(block=timeout is None or timeout > 0, timeout=timeout)
+        except queue.Empty:
+            return False  # not read yet: try again on the next call
+        if item is _END:
+            self.exhausted = True
+            return False
+        if isinstance(item, Exception):
+            self.exhausted = True
+            raise item
+        self._chunk, self._pos = item, 0
+        return True
+
+    def take_until(self, x_limit):
+        """
+        Return the not yet taken obstacles with x1 < x_limit, sorted by
+        (x1, y1); with a timeout, only those the reader has got to so far.
+        """
+        taken = []
+        while not self.exhausted:
+            chunk, pos = self._chunk, self._pos
+            end = pos
+            while end < len(chunk) and chunk[end]["x1"] < x_limit:
+                end += 1
+            taken.extend(chunk[pos:end])
+            self._pos = end
+            if end < len(chunk):
+                break  # the rest of this chunk is still ahead of x_limit
+            if not self._next_chunk():
+                break
+        return taken
+
+    def close(self):
+        self._stop.set()
+        self.exhausted = True
+
+
+def json_to_ndjson(src, dst):
+    """Rewrite a {"config", "obstacles"} JSON map as a sorted NDJSON map."""
+    with open(src, "r") as f:
+        data = json.load(f)
+    obstacles = sorted(data.get("obstacles", []), key=lambda o: (o["x1"], o["y1"]))
+    with open(dst, "w") as f:
+        f.write(json.dumps({"config": data.get("config", {})}) + "\n")
+        for obs in obstacles:
+            f.write(json.dumps(obs) + "\n")
+    return len(obstacles)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: py -m app.streaming SRC.json DST.ndjson")
+        return 2
+    count = json_to_ndjson(argv[0], argv[1])
+    print(f"Wrote {count} obstacles to {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# app/sweep.py
+"""
+Parameter sweep / tournament runner for headless playthroughs.
+
+Every combination of map, car_speed, jump_height, jump_duration, policy and
+seed is played with app.simulation.Simulation on a ProcessPoolExecutor.
+Maps are read once per worker process (the initializer loads the files),
+so tasks only carry a map path, a few overrides and a policy name.
+Finished runs are streamed to a CSV or JSON-lines file as they complete and
+a per-group summary (completion rate, mean energy left, collisions by tipo)
+is printed at the end.
+
+    py -m app.sweep --maps json/config.json json/ejemplo2.json \
+        --car-speed 5 10 --jump-duration 20 30 --policies idle jumper \
+        --out sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.simulation import Simulation
+
+LANES = 3
+LOOKAHEAD = 60
+
+
+# ---- Policies: policy(tick, app, rng) -> action or None ----
+def idle(tick, app, rng):
+    return None
+
+
+def _blocked(app, lane, distance):
+    car = app.car
+    ahead = app.next_obstacle(car.x, lane)
+    return ahead is not None and ahead.value[0] <= car.x + distance
+
+
+def jumper(tick, app, rng):
+    """Jump whenever something is right ahead in the current lane."""
+    car = app.car
+    if not car.is_jumping and _blocked(app, car.y, LOOKAHEAD + car.speed):
+        return "jump"
+    return None
+
+
+def dodger(tick, app, rng):
+    """Change to a free neighbouring lane when blocked, otherwise jump."""
+    car = app.car
+    if not _blocked(app, car.y, LOOKAHEAD + car.speed):
+        return None
+    for action, lane in (("up", car.y - 1), ("down", car.y + 1)):
+        if 0 <= lane < LANES and not _blocked(app, lane, LOOKAHEAD + car.speed):
+            return action
+    return None if car.is_jumping else "jump"
+
+
+def random_driver(tick, app, rng):
+    return rng.choice((None, None, None, None, "up", "down", "jump"))
+
+
+POLICIES = {
+    "idle": idle,
+    "jumper": jumper,
+    "dodger": dodger,
+    "random": random_driver,
+}
+
+
+# ---- Worker side ----
+_MAPS = {}
+
+
+def _init_worker(map_paths):
+    for path in map_paths:
+        with open(path, "r") as f:
+            _MAPS[path] = json.load(f)
+
+
+def _play(task):
+    map_path, overrides, policy_name, seed, max_ticks = task
+    data = _MAPS[map_path]
+    config = dict(data.get("config", {}))
+    config.update(overrides)
+    policy = POLICIES[policy_name]
+    rng = random.Random(seed)
+
+    sim = Simulation(config, data.get("obstacles", []), record_trace=False)
+    state = sim.run(lambda tick, app: policy(tick, app, rng), max_ticks=max_ticks).state
+    return {
+        "map": map_path,
+        **overrides,
+        "policy": policy_name,
+        "seed": seed,
+        "reason": state["reason"],
+        "completed": state["reason"] == "completed",
+        "energy": state["energy"],
+        "ticks": state["ticks"],
+        "collisions": state["collisions"],
+    }
+
+
+# ---- Driver side ----
+def build_tasks(maps, car_speeds, jump_heights, jump_durations, policies, seeds, max_ticks=None):
+    for map_path, speed, height, duration, policy, seed in itertools.product(
+        maps, car_speeds, jump_heights, jump_durations, policies, seeds
+    ):
+        overrides = {"car_speed": speed, "jump_height": height, "jump_duration": duration}
+        yield (map_path, overrides, policy, seed, max_ticks)
+
+
+class ResultWriter:
+    """Append finished runs to a CSV or JSON-lines file (picked by extension)."""
+
+    FIELDS = ["map", "car_speed", "jump_height", "jump_duration", "policy", "seed",
+              "reason", "completed", "energy", "ticks", "collisions"]
+
+    def __init__(self, path):
+        self.file = open(path, "w", newline="")
+        self.csv = None
+        if path.endswith(".csv"):
+            self.csv = csv.DictWriter(self.file, fieldnames=self.FIELDS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.csv:
+            self.csv.writerow({**row, "collisions": json.dumps(row["collisions"], sort_keys=True)})
+        else:
+            self.file.write(json.dumps(row) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def summarize(rows):
+    """Group runs by (map, params, policy) and aggregate completion, energy and hits by tipo."""
+    groups = {}
+    for row in rows:
+        key = (row["map"], row["car_speed"], row["jump_height"], row["jump_duration"], row["policy"])
+        group = groups.setdefault(key, {"runs": 0, "completed": 0, "energy": 0, "collisions": {}})
+        group["runs"] += 1
+        group["completed"] += row["completed"]
+        group["energy"] += max(0, row["energy"])
+        for tipo, hits in row["collisions"].items():
+            group["collisions"][tipo] = group["collisions"].get(tipo, 0) + hits
+
+    summary = []
+    for (map_path, speed, height, duration, policy), group in groups.items():
+        summary.append({
+            "map": map_path,
+            "car_speed": speed,
+            "jump_height": height,
+            "jump_duration": duration,
+            "policy": policy,
+            "runs": group["runs"],
+            "completion_rate": group["completed"] / group["runs"],
+            "mean_energy": group["energy"] / group["runs"],
+            "collisions": group["collisions"],
+        })
+    return summary
+
+
+def run_sweep(tasks, maps, out_path, workers=None):
+    """Run every task across a process pool, streaming rows to out_path. Returns the summary."""
+    writer = ResultWriter(out_path)
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(maps,)) as pool:
+            futures = [pool.submit(_play, task) for task in tasks]
+            for future in as_completed(futures):
+                row = future.result()
+                writer.write(row)
+                rows.append(row)
+    finally:
+        writer.close()
+    return summarize(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless parameter sweep across all cores.")
+    parser.add_argument("--maps", nargs="+", default=["json/config.json"])
+    parser.add_argument("--car-speed", nargs="+", type=int, default=[5])
+    parser.add_argument("--jump-height", nargs="+", type=int, default=[3])
+    parser.add_argument("--jump-duration", nargs="+", type=int, default=[30])
+    parser.add_argument("--policies", nargs="+", default=["idle"], choices=sorted(POLICIES))
+    parser.add_argument("--seeds", type=int, default=1, help="runs per combination (seeds 0..N-1)")
+    parser.add_argument("--max-ticks", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="sweep.csv", help="results file (.csv or .jsonl)")
+    parser.add_argument("--summary", default=None, help="optional JSON file for the aggregated summary")
+    args = parser.parse_args(argv)
+
+    tasks = build_tasks(args.maps, args.car_speed, args.jump_height, args.jump_duration,
+                        args.policies, range(args.seeds), args.max_ticks)
+    summary = run_sweep(tasks, args.maps, args.out, args.workers)
+
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=4)
+    json.dump(summary, sys.stdout, indent=4)
+    print()
+
+
+if __name__ == "__main__":
+    main()
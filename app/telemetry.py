@@ -0,0 +1,272 @@
+# app/telemetry.py
+"""
+Per-call timings and per-tick counters for the game loop and the trees.
+
+Instrumentation works by swapping methods on their classes: enable()
+replaces every watched method with a timing wrapper and disable() puts the
+original functions back, so a disabled Telemetry costs nothing at all.
+Timings go to fixed-size ring buffers (one per method), counters are
+summed per game tick (one App.update_game call) and kept in a ring too.
+
+    from app.telemetry import TELEMETRY
+    TELEMETRY.enable()
+    ...play...
+    TELEMETRY.export_chrome_trace("trace.json")   # chrome://tracing, Perfetto
+    TELEMETRY.export_csv("calls.csv")
+
+Counters per tick (everything counted since the previous update_game
+ended): calls of every watched method, "rotations", "nodes_visited" (nodes
+the insert, delete and range walks of the game's trees, App.tree and its
+lane trees, stepped through during update_game, from the trees' `visits`
+counters) and "deletes" (obstacles the game
+took out of play, by hits and trims, from App.removed; editor deletes and
+the per-lane copies are not counted).
+"""
+import csv
+import functools
+import json
+import time
+from array import array
+
+from app.app import App
+from models.array_avl import ArrayAVLTree
+from models.avl import AVLTree
+from models.lane_index import LaneIndex
+
+# point operations: (root, ...) walks one root-to-leaf path
+TREE_WALKS = ("insert", "delete", "search", "select", "rank", "delete_at", "first_reaching",
+              "successor", "predecessor", "ceiling", "floor")
+TREE_OPS = ("split", "join", "trim_before", "append_sorted", "build_sorted", "bulk_load",
+            "range_query", "range_into", "export_sorted")
+TREE_GENERATORS = ("iter_range", "iter_range_tuples", "inorder", "preorder", "postorder", "bfs")
+
+
+class Ring:
+    """Fixed-capacity buffer of (start, duration) pairs; old entries are overwritten."""
+    __slots__ = ("capacity", "starts", "durations", "pos", "count")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.starts = array("d", bytes(8 * capacity))
+        self.durations = array("d", bytes(8 * capacity))
+        self.pos = 0
+        self.count = 0  # total ever added
+
+    def add(self, start, duration):
+        i = self.pos
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.pos = i + 1 if i + 1 < self.capacity else 0
+        self.count += 1
+
+    def items(self):
+        """Kept entries, oldest first."""
+        n = min(self.count, self.capacity)
+        first = (self.pos - n) % self.capacity
+        return [(self.starts[(first + k) % self.capacity], self.durations[(first + k) % self.capacity])
+                for k in range(n)]
+
+
+class Telemetry:
+    """
+    Method instrumentation with ring-buffer storage.
+
+    watch(cls, names, kind) registers methods; kinds are "span" (timed),
+    "generator" (timed over the whole iteration), "count" (only counted,
+    under the given counter name) and "frame" (a span on App.update_game
+    that also closes the current tick's counters).
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.enabled = False
+        self._targets = []  # (cls, name, kind, label)
+        self._originals = []  # (cls, name, function) while enabled
+        self.reset()
+
+    def reset(self):
+        self.origin = time.perf_counter()
+        self.rings = {}  # label -> Ring
+        self.totals = {}  # counter -> count since reset
+        self.tick_counts = {}  # counter -> count in the current tick
+        self.ticks = [None] * self.capacity  # ring of (start, counts) per tick
+        self.tick_pos = 0
+        self.tick_total = 0
+        self._active = set()  # labels currently on the stack (recursion guard)
+
+    # ---- Registration ----
+    def watch(self, cls, names, kind="span", label=None):
+        for name in names:
+            if name in cls.__dict__:
+                self._targets.append((cls, name, kind, label or f"{cls.__name__}.{name}"))
+        if self.enabled:
+            self.disable()
+            self.enable()
+
+    def enable(self):
+        if self.enabled:
+            return
+        for cls, name, kind, label in self._targets:
+            func = cls.__dict__[name]
+            self._originals.append((cls, name, func))
+            setattr(cls, name, self._wrap(func, kind, label))
+        self.enabled = True
+
+    def disable(self):
+        for cls, name, func in reversed(self._originals):
+            setattr(cls, name, func)
+        self._originals = []
+        self.enabled = False
+
+    # ---- Recording ----
+    def _ring(self, label):
+        ring = self.rings.get(label)
+        if ring is None:
+            ring = self.rings[label] = Ring(self.capacity)
+        return ring
+
+    def count(self, name, n=1):
+        self.totals[name] = self.totals.get(name, 0) + n
+        self.tick_counts[name] = self.tick_counts.get(name, 0) + n
+
+    def _end_tick(self, start):
+        self.ticks[self.tick_pos] = (start, self.tick_counts)
+        self.tick_pos = (self.tick_pos + 1) % self.capacity
+        self.tick_total += 1
+        self.tick_counts = {}
+
+    def _wrap(self, func, kind, label):
+        perf = time.perf_counter
+        telemetry = self
+
+        if kind == "count":
+            def counted(*args, **kwargs):
+                telemetry.count(label)
+                return func(*args, **kwargs)
+            return functools.wraps(func)(counted)
+
+        if kind == "generator":
+            def generator(*args, **kwargs):
+                start = perf()
+                try:
+                    yield from func(*args, **kwargs)
+                finally:
+                    telemetry._ring(label).add(start - telemetry.origin, perf() - start)
+                    telemetry.count(label)
+            return functools.wraps(func)(generator)
+
+        def timed(*args, **kwargs):
+            if label in telemetry._active:
+                return func(*args, **kwargs)  # recursive call: only the outermost is timed
+            telemetry._active.add(label)
+            if kind == "frame":
+                removed, visits = args[0].removed, _game_visits(args[0])
+            start = perf()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                telemetry._ring(label).add(start - telemetry.origin, perf() - start)
+                telemetry._active.discard(label)
+                telemetry.count(label)
+                if kind == "frame":
+                    telemetry.count("deletes", args[0].removed - removed)
+                    telemetry.count("nodes_visited", _game_visits(args[0]) - visits)
+                    telemetry._end_tick(start - telemetry.origin)
+        return functools.wraps(func)(timed)
+
+    # ---- Reading ----
+    def stats(self):
+        """label -> {calls, mean_ms, p50_ms, p95_ms, max_ms} over the kept samples."""
+        result = {}
+        for label, ring in sorted(self.rings.items()):
+            durations = sorted(d for _, d in ring.items())
+            if not durations:
+                continue
+            n = len(durations)
+            result[label] = {
+                "calls": ring.count,
+                "mean_ms": 1000 * sum(durations) / n,
+                "p50_ms": 1000 * durations[n // 2],
+                "p95_ms": 1000 * durations[min(n - 1, n * 95 // 100)],
+                "max_ms": 1000 * durations[-1],
+            }
+        return result
+
+    def tick_history(self):
+        """Kept (start, counters) per tick, oldest first."""
+        n = min(self.tick_total, self.capacity)
+        first = (self.tick_pos - n) % self.capacity
+        return [self.ticks[(first + k) % self.capacity] for k in range(n)]
+
+    def frame_rate(self, label="GraphicInterface.draw_game", window=60):
+        """
+        (calls per second, mean ms per call) over the last `window` calls of
+        label: drawn frames per second by default, ticks per second for
+        "App.update_game".
+        """
+        ring = self.rings.get(label)
+        if ring is None or ring.count < 2:
+            return 0.0, 0.0
+        items = ring.items()[-window:]
+        elapsed = items[-1][0] - items[0][0]
+        fps = (len(items) - 1) / elapsed if elapsed > 0 else 0.0
+        return fps, 1000 * sum(d for _, d in items) / len(items)
+
+    # ---- Export ----
+    def export_json(self, path):
+        data = {
+            "stats": self.stats(),
+            "totals": self.totals,
+            "spans": {label: ring.items() for label, ring in self.rings.items()},
+            "ticks": self.tick_history(),
+        }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=4)
+
+    def export_csv(self, path):
+        """One row per kept call: label, start_ms, duration_ms."""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["label", "start_ms", "duration_ms"])
+            rows = [(start, label, duration) for label, ring in self.rings.items()
+                    for start, duration in ring.items()]
+            for start, label, duration in sorted(rows):
+                writer.writerow([label, f"{1000 * start:.4f}", f"{1000 * duration:.4f}"])
+
+    def export_chrome_trace(self, path):
+        """Trace Event Format: complete events per call and counter events per tick."""
+        events = []
+        for label, ring in self.rings.items():
+            for start, duration in ring.items():
+                events.append({"name": label, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6,
+                               "pid": 1, "tid": 1})
+        for start, counts in self.tick_history():
+            events.append({"name": "per tick", "ph": "C", "ts": start * 1e6, "pid": 1, "args": counts})
+        events.sort(key=lambda e: e["ts"])
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export(self, path):
+        """Pick the format from the extension: .csv, .trace.json (Chrome) or .json."""
+        if path.endswith(".csv"):
+            self.export_csv(path)
+        elif path.endswith(".trace.json") or path.endswith(".trace"):
+            self.export_chrome_trace(path)
+        else:
+            self.export_json(path)
+
+
+def _game_visits(app):
+    return app.tree.visits + sum(tree.visits for tree in app.lanes.lanes.values())
+
+
+TELEMETRY = Telemetry()
+TELEMETRY.watch(App, ["update_game"], kind="frame")
+TELEMETRY.watch(App, ["check_collision", "pull_obstacles"])
+for _tree in (AVLTree, ArrayAVLTree):
+    TELEMETRY.watch(_tree, TREE_WALKS)
+    TELEMETRY.watch(_tree, TREE_OPS)
+    TELEMETRY.watch(_tree, TREE_GENERATORS, kind="generator")
+TELEMETRY.watch(AVLTree, ["right_rotate", "left_rotate"], kind="count", label="rotations")
+TELEMETRY.watch(ArrayAVLTree, ["_right_rotate", "_left_rotate"], kind="count", label="rotations")
+TELEMETRY.watch(LaneIndex, ["iter_query", "next_ahead", "ahead", "insert", "delete", "trim_before", "append_sorted"])
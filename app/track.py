@@ -0,0 +1,174 @@
+# app/track.py
+"""
+Seeded procedural tracks.
+
+TrackGenerator is an obstacle source with the same take_until() interface
+as app.streaming.ObstacleStream, so App.attach_source can feed it to the
+tree a window at a time. The road is cut into fixed segments and every
+segment draws from its own Random(f"{seed}:{segment}"), so a seed always
+produces the same track no matter how far ahead, or in which steps, it is
+pulled.
+
+A config can ask for a generated track instead of listing obstacles:
+
+    "road_length": null,               (endless)
+    "track": {"seed": 7, "difficulty": 1.5}
+
+Write a finite track out as an NDJSON map with:
+
+    py -m app.track --seed 7 --difficulty 1.5 --length 100000 out.ndjson
+"""
+import argparse
+import json
+import random
+
+TIPOS = ("roca", "cono", "hueco", "aceite", "peaton")
+
+# obstacle length along x, (min, max)
+WIDTHS = {
+    "roca": (30, 40),
+    "cono": (30, 30),
+    "hueco": (30, 40),
+    "aceite": (30, 60),
+    "peaton": (30, 30),
+}
+
+
+class TrackGenerator:
+    """
+    Deterministic endless (or road_length long) obstacle source.
+
+    Obstacles sit in rows `spacing` px apart, starting at `start`. A row is
+    filled with probability `density`; it blocks between 1 and lanes - 1
+    lanes, so there is always a free lane, and two blocked neighbouring lanes
+    may be covered by a single two-lane obstacle (y1 < y2). Higher difficulty
+    packs rows closer, fills more of them, blocks more lanes per row and
+    favours the more damaging tipos.
+    """
+
+    SEGMENT = 1000
+
+    def __init__(self, seed=0, difficulty=1.0, road_length=None, lanes=3, start=150):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.road_length = float("inf") if road_length is None else road_length
+        self.lanes = lanes
+        self.start = start
+
+        self.spacing = max(60, int(150 / (0.5 + 0.5 * difficulty)))
+        self.density = min(0.95, 0.4 + 0.3 * difficulty)
+        self.extra_lane = min(0.8, 0.25 * difficulty)
+        self.span_chance = min(0.5, 0.15 * difficulty)
+        self.weights = [4, 4, 2 + difficulty, 2 + difficulty, 1 + difficulty]
+
+        self._segment = 0
+        self._pending = []
+        self._pos = 0
+        self.exhausted = False
+
+    # ---- Generation ----
+    def segment(self, index):
+        """Obstacle dicts of segment `index`, sorted by (x1, y1)."""
+        rng = random.Random(f"{self.seed}:{index}")
+        lo = index * self.SEGMENT
+        hi = lo + self.SEGMENT
+        spacing = self.spacing
+        first = max(lo, self.start)
+        slot = self.start + -(-(first - self.start) // spacing) * spacing
+
+        obstacles = []
+        while slot < hi and slot < self.road_length:
+            if rng.random() < self.density:
+                obstacles.extend(self._row(rng, slot))
+            slot += spacing
+        return obstacles
+
+    def _row(self, rng, slot):
+        count = 1
+        while count < self.lanes - 1 and rng.random() < self.extra_lane:
+            count += 1
+        blocked = sorted(rng.sample(range(self.lanes), count))
+        jitter = self.spacing // 4
+
+        row = []
+        i = 0
+        while i < len(blocked):
+            y1 = y2 = blocked[i]
+            i += 1
+            if i < len(blocked) and blocked[i] == y1 + 1 and rng.random() < self.span_chance:
+                y2 = blocked[i]
+                i += 1
+            tipo = rng.choices(TIPOS, self.weights)[0]
+            x1 = slot + rng.randint(0, jitter)
+            if x1 >= self.road_length:
+                continue
+            x2 = x1 + rng.randint(*WIDTHS[tipo])
+            row.append({"x1": x1, "y1": y1, "x2": x2, "y2": y2, "tipo": tipo})
+        row.sort(key=lambda o: (o["x1"], o["y1"]))
+        return row
+
+    def iter_obstacles(self):
+        """Every obstacle of the track in (x1, y1) order (endless if road_length is None)."""
+        index = 0
+        while index * self.SEGMENT < self.road_length:
+            yield from self.segment(index)
+            index += 1
+
+    # ---- Source interface ----
+    def take_until(self, x_limit):
+        """Return the not yet taken obstacles with x1 < x_limit, sorted by (x1, y1)."""
+        while (not self.exhausted and self._segment * self.SEGMENT < x_limit
+               and self._segment * self.SEGMENT < self.road_length):
+            if self._pos:
+                del self._pending[:self._pos]
+                self._pos = 0
+            self._pending.extend(self.segment(self._segment))
+            self._segment += 1
+
+        pending, pos = self._pending, self._pos
+        end = pos
+        while end < len(pending) and pending[end]["x1"] < x_limit:
+            end += 1
+        taken = pending[pos:end]
+        self._pos = end
+        if end == len(pending) and self._segment * self.SEGMENT >= self.road_length:
+            self.exhausted = True
+        return taken
+
+    def close(self):
+        self.exhausted = True
+
+
+def track_from_config(config):
+    """Return a TrackGenerator for config["track"], or None if the config has no track."""
+    track = (config or {}).get("track")
+    if track is None:
+        return None
+    return TrackGenerator(
+        seed=track.get("seed", 0),
+        difficulty=track.get("difficulty", 1.0),
+        road_length=config.get("road_length"),
+        start=track.get("start", 150),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a procedural track as an NDJSON map.")
+    parser.add_argument("out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--difficulty", type=float, default=1.0)
+    parser.add_argument("--length", type=int, default=100_000, help="road_length of the map")
+    args = parser.parse_args(argv)
+
+    generator = TrackGenerator(args.seed, args.difficulty, args.length)
+    count = 0
+    with open(args.out, "w") as f:
+        f.write(json.dumps({"config": {"road_length": args.length}}) + "\n")
+        for obs in generator.iter_obstacles():
+            f.write(json.dumps(obs) + "\n")
+            count += 1
+    print(f"Wrote {count} obstacles to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+# bench/__main__.py
+from bench.suite import main
+
+main()
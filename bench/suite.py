@@ -0,0 +1,257 @@
+# bench/suite.py
+"""
+Benchmark suite for AVLTree and the game tick.
+
+Times AVLTree.insert/delete/search/range_query and the traversals, plus
+App.update_game and App.check_collision, for several tree sizes and
+obstacle layouts, measures the memory a loaded App holds in its main tree
+and in its lane index, writes the results as JSON and optionally compares
+them with a saved baseline.
+
+    py -m bench --sizes 1000 10000 100000 --out bench.json
+    py -m bench --save-baseline bench/baseline.json
+    py -m bench --baseline bench/baseline.json --threshold 0.15 --fail-on-regression
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from app.app import App
+from models.avl import AVLTree
+from models.array_avl import ArrayAVLTree
+
+BACKENDS = {"avl": AVLTree, "array": ArrayAVLTree}
+SAMPLE = 2000  # operations timed per size for search/delete/range_query
+TICKS = 2000
+
+
+# ---- Layouts: list of obstacle dicts in insertion order ----
+def layout_random(n, rng):
+    obstacles = []
+    for _ in range(n):
+        x1 = rng.randint(0, n * 10)
+        y1 = rng.randint(0, 2)
+        obstacles.append({"x1": x1, "y1": y1, "x2": x1 + rng.randint(10, 40), "y2": y1, "tipo": "roca"})
+    return obstacles
+
+
+def layout_sorted(n, rng):
+    # already ordered by x1: the worst case for a plain BST, lots of rotations for an AVL
+    return [{"x1": i * 10, "y1": i % 3, "x2": i * 10 + 20, "y2": i % 3, "tipo": "cono"} for i in range(n)]
+
+
+def layout_dense_lane(n, rng):
+    # every obstacle in lane 1, heavily overlapping
+    obstacles = []
+    for i in range(n):
+        x1 = i * 2 + rng.randint(0, 1)
+        obstacles.append({"x1": x1, "y1": 1, "x2": x1 + 40, "y2": 1, "tipo": "hueco"})
+    return obstacles
+
+
+LAYOUTS = {"random": layout_random, "sorted": layout_sorted, "dense_lane": layout_dense_lane}
+
+
+def _value(obs):
+    return (obs["x1"], obs["y1"], obs["x2"], obs["y2"])
+
+
+def _clock(fn):
+    start = time.perf_counter()
+    count = fn()
+    return time.perf_counter() - start, count
+
+
+def bench_tree(backend, obstacles, rng):
+    """Yield (op, ops, seconds) for every AVLTree operation on one layout."""
+    tree = BACKENDS[backend]()
+
+    def insert_all():
+        for obs in obstacles:
+            tree.root = tree.insert(tree.root, _value(obs), obs["tipo"])
+        return len(obstacles)
+    yield ("insert",) + _clock(insert_all)[::-1]
+
+    sample = [obstacles[rng.randrange(len(obstacles))] for _ in range(SAMPLE)]
+    span = max(obs["x2"] for obs in obstacles)
+
+    def search_sample():
+        for obs in sample:
+            tree.search(tree.root, _value(obs))
+        return len(sample)
+    yield ("search",) + _clock(search_sample)[::-1]
+
+    def range_sample():
+        for _ in range(SAMPLE):
+            x = rng.randint(0, span)
+            tree.range_query(tree.root, x, x + 200, 1, 1)
+        return SAMPLE
+    yield ("range_query",) + _clock(range_sample)[::-1]
+
+    for name in ("inorder", "preorder", "postorder", "bfs"):
+        order = getattr(tree, name)
+        yield (name,) + _clock(lambda: sum(1 for _ in order(tree.root)))[::-1]
+
+    def delete_sample():
+        for obs in sample:
+            tree.root = tree.delete(tree.root, _value(obs))
+        return len(sample)
+    yield ("delete",) + _clock(delete_sample)[::-1]
+
+
+def bench_game(backend, obstacles):
+    """Yield (op, ops, seconds) for App.update_game and App.check_collision."""
+    def new_app():
+        app = App({"road_length": float("inf"), "car_speed": 5}, BACKENDS[backend](), verbose=False)
+        app.load_obstacles(obstacles)
+        app.car.energy = float("inf")
+        return app
+
+    app = new_app()
+
+    def ticks():
+        for _ in range(TICKS):
+            app.update_game()
+        return TICKS
+    yield ("update_game",) + _clock(ticks)[::-1]
+
+    app = new_app()
+
+    def collisions():
+        for _ in range(TICKS):
+            app.car.x += app.car.speed
+            app.check_collision()
+        return TICKS
+    yield ("check_collision",) + _clock(collisions)[::-1]
+
+
+def _traced():
+    # a full collection also empties CPython's free lists, which tracemalloc counts as still in use
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def bench_memory(backend, obstacles):
+    """Yield (op, obstacles, bytes) held by App's main tree and by its lane index after loading."""
+    tracemalloc.start()
+    try:
+        app = App({}, BACKENDS[backend](), verbose=False)
+        before = _traced()
+        app.load_obstacles(obstacles)
+        loaded = _traced() - before
+        tree = BACKENDS[backend]()
+        before = _traced()
+        tree.root = tree.bulk_load(obstacles)
+        alone = _traced() - before
+    finally:
+        tracemalloc.stop()
+    yield "memory_tree", len(obstacles), alone
+    yield "memory_lanes", len(obstacles), loaded - alone
+
+
+def run(sizes, layouts, backends, seed=1):
+    results = []
+    for backend in backends:
+        for layout in layouts:
+            for n in sizes:
+                rng = random.Random(seed)
+                obstacles = LAYOUTS[layout](n, rng)
+                for op, ops, seconds in list(bench_tree(backend, obstacles, rng)) + list(bench_game(backend, obstacles)):
+                    result = {
+                        "backend": backend,
+                        "layout": layout,
+                        "n": n,
+                        "op": op,
+                        "ops": ops,
+                        "seconds": seconds,
+                        "us_per_op": seconds / ops * 1e6 if ops else 0.0,
+                    }
+                    results.append(result)
+                    print(f"{backend:<6}{layout:<11}{n:>9}  {op:<16}{result['us_per_op']:>10.2f} us/op", file=sys.stderr)
+                for op, count, nbytes in bench_memory(backend, obstacles):
+                    result = {
+                        "backend": backend,
+                        "layout": layout,
+                        "n": n,
+                        "op": op,
+                        "ops": count,
+                        "bytes": nbytes,
+                        "bytes_per_op": nbytes / count if count else 0.0,
+                    }
+                    results.append(result)
+                    print(f"{backend:<6}{layout:<11}{n:>9}  {op:<16}{result['bytes_per_op']:>10.1f} B/obstacle", file=sys.stderr)
+    return results
+
+
+def _key(result):
+    return (result["backend"], result["layout"], result["n"], result["op"])
+
+
+def _metric(result):
+    # timings and memory are both "lower is better"
+    if "bytes_per_op" in result:
+        return result["bytes_per_op"], "B/obstacle"
+    return result["us_per_op"], "us/op"
+
+
+def compare(results, baseline, threshold):
+    """Return rows (key, base, now, ratio) for results slower (or larger) than baseline by more than threshold."""
+    base = {_key(r): _metric(r)[0] for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = base.get(_key(result))
+        if not before:
+            continue
+        now, unit = _metric(result)
+        ratio = now / before
+        print(f"{'/'.join(map(str, _key(result))):<45}{before:>10.2f} ->{now:>10.2f} {unit}  x{ratio:.2f}")
+        if ratio > 1 + threshold:
+            regressions.append((_key(result), before, now, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AVLTree and game tick benchmarks.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--layouts", nargs="+", default=sorted(LAYOUTS), choices=sorted(LAYOUTS))
+    parser.add_argument("--backends", nargs="+", default=["avl"], choices=sorted(BACKENDS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--save-baseline", help="write results as the new baseline JSON")
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown ratio (0.10 = 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+        },
+        "results": run(args.sizes, args.layouts, args.backends, args.seed),
+    }
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(report["results"], baseline, args.threshold)
+        for key, before, now, ratio in regressions:
+            print(f"REGRESSION {'/'.join(map(str, key))}: {before:.2f} -> {now:.2f} (x{ratio:.2f})")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
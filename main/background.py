@@ -0,0 +1,45 @@
+# main/background.py
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+
+def _row_colors(height, road_top, road_bottom):
+    """One RGB colour per canvas row: grass gradient, road gradient, grass gradient."""
+    road_height = road_bottom - road_top
+    rows = []
+    for i in range(height):
+        if i < road_top:
+            green_val = int(50 + (i / road_top) * 80)
+            rows.append((green_val, 150, green_val))
+        elif i < road_bottom:
+            gray = int(90 + ((i - road_top) / road_height) * 90)
+            rows.append((gray, gray, gray))
+        else:
+            green_val = int(130 - ((i - road_bottom) / (height - road_bottom)) * 60)
+            rows.append((green_val, 150, green_val))
+    return rows
+
+
+@lru_cache(maxsize=8)
+def render_background(width, height, road_height, lane_count):
+    """
+    Render grass, road and dashed lane lines into a PIL image.
+    Cached by canvas size and lane count, so it is only rebuilt on resize.
+    """
+    road_top = (height - road_height) // 2
+    road_bottom = road_top + road_height
+
+    # build one column of row colours and stretch it across the width
+    column = Image.new("RGB", (1, height))
+    column.putdata(_row_colors(height, road_top, road_bottom))
+    image = column.resize((width, height), Image.Resampling.NEAREST)
+
+    # dashed lane borders: 12 px on, 12 px off, 3 px wide
+    draw = ImageDraw.Draw(image)
+    lane_height = road_height // lane_count
+    for i in range(1, lane_count):
+        y = road_top + i * lane_height
+        for x in range(0, width, 24):
+            draw.line([(x, y), (min(x + 11, width - 1), y)], fill="white", width=3)
+    return image
@@ -6,9 +6,16 @@ from PIL import Image, ImageTk
 
 from app.app import App
 from models.avl import AVLTree
+from app.mapfile import is_binary_map
 from app.config_manager import ConfigManager
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from app.replay import Recorder
+from app.streaming import ObstacleStream, read_header
+from app.telemetry import TELEMETRY
+from app.track import track_from_config
+from main.renderer import RoadRenderer
+from main.scheduler import FrameScheduler
+from main.tree_layout import TreeLayout
+from main.tree_view import TraversalView, TreeView
 
 class GraphicInterface:
     def __init__(self, root):
@@ -16,8 +23,16 @@ class GraphicInterface:
         self.root.title("Car Game with AVL")
         self.config_mgr = ConfigManager("json/config.json")
 
-        self.tree = AVLTree()
+        self.tree = AVLTree(persistent=True)
         self.app = None
+        self.stream_path = None  # set when the loaded map is streamed
+        self.recorder = None  # input log of the current game, see app.replay
+        self.scheduler = None
+        self._after = None  # pending game_loop callback
+        self._prev_x = None  # car x before the last step, for interpolated drawing
+        self.tree_layout = TreeLayout()
+        self.tree_view = TreeView(root, lambda: self.tree, self.tree_layout)
+        self.traversal_views = {}
 
         # Buttons frame
         frame = tk.Frame(root)
@@ -33,11 +48,16 @@ class GraphicInterface:
         tk.Button(frame, text="Postorder", command=self.show_postorder).grid(row=1, column=2, padx=5, pady=5)
         tk.Button(frame, text="BFS", command=self.show_bfs).grid(row=1, column=3, padx=5, pady=5)
         tk.Button(frame, text="Restart", command=self.restart_game).grid(row=0, column=5, padx=5)
+        tk.Button(frame, text="Rewind", command=self.rewind_game).grid(row=1, column=4, padx=5, pady=5)
+        tk.Button(frame, text="Telemetry", command=self.toggle_telemetry).grid(row=1, column=5, padx=5, pady=5)
 
         # Bind keys (guard against app None)
         self.root.bind("<Up>", lambda e: self._safe_move_up())
         self.root.bind("<Down>", lambda e: self._safe_move_down())
         self.root.bind("<space>", lambda e: self._safe_jump())
+        self.root.bind("<F3>", lambda e: self.toggle_telemetry())
+        self.root.bind("<F4>", lambda e: self.export_telemetry())
+        self.root.bind("<F5>", lambda e: self.save_replay())
 
         # icons
         # === Load and resize icons with PIL ===
@@ -55,28 +75,61 @@ class GraphicInterface:
             "peaton": load_icon("assets/human.png"),
         }
 
-        self.canvas = tk.Canvas(root, width=800, height=300, bg="white")
-        self.canvas.pack()
+        self.canvas = tk.Canvas(root, width=800, height=300, bg="white", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+        self.renderer = RoadRenderer(self.canvas, self.icons)
+        self.canvas.bind("<Configure>", self._on_canvas_resize)
 
 
+    def _on_canvas_resize(self, event):
+        self.renderer.resize(event.width, event.height)
+        if self.app:
+            self.draw_game()
+
     # safe wrappers
     def _safe_move_up(self):
         if self.app:
             self.app.car.move_up()
+            self._record("up")
 
     def _safe_move_down(self):
         if self.app:
             self.app.car.move_down()
+            self._record("down")
 
     def _safe_jump(self):
         if self.app:
             self.app.car.jump()
+            self._record("jump")
+
+    # === Recording ===
+    def _new_recording(self):
+        """Start logging inputs for the game just set up at tick 0."""
+        obstacles = [] if self.stream_path else self.config_mgr.get_obstacles()
+        self.recorder = Recorder(self.app, obstacles, self.stream_path)
+
+    def _record(self, action):
+        if self.recorder:
+            self.recorder.record(self.app.tick, action)
+
+    def save_replay(self):
+        """F5: save the current game's inputs; check them with py -m app.replay FILE."""
+        if not self.recorder:
+            messagebox.showwarning("Warning", "Please load configuration first.")
+            return
+        filename = filedialog.asksaveasfilename(defaultextension=".replay.json",
+                                                filetypes=[("Replay", "*.replay.json")])
+        if filename:
+            self.recorder.save(filename)
 
     # JSON load/save using ConfigManager
     def load_json(self):
-        filename = filedialog.askopenfilename(filetypes=[("JSON files","*.json")])
+        filename = filedialog.askopenfilename(filetypes=[("JSON files","*.json"), ("Streamed maps","*.ndjson *.avlmap")])
         if not filename:
             return
+        if filename.endswith(".ndjson") or is_binary_map(filename):
+            self._load_stream(filename)
+            return
         try:
             with open(filename, "r") as f:
                 data = json.load(f)
@@ -85,13 +138,68 @@ class GraphicInterface:
             return
 
         # copy loaded data into config manager and use its config
-        self.config_mgr.data = data
+        self.stream_path = None
+        self._use_config_file("json/config.json")
+        self.config_mgr.replace(data)
         config = self.config_mgr.get_config()
-        self.tree = AVLTree()
+        self.tree = AVLTree(persistent=True)
         self.app = App(config, self.tree, gui=self)
         self.app.load_obstacles(self.config_mgr.get_obstacles())
+        self._attach_track(config)
+        self._new_recording()
         messagebox.showinfo("Success", "Configuration and obstacles loaded.")
 
+    def _attach_track(self, config):
+        """Generate the config's procedural track, if it has one, as the car advances."""
+        track = track_from_config(config)
+        if track is not None:
+            self.app.attach_source(track)
+
+    def _load_stream(self, filename):
+        """Load an NDJSON or binary map lazily: obstacles arrive as the car gets close to them."""
+        try:
+            if is_binary_map(filename):
+                from app.binmap import BinaryMap  # needs numpy
+                config = BinaryMap(filename).config
+            else:
+                config = read_header(filename)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load map: {e}")
+            return
+        self.stream_path = filename
+        # editor changes are journaled next to the map itself, in its own format
+        self._use_config_file(filename)
+        if self.config_mgr.pending:
+            # fold earlier edits into the file the stream reads
+            self.config_mgr.compact()
+        config = self.config_mgr.get_config()
+        self._start_stream_app(config)
+        self._new_recording()
+        messagebox.showinfo("Success", "Configuration loaded; obstacles are streamed.")
+
+    def _release_stream(self):
+        """Unmap a streamed binary map before an edit may compact it; the stream maps it again."""
+        release = getattr(self.app.source, "release", None)
+        if release is not None:
+            release()
+
+    def _use_config_file(self, path):
+        if self.config_mgr.path != path:
+            self.config_mgr.close()
+            self.config_mgr = ConfigManager(path)
+
+    def _start_stream_app(self, config):
+        if self.app and self.app.source:
+            self.app.source.close()
+        self.tree = AVLTree(persistent=True)
+        self.app = App(config, self.tree, gui=self)
+        if is_binary_map(self.stream_path):
+            from app.binmap import BinaryMap  # needs numpy
+            self.app.attach_source(BinaryMap(self.stream_path).source())
+        else:
+            # never wait for the reader thread inside a game tick
+            self.app.attach_source(ObstacleStream(self.stream_path, timeout=0))
+
     def insert_node(self):
         if not self.app:
             messagebox.showwarning("Warning", "Please load configuration first.")
@@ -117,6 +225,8 @@ class GraphicInterface:
                 messagebox.showerror("Error","Coordinates must be integers.")
                 return
             self.app.insert_obstacle(x1,y1,x2,y2,tipo)
+            self._record(["insert", x1, y1, x2, y2, tipo])
+            self._release_stream()
             self.config_mgr.add_obstacle({"x1":x1,"y1":y1,"x2":x2,"y2":y2,"tipo":tipo})
             messagebox.showinfo("Success","Obstacle inserted.")
             top.destroy()
@@ -128,27 +238,47 @@ class GraphicInterface:
             messagebox.showwarning("Warning", "Please load configuration first.")
             return
 
-        obs = self.config_mgr.get_obstacles()
-        if not obs:
+        # positions refer to the map being edited, not to what is left of it in the running game
+        mgr = self.config_mgr
+        count = mgr.count()
+        if not count:
             messagebox.showinfo("Info","No obstacles to remove.")
             return
 
         top = tk.Toplevel()
-        tk.Label(top, text="Select obstacle to delete").pack(pady=5)
-        options=[f"{i}: ({o['x1']},{o['y1']},{o['x2']},{o['y2']}) - {o['tipo']}" for i,o in enumerate(obs)]
-        var=tk.StringVar(top); var.set(options[0])
-        tk.OptionMenu(top,var,*options).pack(pady=5)
+        tk.Label(top, text="Select obstacle to delete (position in the map)").pack(pady=5)
+        var = tk.IntVar(top, value=0)
+        tk.Spinbox(top, from_=0, to=count - 1, textvariable=var, width=8).pack(pady=5)
+        preview = tk.Label(top)
+        preview.pack(pady=5)
+
+        def selected():
+            try:
+                return mgr.select(var.get())
+            except tk.TclError:
+                return None
+
+        def show(*_):
+            obs = selected()
+            preview.config(text=f"({obs['x1']},{obs['y1']})-({obs['x2']},{obs['y2']}) - {obs['tipo']}" if obs else "-")
+
+        var.trace_add("write", show)
+        show()
 
         def eliminar():
-            idx=int(var.get().split(":")[0])
-            removed = self.config_mgr.remove_obstacle_by_index(idx)
-            if removed:
-                # rebuild tree from remaining obstacles
-                self.tree = AVLTree()
-                self.app.tree = self.tree
-                self.app.load_obstacles(self.config_mgr.get_obstacles())
+            self._release_stream()
+            try:
+                obs = mgr.remove_obstacle_by_index(var.get())
+            except tk.TclError:
+                return
+            if obs is None:
+                return
+            value = (obs["x1"], obs["y1"], obs["x2"], obs["y2"])
+            self.app.remove_obstacle(*value)
+            self._record(["remove", *value])
+            if self.tree.root:
                 self.show_tree()
-                messagebox.showinfo("Success", f"Removed {removed}")
+            messagebox.showinfo("Success", f"Removed {value} - {obs['tipo']}")
             top.destroy()
 
         tk.Button(top, text="Delete", command=eliminar).pack(pady=10)
@@ -161,269 +291,125 @@ class GraphicInterface:
         if getattr(self, "game_running", False):
             return
         self.game_running = True
+        # one simulation step per refresh_time of wall time, see main.scheduler
+        config = self.app.config
+        self.scheduler = FrameScheduler(self.app.refresh_time, config.get("max_frame_steps", 5))
+        self.interpolate = config.get("interpolate", False)
+        self._prev_x = None
         self.game_loop()
 
     def game_loop(self):
-        if self.app.car.x < self.app.road_length and self.app.car.energy > 0:
-            self.app.update_game()
-            self.draw_game()
-            self.root.after(self.app.refresh_time, self.game_loop)
-        else:
+        self._after = None
+        if not self.game_running:
+            return
+        app = self.app
+        steps = self.scheduler.due()
+        for _ in range(steps):
+            if app.is_finished():
+                break
+            self._prev_x = app.car.x
+            app.update_game()
+            if self.recorder:
+                self.recorder.record_tick(app)
+
+        if app.is_finished():
             self.game_running = False
+            self.draw_game()
             messagebox.showinfo("Game Over","End of the game")
+            return
+        if steps or self.interpolate:
+            self.draw_game()
+        # interpolated frames are drawn every frame_time ms between steps
+        frame_ms = app.config.get("frame_time", 16) if self.interpolate else None
+        self._after = self.root.after(self.scheduler.delay_ms(frame_ms), self.game_loop)
+
+    def stop_game_loop(self):
+        self.game_running = False
+        if self._after is not None:
+            self.root.after_cancel(self._after)
+            self._after = None
+
+    def end_game(self, msg):
+        messagebox.showinfo("Game Over", msg)
+
+    def draw_game(self):
+        view_x = None
+        if getattr(self, "game_running", False) and self.interpolate and self._prev_x is not None:
+            # between the last two steps, so the road scrolls smoothly at any refresh_time
+            view_x = self._prev_x + (self.app.car.x - self._prev_x) * self.scheduler.alpha
+        self.renderer.draw(self.app, view_x)
+        if TELEMETRY.enabled:
+            # the fixed timestep decouples the two: frames drawn vs. simulation steps
+            fps, draw_ms = TELEMETRY.frame_rate("GraphicInterface.draw_game")
+            tps, tick_ms = TELEMETRY.frame_rate("App.update_game")
+            self.renderer.set_overlay(f"{fps:5.1f} FPS  draw {draw_ms:6.2f} ms\n"
+                                      f"{tps:5.1f} tick/s tick {tick_ms:6.2f} ms")
+
+    # === Telemetry ===
+    def toggle_telemetry(self):
+        """F3: start/stop recording timings (see app.telemetry) and the FPS overlay."""
+        if TELEMETRY.enabled:
+            TELEMETRY.disable()
+            self.renderer.set_overlay(None)
+        else:
+            TELEMETRY.reset()
+            TELEMETRY.enable()
 
-    def draw_game(self): 
-        self.canvas.delete("all")
-
-        # Visual parameters
-        canvas_width = 800
-        canvas_height = 300
-        road_height = 180
-        road_top = (canvas_height - road_height) // 2
-        road_bottom = road_top + road_height
-
-        # Grass up and down
-        self.canvas.create_rectangle(0, 0, canvas_width, road_top, fill="#228B22", outline="")
-        self.canvas.create_rectangle(0, road_bottom, canvas_width, canvas_height, fill="#228B22", outline="")
-
-        # Road gradient
-        for i in range(road_top, road_bottom, 8):
-            gray = int(90 + (i - road_top) * 1.0)
-            shade = f"#{gray:02x}{gray:02x}{gray:02x}"
-            y2 = min(i+8, road_bottom)
-            self.canvas.create_rectangle(0, i, canvas_width, y2, fill=shade, outline="")
-
-        # Centered road
-        self.canvas.create_rectangle(0, road_top, canvas_width, road_bottom, fill="#5a5a5a", outline="")
-
-        for i in range(road_top):
-            rel = i / road_top
-            green_val = int(50 + rel * 80)
-            shade = f"#{green_val:02x}{150:02x}{green_val:02x}"
-            self.canvas.create_line(0, i, canvas_width, i, fill=shade)
-
-        for i in range(road_top, road_bottom):
-            rel = (i - road_top) / road_height
-            gray = int(90 + rel * 90)  
-            shade = f"#{gray:02x}{gray:02x}{gray:02x}"
-            self.canvas.create_line(0, i, canvas_width, i, fill=shade)
-
-        for i in range(road_bottom, canvas_height):
-            rel = (i - road_bottom) / (canvas_height - road_bottom)
-            green_val = int(130 - rel * 60)  
-            shade = f"#{green_val:02x}{150:02x}{green_val:02x}"
-            self.canvas.create_line(0, i, canvas_width, i, fill=shade)
-
-        # Lanes
-        lane_count = 3
-        lane_height = road_height // lane_count
-        lane_borders = [road_top + i * lane_height for i in range(lane_count + 1)]
-        lane_centers = [(lane_borders[i] + lane_borders[i+1]) / 2 for i in range(lane_count)]
-
-        # === Líneas viales ===
-        for i in range(1, lane_count):
-            y = lane_borders[i]
-            self.canvas.create_line(0, y, canvas_width, y, fill="white", dash=(12, 12), width=3)
-
-        # Obstacles
-        render_distance_front = canvas_width
-        render_distance_back = 100
-        obstacle_width = 40
-
-        car_x = 120
-
-        visibles = self.tree.range_query(
-            self.tree.root,
-            self.app.car.x - render_distance_back,
-            self.app.car.x + render_distance_front,
-            0, lane_count - 1
-        )
-
-        for obs in visibles:
-            ox, oy = obs["x1"], obs["y1"]
-            screen_x = car_x + (ox - self.app.car.x)
-            screen_y = lane_centers[oy]
-            tipo = obs["tipo"]
-            if tipo in self.icons:
-                self.canvas.create_image(screen_x, screen_y, image=self.icons[tipo], anchor="center")
-            else:
-                colors = {"roca": "gray", "hueco": "black", "peaton": "blue"}
-                fill_color = colors.get(tipo, "orange")
-                self.canvas.create_rectangle(
-                    screen_x - obstacle_width // 2, screen_y - obstacle_width // 2,
-                    screen_x + obstacle_width // 2, screen_y + obstacle_width // 2,
-                    fill=fill_color, outline=""
-                )
-
-        # Car
-        car_y = lane_centers[self.app.car.y] + self.app.car.get_jump_offset()
-        icon_key = self.app.car.get_icon_key()
-        self.canvas.create_image(car_x, car_y, image=self.icons[icon_key], anchor="center")
-
-        # Energy bar
-        bar_x, bar_y, bar_w, bar_h = 10, 10, 200, 20
-        self.canvas.create_rectangle(bar_x, bar_y, bar_x+bar_w, bar_y+bar_h,
-                                    outline="white", width=2)
-        energy_ratio = max(0, self.app.car.energy) / 100
-        color = "green" if energy_ratio > 0.5 else "orange" if energy_ratio > 0.2 else "red"
-        self.canvas.create_rectangle(bar_x, bar_y, bar_x + bar_w * energy_ratio,
-                                    bar_y + bar_h, fill=color, outline="")
-        self.canvas.create_text(bar_x + bar_w/2, bar_y + bar_h/2,
-                                text=f"⚡ {self.app.car.energy}%",
-                                fill="white", font=("Arial", 10, "bold"))
-
-
+    def export_telemetry(self):
+        """F4: save what was recorded as JSON, CSV or a Chrome trace (*.trace.json)."""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".trace.json",
+            filetypes=[("Chrome trace", "*.trace.json"), ("JSON", "*.json"), ("CSV", "*.csv")])
+        if filename:
+            TELEMETRY.export(filename)
 
     # === AVL visualization ===
     def show_tree(self):
         if not self.tree.root:
             messagebox.showwarning("Warning","Tree is empty.")
             return
+        self.tree_view.redraw()
 
-        if not hasattr(self,"tree_window") or not self.tree_window.winfo_exists():
-            self.tree_window = tk.Toplevel(self.root)
-            self.tree_window.title("AVL Tree")
-            self.fig, self.ax = plt.subplots(figsize=(6,4))
-            self.tree_canvas = FigureCanvasTkAgg(self.fig, master=self.tree_window)
-            self.tree_canvas.get_tk_widget().pack(fill="both", expand=True)
-        else:
-            self.ax.clear()
-
-        positions = {}; counter = {"x":0,"max_depth":0}
-        def inorder(node, depth=0):
-            if not node: return
-            inorder(node.left, depth+1)
-            positions[node] = (counter["x"], depth)
-            counter["x"] += 1
-            counter["max_depth"] = max(counter["max_depth"], depth)
-            inorder(node.right, depth+1)
-        inorder(self.tree.root)
-
-        spacing_x, spacing_y = 2.0, 2.5
-        scaled = {node:(xi*spacing_x, -depth*spacing_y) for node,(xi,depth) in positions.items()}
-
-        # Edges
-        for node,(x,y) in scaled.items():
-            if node.left and node.left in scaled:
-                xl, yl = scaled[node.left]; self.ax.plot([x,xl],[y,yl],color="gray",linewidth=1)
-            if node.right and node.right in scaled:
-                xr, yr = scaled[node.right]; self.ax.plot([x,xr],[y,yr],color="gray",linewidth=1)
-
-        # Nodes
-        for node,(x,y) in scaled.items():
-            x1,y1,x2,y2 = node.value
-            label = f"({x1},{y1})-({x2},{y2})\n{node.tipo}"
-            bf = self.tree.get_balance(node)
-            label += f"\nBF={bf}"
-
-            # Color by balance factor
-            color = "lightgreen" if bf == 0 else "lightblue" if bf > 0 else "lightcoral"
-
-            circle = plt.Circle((x,y), radius=0.6, edgecolor="black", facecolor=color, lw=1.5)
-            self.ax.add_patch(circle)
-            self.ax.text(x,y,label,ha="center",va="center",fontsize=7, fontweight="bold")
-
-        if scaled:
-            xs, ys = zip(*scaled.values())
-            self.ax.set_xlim(min(xs)-spacing_x, max(xs)+spacing_x)
-            self.ax.set_ylim(min(ys)-spacing_y, max(ys)+spacing_y)
-
-        self.ax.axis("off")
-        self.ax.set_title("AVL Tree of Obstacles")
-        self.tree_canvas.draw()
-        self.tree_window.update_idletasks()
+    def tree_changed(self):
+        """Called from the game tick: the tree view redraws later, coalesced."""
+        self.tree_view.request_redraw()
 
     # Traversal helpers
-    def _show_traversal(self, nodes, title):
-        if not nodes:
+    def _show_traversal(self, order, title):
+        if not self.tree.root:
             messagebox.showinfo("Traversal", "Tree is empty.")
             return
-
-        # Create or reuse window
-        window = tk.Toplevel(self.root)
-        window.title(title)
-        fig, ax = plt.subplots(figsize=(6, 4))
-        canvas = FigureCanvasTkAgg(fig, master=window)
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-
-        # === Calculate positions (reuse inorder layout like show_tree) ===
-        positions = {}
-        counter = {"x": 0, "max_depth": 0}
-
-        def inorder_pos(node, depth=0):
-            if not node:
-                return
-            inorder_pos(node.left, depth + 1)
-            positions[node] = (counter["x"], depth)
-            counter["x"] += 1
-            counter["max_depth"] = max(counter["max_depth"], depth)
-            inorder_pos(node.right, depth + 1)
-
-        inorder_pos(self.tree.root)
-
-        spacing_x, spacing_y = 2.0, 2.5
-        scaled = {node: (xi * spacing_x, -depth * spacing_y)
-                for node, (xi, depth) in positions.items()}
-
-        # === Draw edges ===
-        for node, (x, y) in scaled.items():
-            if node.left and node.left in scaled:
-                xl, yl = scaled[node.left]
-                ax.plot([x, xl], [y, yl], color="gray", linewidth=1)
-            if node.right and node.right in scaled:
-                xr, yr = scaled[node.right]
-                ax.plot([x, xr], [y, yr], color="gray", linewidth=1)
-
-        # === Highlight traversal order ===
-        order_map = {node: idx + 1 for idx, node in enumerate(nodes)}
-        for node, (x, y) in scaled.items():
-            x1, y1, x2, y2 = node.value
-            tipo = getattr(node, "type", "unknown")
-            label = f"({x1},{y1})-({x2},{y2})\n{tipo}"
-
-            if node in order_map:
-                # Node is part of the traversal
-                circle = plt.Circle((x, y), radius=0.6, edgecolor="black", facecolor="lightgreen")
-                ax.add_patch(circle)
-                # Number showing visit order
-                ax.text(x, y, f"{order_map[node]}", ha="center", va="center", fontsize=9, color="red")
-            else:
-                # Non-visited node (shouldn't happen in complete traversals)
-                circle = plt.Circle((x, y), radius=0.6, edgecolor="black", facecolor="lightblue")
-                ax.add_patch(circle)
-
-            ax.text(x, y - 0.9, label, ha="center", va="center", fontsize=6)
-
-        # Adjust view
-        if scaled:
-            xs, ys = zip(*scaled.values())
-            ax.set_xlim(min(xs) - spacing_x, max(xs) + spacing_x)
-            ax.set_ylim(min(ys) - spacing_y, max(ys) + spacing_y)
-
-        ax.axis("off")
-        ax.set_title(title)
-        canvas.draw()
-        window.update_idletasks()
+        view = self.traversal_views.get(title)
+        if view is None:
+            view = self.traversal_views[title] = TraversalView(self.root, self.tree_layout, title)
+        view.show(self.tree, order)
     
     def show_inorder(self):
         """Display the AVL tree highlighting nodes in Inorder traversal."""
-        nodes = list(self.tree.inorder(self.tree.root))
-        self._show_traversal(nodes, "Inorder Traversal")
+        self._show_traversal("inorder", "Inorder Traversal")
 
     def show_preorder(self):
         """Display the AVL tree highlighting nodes in Preorder traversal."""
-        nodes = list(self.tree.preorder(self.tree.root))
-        self._show_traversal(nodes, "Preorder Traversal")
+        self._show_traversal("preorder", "Preorder Traversal")
 
     def show_postorder(self):
         """Display the AVL tree highlighting nodes in Postorder traversal."""
-        nodes = list(self.tree.postorder(self.tree.root))
-        self._show_traversal(nodes, "Postorder Traversal")
+        self._show_traversal("postorder", "Postorder Traversal")
 
     def show_bfs(self):
         """Display the AVL tree highlighting nodes in Breadth-First traversal (BFS)."""
-        nodes = list(self.tree.bfs(self.tree.root))
-        self._show_traversal(nodes, "BFS Traversal")
+        self._show_traversal("bfs", "BFS Traversal")
+
+    def rewind_game(self):
+        """Go back to the latest checkpoint (taken every checkpoint_every ticks)."""
+        if not self.app or not self.app.checkpoints:
+            messagebox.showwarning("Warning", "No checkpoint to rewind to.")
+            return
+        self.app.rewind()
+        self._prev_x = None
+        if self.recorder:
+            self.recorder.rewind(self.app.tick)
+        self.draw_game()
 
     def restart_game(self):
         if not self.app:
@@ -431,13 +417,18 @@ class GraphicInterface:
             return
         
         # Stop loop
-        self.game_running = False  
+        self.stop_game_loop()
         
-        # Create new tree and restart app with the same configuration
-        self.tree = AVLTree()
-        config = self.config_mgr.get_config()
-        self.app = App(config, self.tree, gui=self)
-        self.app.load_obstacles(self.config_mgr.get_obstacles())
+        # Go back to the saved start state, or rebuild the app with the same configuration
+        if not self.app.restart():
+            config = self.config_mgr.get_config()
+            if self.stream_path:
+                self._start_stream_app(config)
+            else:
+                self.tree = AVLTree(persistent=True)
+                self.app = App(config, self.tree, gui=self)
+                self.app.load_obstacles(self.config_mgr.get_obstacles())
+                self._attach_track(config)
         
         # restar car
         self.app.car.x = 0
@@ -446,19 +437,24 @@ class GraphicInterface:
         self.app.car.is_jumping = False
         self.app.car.jump_offset = 0
         self.app.car.jump_velocity = 0
+        self._new_recording()
         
         # clean canvas
-        self.canvas.delete("all")
+        self.renderer.reset()
         
         # Redraw 
         self.draw_game()
         
         # Refresh AVL if still open
-        if hasattr(self, "tree_window") and self.tree_window.winfo_exists():
+        if self.tree_view.is_open():
             self.show_tree()
         
         messagebox.showinfo("Restart", "Game restarted successfully.")
 
+TELEMETRY.watch(GraphicInterface, ["draw_game", "show_tree"])
+TELEMETRY.watch(RoadRenderer, ["draw"])
+TELEMETRY.watch(TreeView, ["redraw"])
+
 if __name__ == "__main__":
     root = tk.Tk()
     gui = GraphicInterface(root)
@@ -0,0 +1,182 @@
+# main/renderer.py
+from PIL import ImageTk
+
+from main.background import render_background
+
+OBSTACLE_COLORS = {"roca": "gray", "hueco": "black", "peaton": "blue"}
+
+
+class RoadRenderer:
+    """
+    Retained-mode drawing of the game canvas.
+
+    The background (grass and road gradients, lane dashes) is a single
+    pre-rendered image, created once per canvas size.
+    Obstacles are drawn with pooled canvas items that are only moved
+    (coords/itemconfig) when their position or icon changes and hidden when
+    they leave the view; the car and the energy bar keep fixed item IDs.
+    An obstacle spanning several lanes (y1 < y2) takes one pooled item per lane.
+    """
+
+    def __init__(self, canvas, icons, width=800, height=300, lane_count=3):
+        self.canvas = canvas
+        self.icons = icons
+        self.lane_count = lane_count
+
+        self.car_screen_x = 120
+        self.render_distance_back = 100
+        self.obstacle_width = 40
+
+        self._layout(width, height)
+        self.reset()
+
+    def _layout(self, width, height):
+        self.width = width
+        self.height = height
+        self.road_height = height * 3 // 5
+        self.road_top = (height - self.road_height) // 2
+        self.road_bottom = self.road_top + self.road_height
+        lane_height = self.road_height // self.lane_count
+        self.lane_borders = [self.road_top + i * lane_height for i in range(self.lane_count + 1)]
+        self.lane_centers = [(self.lane_borders[i] + self.lane_borders[i + 1]) / 2
+                             for i in range(self.lane_count)]
+        self.render_distance_front = width
+
+    def resize(self, width, height):
+        """Adopt a new canvas size; the background is re-rendered on the next draw."""
+        if (width, height) == (self.width, self.height):
+            return
+        self._layout(width, height)
+        self.reset()
+
+    def reset(self):
+        """Forget every item (e.g. after canvas.delete("all")); the next draw rebuilds them."""
+        self.canvas.delete("all")
+        self._built = False
+        # pools: [item id, last state or None when hidden]
+        self._images = []
+        self._rects = []
+        self._car = None
+        self._car_state = None
+        self._energy_state = None
+        self._overlay = None
+        self._overlay_text = None
+
+    # ---- Static items ----
+    def _build(self):
+        self._draw_background()
+        c = self.canvas
+        self._car = c.create_image(self.car_screen_x, self.lane_centers[0], anchor="center", tags="car")
+
+        bar_x, bar_y, bar_w, bar_h = 10, 10, 200, 20
+        self._bar = (bar_x, bar_y, bar_w, bar_h)
+        c.create_rectangle(bar_x, bar_y, bar_x + bar_w, bar_y + bar_h, outline="white", width=2, tags="hud")
+        self._energy_fill = c.create_rectangle(bar_x, bar_y, bar_x, bar_y + bar_h, outline="", tags="hud")
+        self._energy_text = c.create_text(bar_x + bar_w / 2, bar_y + bar_h / 2, fill="white",
+                                          font=("Arial", 10, "bold"), tags="hud")
+        self._built = True
+
+    def _draw_background(self):
+        image = render_background(self.width, self.height, self.road_height, self.lane_count)
+        # keep a reference: Tk does not hold on to PhotoImage objects
+        self._background = ImageTk.PhotoImage(image)
+        self.canvas.create_image(0, 0, image=self._background, anchor="nw", tags="background")
+
+    def set_overlay(self, text):
+        """Show text (e.g. FPS and frame times) in the top-right corner; None hides it."""
+        if text == self._overlay_text or not self._built:
+            return
+        c = self.canvas
+        if self._overlay is None:
+            self._overlay = c.create_text(self.width - 10, 10, anchor="ne", fill="white",
+                                          font=("Courier", 9, "bold"), tags="hud")
+        c.itemconfigure(self._overlay, text=text or "", state="normal" if text else "hidden")
+        self._overlay_text = text
+
+    # ---- Pools ----
+    def _new_item(self, pool):
+        c = self.canvas
+        if pool is self._images:
+            item = c.create_image(0, 0, anchor="center", tags="obstacle")
+        else:
+            item = c.create_rectangle(0, 0, 0, 0, outline="", tags="obstacle")
+        pool.append([item, None])
+        # keep the car and HUD above obstacles
+        c.tag_raise("car")
+        c.tag_raise("hud")
+        return pool[-1]
+
+    def _place(self, pool, used, state):
+        slot = pool[used] if used < len(pool) else self._new_item(pool)
+        if slot[1] == state:
+            return
+        c = self.canvas
+        item = slot[0]
+        if pool is self._images:
+            x, y, icon = state
+            c.coords(item, x, y)
+            if slot[1] is None or slot[1][2] != icon:
+                c.itemconfigure(item, image=self.icons[icon])
+        else:
+            x, y, color = state
+            half = self.obstacle_width // 2
+            c.coords(item, x - half, y - half, x + half, y + half)
+            if slot[1] is None or slot[1][2] != color:
+                c.itemconfigure(item, fill=color)
+        if slot[1] is None:
+            c.itemconfigure(item, state="normal")
+        slot[1] = state
+
+    def _hide_from(self, pool, used):
+        for slot in pool[used:]:
+            if slot[1] is None:
+                break  # everything after a hidden slot is hidden too
+            self.canvas.itemconfigure(slot[0], state="hidden")
+            slot[1] = None
+
+    # ---- Frame ----
+    def draw(self, app, view_x=None):
+        """Draw the road around view_x (default: the car's x, see FrameScheduler.alpha)."""
+        if not self._built:
+            self._build()
+        car = app.car
+        tree = app.tree
+        if view_x is None:
+            view_x = car.x
+
+        images = rects = 0
+        for node in tree.iter_range(tree.root,
+                                    view_x - self.render_distance_back,
+                                    view_x + self.render_distance_front,
+                                    0, self.lane_count - 1):
+            ox, y1, _, y2 = node.value
+            screen_x = self.car_screen_x + (ox - view_x)
+            tipo = node.tipo
+            # an obstacle spanning lanes y1..y2 blocks each of them: draw it in each
+            for lane in range(max(y1, 0), min(y2, self.lane_count - 1) + 1):
+                screen_y = self.lane_centers[lane]
+                if tipo in self.icons:
+                    self._place(self._images, images, (screen_x, screen_y, tipo))
+                    images += 1
+                else:
+                    self._place(self._rects, rects, (screen_x, screen_y, OBSTACLE_COLORS.get(tipo, "orange")))
+                    rects += 1
+        self._hide_from(self._images, images)
+        self._hide_from(self._rects, rects)
+
+        # Car
+        car_state = (self.lane_centers[car.y] + car.get_jump_offset(), car.get_icon_key())
+        if car_state != self._car_state:
+            self.canvas.coords(self._car, self.car_screen_x, car_state[0])
+            self.canvas.itemconfigure(self._car, image=self.icons[car_state[1]])
+            self._car_state = car_state
+
+        # Energy bar
+        if car.energy != self._energy_state:
+            bar_x, bar_y, bar_w, bar_h = self._bar
+            energy_ratio = max(0, car.energy) / 100
+            color = "green" if energy_ratio > 0.5 else "orange" if energy_ratio > 0.2 else "red"
+            self.canvas.coords(self._energy_fill, bar_x, bar_y, bar_x + bar_w * energy_ratio, bar_y + bar_h)
+            self.canvas.itemconfigure(self._energy_fill, fill=color)
+            self.canvas.itemconfigure(self._energy_text, text=f"⚡ {car.energy}%")
+            self._energy_state = car.energy
@@ -0,0 +1,63 @@
+# main/scheduler.py
+import math
+import time
+
+
+class FrameScheduler:
+    """
+    Fixed-timestep clock for the Tk game loop.
+
+    Elapsed time from a monotonic clock is accumulated and every frame runs
+    as many whole `step_ms` simulation steps as have come due, so the game
+    advances at the same rate however long update_game and drawing take.
+    The next callback is timed against the next step's deadline instead of
+    "now + refresh_time", so the work done in a frame does not add up as
+    drift. When more than `max_steps` steps are due at once (the machine
+    stalled), the rest of the backlog is dropped and counted in `dropped`
+    rather than making every following frame slower still.
+
+    A step_ms below 1 (e.g. refresh_time 0, "as fast as possible") runs
+    1 ms steps, the shortest delay root.after can wait.
+    """
+
+    def __init__(self, step_ms, max_steps=5, clock=time.perf_counter):
+        self.step = max(step_ms, 1) / 1000
+        self.max_steps = max_steps
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Start counting from now, e.g. when the game (re)starts."""
+        self.last = self.clock()
+        self.accumulator = 0.0  # time not yet simulated
+        self.dropped = 0  # steps skipped after a stall
+        self.skipped = 0  # steps that ran without being drawn
+
+    def due(self):
+        """Number of steps to run in this frame."""
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+        steps = min(int(self.accumulator / self.step), self.max_steps)
+        self.accumulator -= steps * self.step
+        if self.accumulator >= self.step:
+            behind = int(self.accumulator / self.step)
+            self.dropped += behind
+            self.accumulator -= behind * self.step
+        if steps > 1:
+            self.skipped += steps - 1
+        return steps
+
+    @property
+    def alpha(self):
+        """How far, from 0 to 1, the clock is into the step after the last one run."""
+        return min(1.0, self.accumulator / self.step)
+
+    def delay_ms(self, frame_ms=None):
+        """
+        Milliseconds until the next step is due, for root.after; at most
+        frame_ms if given (to draw interpolated frames in between).
+        """
+        remaining = self.step - self.accumulator - (self.clock() - self.last)
+        delay = max(1, math.ceil(remaining * 1000))
+        return min(delay, frame_ms) if frame_ms else delay
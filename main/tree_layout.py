@@ -0,0 +1,140 @@
+# main/tree_layout.py
+SPACING_X, SPACING_Y = 2.0, 2.5
+
+
+class Layout:
+    """
+    Computed node coordinates for one tree version.
+
+    Attributes
+    ----------
+    positions : dict
+        node -> (x, y) for every node that is drawn.
+    collapsed : dict
+        node -> number of hidden descendants, for drawn nodes whose subtree
+        was folded away by the level-of-detail cut.
+    size : int
+        Total number of nodes in the tree.
+    """
+    def __init__(self, positions, collapsed, size):
+        self.positions = positions
+        self.collapsed = collapsed
+        self.size = size
+
+
+class TreeLayout:
+    """
+    Shared layout engine for the AVL tree views.
+
+    x comes from the inorder rank, read from the nodes' subtree sizes; y
+    from the depth. Results are cached by (tree, tree.version, root), so several views
+    of an unchanged tree share one computation. Trees larger than max_nodes
+    are cut at the deepest level that still fits and the subtrees below it are
+    reported as collapsed, with visible nodes packed side by side.
+    """
+
+    def __init__(self, max_nodes=255):
+        self.max_nodes = max_nodes
+        self._key = None
+        self._layout = None
+
+    def compute(self, tree):
+        root = tree.root
+        key = (id(tree), getattr(tree, "version", None), root)
+        if key == self._key:
+            return self._layout
+        total = root.size if root else 0
+        if total <= self.max_nodes:
+            layout = Layout(self._full(root), {}, total)
+        else:
+            layout = self._cut(root, total)
+        self._key, self._layout = key, layout
+        return layout
+
+    @staticmethod
+    def _full(root):
+        # x = number of nodes before this one in inorder = offset + size(left)
+        positions = {}
+        stack = [(root, 0, 0)] if root else []
+        while stack:
+            node, depth, offset = stack.pop()
+            left = node.left
+            rank = offset + (left.size if left else 0)
+            positions[node] = (rank * SPACING_X, -depth * SPACING_Y)
+            if node.left:
+                stack.append((node.left, depth + 1, offset))
+            if node.right:
+                stack.append((node.right, depth + 1, rank + 1))
+        return positions
+
+    def _cut(self, root, total):
+        # deepest level whose complete tree still fits in max_nodes
+        max_depth = max(0, (self.max_nodes + 1).bit_length() - 2)
+        positions = {}
+        collapsed = {}
+        stack = []
+        node, depth, rank = root, 0, 0
+        while stack or node:
+            while node:
+                stack.append((node, depth))
+                node = node.left if depth < max_depth else None
+                depth += 1
+            node, depth = stack.pop()
+            positions[node] = (rank * SPACING_X, -depth * SPACING_Y)
+            rank += 1
+            if depth == max_depth and (node.left or node.right):
+                collapsed[node] = node.size - 1
+                node = None
+            else:
+                node, depth = node.right, depth + 1
+        return Layout(positions, collapsed, total)
+
+
+ORDERS = ("inorder", "preorder", "postorder", "bfs")
+
+
+def visit_numbers(root, positions, order):
+    """
+    1-based visit number, in the given traversal order, of every node in
+    positions (the drawn top of the tree), without walking the rest of it:
+    the numbers follow from the subtree sizes of the nodes on the way down.
+    BFS numbers only need the drawn nodes because layouts draw whole levels.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Unknown traversal: {order!r}")
+    numbers = {}
+    if root is None:
+        return numbers
+    if order == "bfs":
+        level = [root]
+        count = 0
+        while level:
+            below = []
+            for node in level:
+                count += 1
+                numbers[node] = count
+                below.extend(child for child in (node.left, node.right)
+                             if child is not None and child in positions)
+            level = below
+        return numbers
+
+    # start = how many nodes the traversal visits before this subtree
+    stack = [(root, 0)]
+    while stack:
+        node, start = stack.pop()
+        left, right = node.left, node.right
+        left_size = left.size if left else 0
+        if order == "inorder":
+            numbers[node] = start + left_size + 1
+            left_start, right_start = start, start + left_size + 1
+        elif order == "preorder":
+            numbers[node] = start + 1
+            left_start, right_start = start + 1, start + 1 + left_size
+        else:
+            numbers[node] = start + node.size
+            left_start, right_start = start, start + left_size
+        if left is not None and left in positions:
+            stack.append((left, left_start))
+        if right is not None and right in positions:
+            stack.append((right, right_start))
+    return numbers
@@ -0,0 +1,210 @@
+# main/tree_view.py
+import tkinter as tk
+
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from main.tree_layout import SPACING_X, SPACING_Y, visit_numbers
+
+
+class FigureWindow:
+    """A Toplevel holding one matplotlib figure, created on demand and reused."""
+
+    def __init__(self, root, title):
+        self.root = root
+        self.title = title
+        self.window = None
+        self.fig = self.ax = self.canvas = None
+
+    def is_open(self):
+        return self.window is not None and self.window.winfo_exists()
+
+    def _open(self):
+        self.close()
+        self.window = tk.Toplevel(self.root)
+        self.window.title(self.title)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.fig, self.ax = plt.subplots(figsize=(6, 4))
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.window)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.ax.axis("off")
+
+    def close(self):
+        """Destroy the window and release the figure."""
+        if self.fig is not None:
+            plt.close(self.fig)
+            self.fig = self.ax = self.canvas = None
+        if self.window is not None:
+            if self.window.winfo_exists():
+                self.window.destroy()
+            self.window = None
+
+    def _fit(self, positions):
+        if positions:
+            xs, ys = zip(*positions.values())
+            self.ax.set_xlim(min(xs) - SPACING_X, max(xs) + SPACING_X)
+            self.ax.set_ylim(min(ys) - SPACING_Y, max(ys) + SPACING_Y)
+
+
+def node_label(node, collapsed):
+    x1, y1, x2, y2 = node.value
+    label = f"({x1},{y1})-({x2},{y2})\n{node.tipo}"
+    hidden = collapsed.get(node)
+    if hidden:
+        label += f"\n+{hidden} below"
+    return label
+
+
+class TreeView(FigureWindow):
+    """
+    Matplotlib window showing the AVL tree, updated incrementally.
+
+    Game ticks call request_redraw(), which only marks the view dirty; at most
+    one redraw runs per `interval` ms from the Tk event loop. A redraw keeps
+    the existing Circle/text/edge artists and only touches the nodes whose
+    position, label or balance changed, then schedules a draw_idle().
+    """
+
+    def __init__(self, root, get_tree, layout, interval=250):
+        super().__init__(root, "AVL Tree")
+        self.get_tree = get_tree
+        self.layout = layout
+        self.interval = interval
+        self._pending = None
+        self._nodes = {}  # node -> [circle, text, state]
+        self._edges = {}  # (parent, child) -> [line, coords]
+
+    def _open(self):
+        super()._open()
+        self.ax.set_title("AVL Tree of Obstacles")
+        self._nodes = {}
+        self._edges = {}
+
+    # ---- Scheduling ----
+    def request_redraw(self):
+        """Mark the view dirty; the redraw itself happens later, coalesced."""
+        if self._pending is None:
+            self._pending = self.root.after(self.interval, self._flush)
+
+    def _flush(self):
+        self._pending = None
+        self.redraw()
+
+    def cancel(self):
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+
+    # ---- Drawing ----
+    def redraw(self):
+        self.cancel()
+        tree = self.get_tree()
+        if not self.is_open():
+            self._open()
+
+        layout = self.layout.compute(tree)
+        positions = layout.positions
+        ax = self.ax
+
+        # Edges
+        edges = {}
+        for node, (x, y) in positions.items():
+            for child in (node.left, node.right):
+                if child is not None and child in positions:
+                    edges[(node, child)] = (x, y) + positions[child]
+        for key in list(self._edges):
+            if key not in edges:
+                self._edges.pop(key)[0].remove()
+        for key, coords in edges.items():
+            entry = self._edges.get(key)
+            if entry is None:
+                line, = ax.plot([coords[0], coords[2]], [coords[1], coords[3]], color="gray", linewidth=1, zorder=1)
+                self._edges[key] = [line, coords]
+            elif entry[1] != coords:
+                entry[0].set_data([coords[0], coords[2]], [coords[1], coords[3]])
+                entry[1] = coords
+
+        # Nodes
+        for node in list(self._nodes):
+            if node not in positions:
+                circle, text, _ = self._nodes.pop(node)
+                circle.remove()
+                text.remove()
+        for node, (x, y) in positions.items():
+            bf = tree.get_balance(node)
+            label = node_label(node, layout.collapsed) + f"\nBF={bf}"
+            # Color by balance factor
+            color = "lightgreen" if bf == 0 else "lightblue" if bf > 0 else "lightcoral"
+            state = (x, y, label, color)
+
+            entry = self._nodes.get(node)
+            if entry is None:
+                circle = plt.Circle((x, y), radius=0.6, edgecolor="black", facecolor=color, lw=1.5, zorder=2)
+                ax.add_patch(circle)
+                text = ax.text(x, y, label, ha="center", va="center", fontsize=7, fontweight="bold", zorder=3)
+                self._nodes[node] = [circle, text, state]
+                continue
+            circle, text, old = entry
+            if old == state:
+                continue
+            if old[:2] != (x, y):
+                circle.set_center((x, y))
+                text.set_position((x, y))
+            if old[2] != label:
+                text.set_text(label)
+            if old[3] != color:
+                circle.set_facecolor(color)
+            entry[2] = state
+
+        self._fit(positions)
+        self.canvas.draw_idle()
+
+
+class TraversalView(FigureWindow):
+    """
+    One reusable window per traversal, numbering nodes in visit order.
+    Only the drawn nodes are numbered (see visit_numbers), so a redraw costs
+    the same for a huge tree as for one that fits the level-of-detail cut.
+    """
+
+    def __init__(self, root, layout, title):
+        super().__init__(root, title)
+        self.layout = layout
+
+    def show(self, tree, order):
+        """Draw tree numbering its nodes by order: "inorder", "preorder", "postorder" or "bfs"."""
+        if self.is_open():
+            self.ax.clear()
+            self.ax.axis("off")
+            self.window.lift()
+        else:
+            self._open()
+        ax = self.ax
+
+        layout = self.layout.compute(tree)
+        positions = layout.positions
+
+        # === Draw edges ===
+        for node, (x, y) in positions.items():
+            for child in (node.left, node.right):
+                if child is not None and child in positions:
+                    xc, yc = positions[child]
+                    ax.plot([x, xc], [y, yc], color="gray", linewidth=1)
+
+        # === Highlight traversal order ===
+        order_map = visit_numbers(tree.root, positions, order)
+        for node, (x, y) in positions.items():
+            if node in order_map:
+                # Node is part of the traversal
+                ax.add_patch(plt.Circle((x, y), radius=0.6, edgecolor="black", facecolor="lightgreen"))
+                # Number showing visit order
+                ax.text(x, y, f"{order_map[node]}", ha="center", va="center", fontsize=9, color="red")
+            else:
+                # Non-visited node (shouldn't happen in complete traversals)
+                ax.add_patch(plt.Circle((x, y), radius=0.6, edgecolor="black", facecolor="lightblue"))
+
+            ax.text(x, y - 0.9, node_label(node, layout.collapsed), ha="center", va="center", fontsize=6)
+
+        self._fit(positions)
+        ax.set_title(self.title)
+        self.canvas.draw_idle()
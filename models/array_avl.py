@@ -0,0 +1,699 @@
+# models/array_avl.py
+from array import array
+from collections import deque
+
+
+class NodeView:
+    """
+    Lightweight handle to a slot of an ArrayAVLTree, exposing the same
+    attributes as models.node.Node (value, tipo, left, right, height, ...).
+    Two views of the same slot compare equal, so they can key dicts.
+    """
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, NodeView) and other.tree is self.tree and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self):
+        return f"NodeView({self.index}, {self.value}, {self.tipo!r})"
+
+    @property
+    def value(self):
+        t, i = self.tree, self.index
+        return (t.x1[i], t.y1[i], t.x2[i], t.y2[i])
+
+    @property
+    def tipo(self):
+        return self.tree.tipos[self.tree.code[self.index]]
+
+    @property
+    def left(self):
+        return self.tree._view(self.tree.left[self.index])
+
+    @property
+    def right(self):
+        return self.tree._view(self.tree.right[self.index])
+
+    @property
+    def height(self):
+        return self.tree.height[self.index]
+
+    @property
+    def size(self):
+        return self.tree.size[self.index]
+
+    @property
+    def max_x2(self):
+        return self.tree.max_x2[self.index]
+
+    @property
+    def min_x2(self):
+        return self.tree.min_x2[self.index]
+
+    @property
+    def min_y(self):
+        return self.tree.min_y[self.index]
+
+    @property
+    def max_y(self):
+        return self.tree.max_y[self.index]
+
+
+class ArrayAVLTree:
+    """
+    AVLTree backend that keeps every node field in parallel arrays
+    (struct of arrays) instead of one Python object per obstacle.
+
+    Exposes the same public API as models.avl.AVLTree: roots and nodes are
+    NodeView handles (or None for an empty tree), values are (x1, y1, x2, y2)
+    tuples and range_query returns the same dicts. Coordinates are stored as
+    64-bit integers and types as one-byte codes. Slot 0 is the nil sentinel;
+    freed slots are chained through the left array and reused.
+    """
+
+    def __init__(self):
+        self.x1 = array("q", [0])
+        self.y1 = array("q", [0])
+        self.x2 = array("q", [0])
+        self.y2 = array("q", [0])
+        self.max_x2 = array("q", [0])
+        self.min_x2 = array("q", [0])
+        self.min_y = array("q", [0])
+        self.max_y = array("q", [0])
+        self.height = array("B", [0])
+        self.size = array("q", [0])
+        self.code = array("B", [0])
+        self.left = array("l", [0])
+        self.right = array("l", [0])
+        self.tipos = []
+        self._codes = {}
+        self.visits = 0  # nodes walked by insert, delete and range walks (read by app.telemetry)
+        self._free = 0
+        self.root = None
+        # bumped on every structural change; views use it to cache layouts
+        self.version = 0
+
+    @classmethod
+    def from_sorted(cls, items):
+        """
+        Build a tree from (value, tipo) pairs already sorted by (x1, y1).
+        Pairs repeating the previous (x1, y1) are dropped. O(n).
+        """
+        tree = cls()
+        tree.root = tree.build_sorted(items)
+        return tree
+
+    # ---- Slots ----
+    def _view(self, i):
+        return NodeView(self, i) if i else None
+
+    def _index(self, node):
+        return node.index if node is not None else 0
+
+    def _type_code(self, tipo):
+        code = self._codes.get(tipo)
+        if code is None:
+            if len(self.tipos) > 255:
+                raise ValueError("ArrayAVLTree supports at most 256 obstacle types")
+            code = len(self.tipos)
+            self.tipos.append(tipo)
+            self._codes[tipo] = code
+        return code
+
+    def _alloc(self, value, tipo):
+        x1, y1, x2, y2 = value
+        code = self._type_code(tipo)
+        self.version += 1
+        i = self._free
+        if i:
+            # coordinates first: one outside int64 raises before the slot leaves the free list
+            self.x1[i], self.y1[i], self.x2[i], self.y2[i] = x1, y1, x2, y2
+            self._free = self.left[i]
+            self.max_x2[i], self.min_x2[i], self.min_y[i], self.max_y[i] = x2, x2, y1, y2
+            self.height[i] = 1
+            self.size[i] = 1
+            self.code[i] = code
+            self.left[i] = self.right[i] = 0
+            return i
+        i = len(self.x1)
+        try:
+            self.x1.append(x1)
+            self.y1.append(y1)
+            self.x2.append(x2)
+            self.y2.append(y2)
+        except OverflowError:
+            # keep the columns the same length
+            for column in (self.x1, self.y1, self.x2):
+                del column[i:]
+            raise
+        self.max_x2.append(x2)
+        self.min_x2.append(x2)
+        self.min_y.append(y1)
+        self.max_y.append(y2)
+        self.height.append(1)
+        self.size.append(1)
+        self.code.append(code)
+        self.left.append(0)
+        self.right.append(0)
+        return i
+
+    def _release(self, i):
+        self.version += 1
+        self.right[i] = 0
+        self.left[i] = self._free
+        self._free = i
+
+    # ---- Utilities ----
+    def get_height(self, node):
+        return self.height[node.index] if node else 0
+
+    def get_balance(self, node):
+        if not node:
+            return 0
+        i = node.index
+        return self.height[self.left[i]] - self.height[self.right[i]]
+
+    def _update_node(self, i):
+        left, right = self.left[i], self.right[i]
+        height = self.height
+        h = height[left]
+        if height[right] > h:
+            h = height[right]
+        height[i] = h + 1
+        self.size[i] = 1 + self.size[left] + self.size[right]
+        x2, y1, y2 = self.x2[i], self.y1[i], self.y2[i]
+        low_x2 = x2
+        for c in (left, right):
+            if c:
+                if self.max_x2[c] > x2:
+                    x2 = self.max_x2[c]
+                if self.min_x2[c] < low_x2:
+                    low_x2 = self.min_x2[c]
+                if self.min_y[c] < y1:
+                    y1 = self.min_y[c]
+                if self.max_y[c] > y2:
+                    y2 = self.max_y[c]
+        self.max_x2[i], self.min_x2[i], self.min_y[i], self.max_y[i] = x2, low_x2, y1, y2
+
+    # ---- Rotations ----
+    def _right_rotate(self, z):
+        y = self.left[z]
+        self.left[z] = self.right[y]
+        self.right[y] = z
+        self._update_node(z)
+        self._update_node(y)
+        return y
+
+    def _left_rotate(self, z):
+        y = self.right[z]
+        self.right[z] = self.left[y]
+        self.left[y] = z
+        self._update_node(z)
+        self._update_node(y)
+        return y
+
+    def _balance(self, i):
+        return self.height[self.left[i]] - self.height[self.right[i]]
+
+    def _rebalance(self, i):
+        balance = self._balance(i)
+        if balance > 1:
+            if self._balance(self.left[i]) < 0:
+                self.left[i] = self._left_rotate(self.left[i])
+            return self._right_rotate(i)
+        if balance < -1:
+            if self._balance(self.right[i]) > 0:
+                self.right[i] = self._right_rotate(self.right[i])
+            return self._left_rotate(i)
+        return i
+
+    def _retrace(self, path, stop_early=False):
+        subtree = 0
+        for k in range(len(path) - 1, -1, -1):
+            i = path[k][0]
+            if stop_early:
+                before = (self.height[i], self.max_x2[i], self.min_x2[i], self.min_y[i], self.max_y[i])
+                self._update_node(i)
+                if before == (self.height[i], self.max_x2[i], self.min_x2[i], self.min_y[i], self.max_y[i]):
+                    for j in range(k):
+                        self.size[path[j][0]] += 1
+                    return path[0][0]
+            else:
+                self._update_node(i)
+            subtree = self._rebalance(i)
+            if k and subtree != i:
+                parent, side = path[k - 1]
+                if side < 0:
+                    self.left[parent] = subtree
+                else:
+                    self.right[parent] = subtree
+        return subtree
+
+    # ---- Comparison by (x1, y1) ----
+    def compare(self, v1, v2):
+        if not (isinstance(v1, tuple) and isinstance(v2, tuple)):
+            raise TypeError("compare expects tuple values")
+        if v1[0] != v2[0]:
+            return -1 if v1[0] < v2[0] else 1
+        if v1[1] != v2[1]:
+            return -1 if v1[1] < v2[1] else 1
+        return 0
+
+    def _walk(self, i, x, y, path):
+        # descend from slot i toward key (x, y); returns the matching slot or 0
+        x1, y1 = self.x1, self.y1
+        while i:
+            nx, ny = x1[i], y1[i]
+            if x < nx or (x == nx and y < ny):
+                path.append((i, -1))
+                i = self.left[i]
+            elif x > nx or y > ny:
+                path.append((i, 1))
+                i = self.right[i]
+            else:
+                return i
+        return 0
+
+    # ---- Insert ----
+    def insert(self, root, value, tipo):
+        """
+        Insert value=(x1,y1,x2,y2) with type into tree and return new root.
+        Duplicates by (x1,y1) are ignored.
+        """
+        if not isinstance(value, tuple):
+            raise TypeError("compare expects tuple values")
+        r = self._index(root)
+        if not r:
+            return self._view(self._alloc(value, tipo))
+        path = []
+        if self._walk(r, value[0], value[1], path):
+            self.visits += len(path) + 1
+            return root
+        self.visits += len(path)
+        parent, side = path[-1]
+        i = self._alloc(value, tipo)
+        if side < 0:
+            self.left[parent] = i
+        else:
+            self.right[parent] = i
+        return self._view(self._retrace(path, stop_early=True))
+
+    # ---- Bulk loading ----
+    def build_sorted(self, items):
+        """
+        Build a perfectly balanced tree from (value, tipo) pairs sorted by
+        (x1, y1) and return its root. Only the first pair of each key is kept.
+        """
+        unique = []
+        last = None
+        for value, tipo in items:
+            key = (value[0], value[1])
+            if key != last:
+                unique.append((value, tipo))
+                last = key
+        return self._view(self._build(unique, 0, len(unique)))
+
+    def _build(self, items, lo, hi):
+        if lo >= hi:
+            return 0
+        mid = (lo + hi) // 2
+        i = self._alloc(*items[mid])
+        self.left[i] = self._build(items, lo, mid)
+        self.right[i] = self._build(items, mid + 1, hi)
+        self._update_node(i)
+        return i
+
+    def bulk_load(self, obstacles, presorted=False):
+        """
+        Build a balanced tree from obstacle dicts and return its root;
+        see AVLTree.bulk_load.
+        """
+        items = [((o["x1"], o["y1"], o["x2"], o["y2"]), o.get("tipo", "obstaculo")) for o in obstacles]
+        if not presorted:
+            items.sort(key=lambda item: (item[0][0], item[0][1]))
+        return self.build_sorted(items)
+
+    def append_sorted(self, root, items):
+        """
+        Add sorted (value, tipo) pairs after the current maximum key and
+        return the new root; see AVLTree.append_sorted.
+        """
+        last = self.max_key(root)
+        start = 0
+        if last is not None:
+            while start < len(items) and (items[start][0][0], items[start][0][1]) <= (last[0], last[1]):
+                root = self.insert(root, items[start][0], items[start][1])
+                start += 1
+        if start >= len(items):
+            return root
+        value, tipo = items[start]
+        rest = self.build_sorted(
+            item for item in items[start + 1:] if (item[0][0], item[0][1]) != (value[0], value[1])
+        )
+        mid = self._alloc(value, tipo)
+        return self._view(self._join(self._index(root), mid, self._index(rest)))
+
+    # ---- Search (by full tuple) ----
+    def search(self, root, key):
+        if root is None:
+            return None
+        if not isinstance(key, tuple):
+            raise TypeError("compare expects tuple values")
+        i = self._walk(root.index, key[0], key[1], [])
+        if i and (self.x1[i], self.y1[i], self.x2[i], self.y2[i]) == key:
+            return self._view(i)
+        return None
+
+    # ---- Min ----
+    def _min(self, i):
+        while self.left[i]:
+            i = self.left[i]
+        return i
+
+    def get_min(self, node):
+        return self._view(self._min(node.index))
+
+    def min_key(self, root):
+        """Return the smallest stored value (x1,y1,x2,y2), or None if the tree is empty."""
+        if not root:
+            return None
+        i = self._min(root.index)
+        return (self.x1[i], self.y1[i], self.x2[i], self.y2[i])
+
+    def max_key(self, root):
+        """Return the largest stored value (x1,y1,x2,y2), or None if the tree is empty."""
+        i = self._index(root)
+        if not i:
+            return None
+        while self.right[i]:
+            i = self.right[i]
+        return (self.x1[i], self.y1[i], self.x2[i], self.y2[i])
+
+    def first_reaching(self, root, x):
+        """Return the first node in key order with x2 >= x, or None; see AVLTree.first_reaching."""
+        i = self._index(root)
+        max_x2, left = self.max_x2, self.left
+        if not i or max_x2[i] < x:
+            return None
+        while i:
+            if left[i] and max_x2[left[i]] >= x:
+                i = left[i]
+            elif self.x2[i] >= x:
+                return NodeView(self, i)
+            else:
+                i = self.right[i]
+        return None
+
+    # ---- Neighbours by (x1, y1) ----
+    def _bound(self, root, key, after, inclusive):
+        x, y = key[0], key[1]
+        best = 0
+        i = self._index(root)
+        while i:
+            nx, ny = self.x1[i], self.y1[i]
+            if nx == x and ny == y:
+                if inclusive:
+                    return NodeView(self, i)
+                i = self.right[i] if after else self.left[i]
+            elif (nx > x or (nx == x and ny > y)) == after:
+                best = i
+                i = self.left[i] if after else self.right[i]
+            else:
+                i = self.right[i] if after else self.left[i]
+        return self._view(best)
+
+    def successor(self, root, key):
+        """Node with the smallest key greater than key; see AVLTree.successor."""
+        return self._bound(root, key, True, False)
+
+    def predecessor(self, root, key):
+        """Node with the largest key smaller than key; see AVLTree.predecessor."""
+        return self._bound(root, key, False, False)
+
+    def ceiling(self, root, key):
+        """Node with the smallest key >= key; see AVLTree.ceiling."""
+        return self._bound(root, key, True, True)
+
+    def floor(self, root, key):
+        """Node with the largest key <= key; see AVLTree.floor."""
+        return self._bound(root, key, False, True)
+
+    # ---- Order statistics ----
+    def get_size(self, node):
+        return self.size[node.index] if node else 0
+
+    def select(self, root, k):
+        """Return the node at 0-based position k in key order, or None; see AVLTree.select."""
+        i = self._index(root)
+        size, left = self.size, self.left
+        while i:
+            before = size[left[i]]
+            if k < before:
+                i = left[i]
+            elif k == before:
+                return NodeView(self, i)
+            else:
+                k -= before + 1
+                i = self.right[i]
+        return None
+
+    def rank(self, root, key):
+        """Number of stored values ordered before key; see AVLTree.rank."""
+        x, y = key[0], key[1]
+        count = 0
+        i = self._index(root)
+        while i:
+            nx, ny = self.x1[i], self.y1[i]
+            if x < nx or (x == nx and y <= ny):
+                i = self.left[i]
+            else:
+                count += 1 + self.size[self.left[i]]
+                i = self.right[i]
+        return count
+
+    def delete_at(self, root, k):
+        """Delete the node at position k and return the new root; see AVLTree.delete_at."""
+        node = self.select(root, k)
+        if node is None:
+            return root
+        return self.delete(root, node.value)
+
+    # ---- Delete ----
+    def delete(self, root, value):
+        """
+        Delete node with value (x1,y1,x2,y2) and return new root.
+        """
+        if not isinstance(value, tuple):
+            raise TypeError("compare expects tuple values")
+        path = []
+        i = self._walk(self._index(root), value[0], value[1], path)
+        if not i:
+            self.visits += len(path)
+            return root
+
+        left, right = self.left, self.right
+        if left[i] and right[i]:
+            # two children: move the in-order successor's fields into i
+            path.append((i, 1))
+            succ = right[i]
+            while left[succ]:
+                path.append((succ, -1))
+                succ = left[succ]
+            for col in (self.x1, self.y1, self.x2, self.y2, self.code):
+                col[i] = col[succ]
+            removed, replacement = succ, right[succ]
+        else:
+            removed, replacement = i, left[i] or right[i]
+        self.visits += len(path) + 1
+        self._release(removed)
+
+        if not path:
+            return self._view(replacement)
+        parent, side = path[-1]
+        if side < 0:
+            left[parent] = replacement
+        else:
+            right[parent] = replacement
+        return self._view(self._retrace(path))
+
+    # ---- Join / split ----
+    def _join(self, a, k, b):
+        self.version += 1
+        ha, hb = self.height[a], self.height[b]
+        if ha > hb + 1:
+            self.right[a] = self._join(self.right[a], k, b)
+            self._update_node(a)
+            return self._rebalance(a)
+        if hb > ha + 1:
+            self.left[b] = self._join(a, k, self.left[b])
+            self._update_node(b)
+            return self._rebalance(b)
+        self.left[k], self.right[k] = a, b
+        self._update_node(k)
+        return k
+
+    def _split(self, i, x, y):
+        if not i:
+            return 0, 0
+        left, right = self.left[i], self.right[i]
+        nx, ny = self.x1[i], self.y1[i]
+        if nx < x or (nx == x and ny < y):
+            smaller, rest = self._split(right, x, y)
+            return self._join(left, i, smaller), rest
+        smaller, rest = self._split(left, x, y)
+        return smaller, self._join(rest, i, right)
+
+    def join(self, left, node, right):
+        """Join two trees around node; see AVLTree.join."""
+        return self._view(self._join(self._index(left), node.index, self._index(right)))
+
+    def split(self, root, key):
+        """Split by key=(x1,y1,...) into (smaller, rest); see AVLTree.split."""
+        smaller, rest = self._split(self._index(root), key[0], key[1])
+        return self._view(smaller), self._view(rest)
+
+    # ---- Trim ----
+    def trim_before(self, root, x):
+        """
+        Drop every obstacle that ends before x (x2 < x) and return the new root
+        (root itself when nothing ends before x, read off the subtree min_x2);
+        see AVLTree.trim_before. Dropped slots go back to the free list.
+        """
+        if root is None or self.min_x2[root.index] >= x:
+            return root
+        stale, rest = self._split(root.index, x, float("-inf"))
+        keep = []
+        stack = [stale]
+        while stack:
+            i = stack.pop()
+            if not i:
+                continue
+            stack.append(self.left[i])
+            stack.append(self.right[i])
+            if self.x2[i] >= x:
+                keep.append(((self.x1[i], self.y1[i], self.x2[i], self.y2[i]), self.tipos[self.code[i]]))
+            self._release(i)
+        keep.sort(key=lambda item: (item[0][0], item[0][1]))
+        root = self._view(rest)
+        for value, tipo in keep:
+            root = self.insert(root, value, tipo)
+        return root
+
+    # ---- Export ----
+    def export_sorted(self, root):
+        """Return every obstacle as (x1, y1, x2, y2, tipo), ordered by (x1, y1)."""
+        return [node.value + (node.tipo,) for node in self.inorder(root)]
+
+    # ---- Traversals ----
+    def inorder(self, root):
+        stack = []
+        i = self._index(root)
+        while stack or i:
+            while i:
+                stack.append(i)
+                i = self.left[i]
+            i = stack.pop()
+            yield NodeView(self, i)
+            i = self.right[i]
+
+    def preorder(self, root):
+        stack = [root.index] if root else []
+        while stack:
+            i = stack.pop()
+            yield NodeView(self, i)
+            if self.right[i]:
+                stack.append(self.right[i])
+            if self.left[i]:
+                stack.append(self.left[i])
+
+    def postorder(self, root):
+        stack = []
+        i = self._index(root)
+        last = 0
+        while stack or i:
+            while i:
+                stack.append(i)
+                i = self.left[i]
+            top = stack[-1]
+            if self.right[top] and self.right[top] != last:
+                i = self.right[top]
+            else:
+                yield NodeView(self, top)
+                last = stack.pop()
+
+    def bfs(self, root):
+        if not root:
+            return
+        queue = deque([root.index])
+        while queue:
+            i = queue.popleft()
+            yield NodeView(self, i)
+            if self.left[i]:
+                queue.append(self.left[i])
+            if self.right[i]:
+                queue.append(self.right[i])
+
+    # ---- Range query ----
+    def _iter_range(self, root, x_min, x_max, y_min, y_max):
+        # yields matching slot indices in key order
+        max_x2, min_y, max_y = self.max_x2, self.min_y, self.max_y
+        stack = []
+        i = self._index(root)
+        visited = 0
+        try:
+            while True:
+                while i and not (max_x2[i] < x_min or max_y[i] < y_min or min_y[i] > y_max):
+                    stack.append(i)
+                    visited += 1
+                    i = self.left[i]
+                if not stack:
+                    return
+                i = stack.pop()
+                if self.x1[i] > x_max:
+                    return
+                if not (self.x2[i] < x_min or self.y2[i] < y_min or self.y1[i] > y_max):
+                    yield i
+                i = self.right[i]
+        finally:
+            self.visits += visited
+
+    def iter_range(self, root, x_min, x_max, y_min, y_max):
+        """Yield NodeViews of the obstacles intersecting the box; see AVLTree.iter_range."""
+        for i in self._iter_range(root, x_min, x_max, y_min, y_max):
+            yield NodeView(self, i)
+
+    def iter_range_tuples(self, root, x_min, x_max, y_min, y_max):
+        """Like iter_range but yields (x1, y1, x2, y2, tipo) tuples."""
+        x1, y1, x2, y2, code, tipos = self.x1, self.y1, self.x2, self.y2, self.code, self.tipos
+        for i in self._iter_range(root, x_min, x_max, y_min, y_max):
+            yield (x1[i], y1[i], x2[i], y2[i], tipos[code[i]])
+
+    def range_into(self, root, x_min, x_max, y_min, y_max, buffer):
+        """Write matching NodeViews into buffer[0:k] and return k; see AVLTree.range_into."""
+        k = 0
+        size = len(buffer)
+        for node in self.iter_range(root, x_min, x_max, y_min, y_max):
+            if k < size:
+                buffer[k] = node
+            else:
+                buffer.append(node)
+            k += 1
+        return k
+
+    def range_query(self, root, x_min, x_max, y_min, y_max, result=None):
+        """
+        Collect obstacles whose rectangle intersects the query box.
+        Returns list of dicts: {"x1":..., "y1":..., "x2":..., "y2":..., "tipo":...}
+        """
+        if result is None:
+            result = []
+        for x1, y1, x2, y2, tipo in self.iter_range_tuples(root, x_min, x_max, y_min, y_max):
+            result.append({"x1": x1, "y1": y1, "x2": x2, "y2": y2, "tipo": tipo})
+        return result
@@ -1,14 +1,82 @@
 # models/avl.py
+from collections import deque
+
 from models.node import Node
 
 class AVLTree:
     """
     AVL tree specialized to store obstacles where ordering is based on (x1, y1).
     The stored node.value is expected to be a tuple: (x1, y1, x2, y2).
+
+    With persistent=True, nodes reachable from a snapshot() are never
+    modified again: insert/delete/join/split copy the nodes on their path
+    (path copying) and share every untouched subtree, so any saved root stays
+    a valid tree and restore(root) is O(1). Nodes created since the last
+    snapshot are still updated in place, so a burst of edits between two
+    snapshots copies each node at most once.
     """
 
-    def __init__(self):
+    def __init__(self, persistent=False):
         self.root = None
+        # bumped on every structural change; views use it to cache layouts
+        self.version = 0
+        self.persistent = persistent
+        self.visits = 0  # nodes walked by insert, delete and range walks (read by app.telemetry)
+        self._owned = set()  # persistent mode: nodes created since the last snapshot
+
+    @classmethod
+    def from_sorted(cls, items):
+        """
+        Build a tree from (value, tipo) pairs already sorted by (x1, y1).
+        Pairs repeating the previous (x1, y1) are dropped. O(n).
+        """
+        tree = cls()
+        tree.root = tree.build_sorted(items)
+        return tree
+
+    # ---- Persistence ----
+    def snapshot(self):
+        """
+        Freeze the current tree and return its root, to be handed back to
+        restore(). Only meaningful for persistent trees.
+        """
+        if not self.persistent:
+            raise ValueError("snapshot() needs a persistent tree")
+        self._owned = set()
+        return self.root
+
+    def restore(self, root):
+        """Make a root returned by snapshot() current again. O(1)."""
+        self.root = root
+        self._owned = set()
+        self.version += 1
+
+    def _own(self, node):
+        """Return node itself if it may be modified in place, else a private copy."""
+        if node in self._owned:
+            return node
+        node = node.copy()
+        self._owned.add(node)
+        return node
+
+    def _own_path(self, path):
+        # copy a root-to-leaf path top-down, relinking each copy into its (owned) parent
+        for i, (node, side) in enumerate(path):
+            own = self._own(node)
+            if own is not node:
+                path[i] = (own, side)
+                if i:
+                    parent, parent_side = path[i - 1]
+                    if parent_side < 0:
+                        parent.left = own
+                    else:
+                        parent.right = own
+
+    def _new(self, value, tipo):
+        node = Node(value, tipo)
+        if self.persistent:
+            self._owned.add(node)
+        return node
 
     # ---- Utilities ----
     def get_height(self, node):
@@ -17,26 +85,63 @@ class AVLTree:
     def get_balance(self, node):
         return self.get_height(node.left) - self.get_height(node.right) if node else 0
 
-    def _update_height(self, node):
-        node.height = 1 + max(self.get_height(node.left), self.get_height(node.right))
+    def _update_node(self, node):
+        """Recompute height, size and subtree bounds (min/max x2, min/max lane) from the children."""
+        left, right = node.left, node.right
+        _, y1, x2, y2 = node.value
+        low_x2 = x2
+        height = 0
+        size = 1
+        if left is not None:
+            height = left.height
+            size += left.size
+            if left.max_x2 > x2:
+                x2 = left.max_x2
+            if left.min_x2 < low_x2:
+                low_x2 = left.min_x2
+            if left.min_y < y1:
+                y1 = left.min_y
+            if left.max_y > y2:
+                y2 = left.max_y
+        if right is not None:
+            size += right.size
+            if right.height > height:
+                height = right.height
+            if right.max_x2 > x2:
+                x2 = right.max_x2
+            if right.min_x2 < low_x2:
+                low_x2 = right.min_x2
+            if right.min_y < y1:
+                y1 = right.min_y
+            if right.max_y > y2:
+                y2 = right.max_y
+        node.height = height + 1
+        node.size = size
+        node.max_x2, node.min_x2, node.min_y, node.max_y = x2, low_x2, y1, y2
 
     # ---- Rotations ----
     def right_rotate(self, z):
+        if self.persistent:
+            z = self._own(z)
+            z.left = self._own(z.left)
         y = z.left
         T3 = y.right
         y.right = z
         z.left = T3
-        self._update_height(z)
-        self._update_height(y)
+        self._update_node(z)
+        self._update_node(y)
         return y
 
     def left_rotate(self, z):
+        if self.persistent:
+            z = self._own(z)
+            z.right = self._own(z.right)
         y = z.right
         T2 = y.left
         y.left = z
         z.right = T2
-        self._update_height(z)
-        self._update_height(y)
+        self._update_node(z)
+        self._update_node(y)
         return y
 
     # ---- Comparison by (x1, y1) ----
@@ -61,48 +166,149 @@ class AVLTree:
         Insert value=(x1,y1,x2,y2) with type into tree and return new root.
         Duplicates by (x1,y1) are ignored.
         """
+        if not isinstance(value, tuple):
+            raise TypeError("compare expects tuple values")
         if root is None:
-            return Node(value, tipo)
+            self.version += 1
+            return self._new(value, tipo)
+
+        # walk down, remembering the path so it can be rebalanced bottom-up
+        x, y = value[0], value[1]
+        path = []
+        node = root
+        while node is not None:
+            nx, ny = node.value[0], node.value[1]
+            if x < nx or (x == nx and y < ny):
+                path.append((node, -1))
+                node = node.left
+            elif x > nx or y > ny:
+                path.append((node, 1))
+                node = node.right
+            else:
+                # duplicate (same x1,y1) -> ignore
+                self.visits += len(path) + 1
+                return root
 
-        cmp = self.compare(value, root.value)
-        if cmp < 0:
-            root.left = self.insert(root.left, value, tipo)
-        elif cmp > 0:
-            root.right = self.insert(root.right, value, tipo)
+        self.visits += len(path)
+        self.version += 1
+        if self.persistent:
+            self._own_path(path)
+        parent, side = path[-1]
+        if side < 0:
+            parent.left = self._new(value, tipo)
         else:
-            # duplicate (same x1,y1) -> ignore
-            return root
+            parent.right = self._new(value, tipo)
+        return self._retrace(path, stop_early=True)
 
-        self._update_height(root)
-        balance = self.get_balance(root)
+    def _retrace(self, path, stop_early=False):
+        """
+        Update and rebalance every (node, side) entry of a root-to-leaf path,
+        bottom-up, relinking rotated subtrees into their parent.
+        Returns the new root.
 
-        # LL
-        if balance > 1 and self.compare(value, root.left.value) < 0:
-            return self.right_rotate(root)
-        # RR
-        if balance < -1 and self.compare(value, root.right.value) > 0:
-            return self.left_rotate(root)
-        # LR
-        if balance > 1 and self.compare(value, root.left.value) > 0:
-            root.left = self.left_rotate(root.left)
-            return self.right_rotate(root)
-        # RL
-        if balance < -1 and self.compare(value, root.right.value) < 0:
-            root.right = self.right_rotate(root.right)
-            return self.left_rotate(root)
+        With stop_early (safe after an insert, where only the new leaf changed)
+        the walk ends at the first node whose height and bounds are unchanged;
+        the ancestors above it only need their size bumped by one.
+        """
+        subtree = None
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i][0]
+            if stop_early:
+                before = (node.height, node.max_x2, node.min_x2, node.min_y, node.max_y)
+                self._update_node(node)
+                if before == (node.height, node.max_x2, node.min_x2, node.min_y, node.max_y):
+                    for k in range(i):
+                        path[k][0].size += 1
+                    return path[0][0]
+            else:
+                self._update_node(node)
+            subtree = self._rebalance(node)
+            if i and subtree is not node:
+                parent, side = path[i - 1]
+                if side < 0:
+                    parent.left = subtree
+                else:
+                    parent.right = subtree
+        return subtree
 
-        return root
+    # ---- Bulk loading ----
+    def build_sorted(self, items):
+        """
+        Build a perfectly balanced subtree from (value, tipo) pairs sorted by
+        (x1, y1) and return its root. Like insert, only the first pair of each
+        (x1, y1) key is kept.
+        """
+        unique = []
+        last = None
+        for value, tipo in items:
+            key = (value[0], value[1])
+            if key != last:
+                unique.append((value, tipo))
+                last = key
+        self.version += 1
+        return self._build(unique, 0, len(unique))
+
+    def _build(self, items, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        value, tipo = items[mid]
+        node = self._new(value, tipo)
+        node.left = self._build(items, lo, mid)
+        node.right = self._build(items, mid + 1, hi)
+        self._update_node(node)
+        return node
+
+    def bulk_load(self, obstacles, presorted=False):
+        """
+        Build a balanced tree from obstacle dicts {"x1","y1","x2","y2","tipo"}
+        and return its root. The list is sorted once by (x1, y1) unless
+        presorted is True; the sort is stable so the first duplicate wins,
+        exactly as with repeated insert calls.
+        """
+        items = [((o["x1"], o["y1"], o["x2"], o["y2"]), o.get("tipo", "obstaculo")) for o in obstacles]
+        if not presorted:
+            items.sort(key=lambda item: (item[0][0], item[0][1]))
+        return self.build_sorted(items)
+
+    def append_sorted(self, root, items):
+        """
+        Add (value, tipo) pairs sorted by (x1, y1) that all come after the
+        current maximum key, and return the new root. The pairs are built
+        into a balanced subtree and joined on the right in O(k + log n).
+        Pairs that do not come after the maximum fall back to insert.
+        """
+        last = self.max_key(root)
+        start = 0
+        if last is not None:
+            while start < len(items) and (items[start][0][0], items[start][0][1]) <= (last[0], last[1]):
+                root = self.insert(root, items[start][0], items[start][1])
+                start += 1
+        if start >= len(items):
+            return root
+        value, tipo = items[start]
+        rest = self.build_sorted(
+            item for item in items[start + 1:] if (item[0][0], item[0][1]) != (value[0], value[1])
+        )
+        return self.join(root, self._new(value, tipo), rest)
 
     # ---- Search (by full tuple) ----
     def search(self, root, key):
         if root is None:
             return None
-        if key == root.value:
-            return root
-        if self.compare(key, root.value) < 0:
-            return self.search(root.left, key)
-        else:
-            return self.search(root.right, key)
+        if not isinstance(key, tuple):
+            raise TypeError("compare expects tuple values")
+        x, y = key[0], key[1]
+        node = root
+        while node is not None:
+            value = node.value
+            if key == value:
+                return node
+            if x < value[0] or (x == value[0] and y < value[1]):
+                node = node.left
+            else:
+                node = node.right
+        return None
 
     # ---- Min (helper for delete) ----
     def get_min(self, node):
@@ -111,71 +317,316 @@ class AVLTree:
             current = current.left
         return current
 
-    # ---- Delete ----
-    def delete(self, root, value):
+    def min_key(self, root):
+        """Return the smallest stored value (x1,y1,x2,y2), or None if the tree is empty."""
+        return self.get_min(root).value if root else None
+
+    def max_key(self, root):
+        """Return the largest stored value (x1,y1,x2,y2), or None if the tree is empty."""
+        node = root
+        if node is None:
+            return None
+        while node.right:
+            node = node.right
+        return node.value
+
+    def first_reaching(self, root, x):
         """
-        Delete node with value (x1,y1,x2,y2) and return new root.
+        Return the first node in (x1, y1) order whose obstacle reaches x
+        (x2 >= x), i.e. the nearest obstacle at or ahead of x, or None.
+        Follows max_x2 down a single path: O(log n).
         """
-        if root is None:
+        node = root
+        if node is None or node.max_x2 < x:
+            return None
+        while node is not None:
+            left = node.left
+            if left is not None and left.max_x2 >= x:
+                node = left
+            elif node.value[2] >= x:
+                return node
+            else:
+                node = node.right
+        return None
+
+    # ---- Neighbours by (x1, y1) ----
+    def _bound(self, root, key, after, inclusive):
+        # nearest node after (or before) key; inclusive also accepts an equal key
+        x, y = key[0], key[1]
+        best = None
+        node = root
+        while node is not None:
+            nx, ny = node.value[0], node.value[1]
+            if nx == x and ny == y:
+                if inclusive:
+                    return node
+                node = node.right if after else node.left
+            elif (nx > x or (nx == x and ny > y)) == after:
+                best = node
+                node = node.left if after else node.right
+            else:
+                node = node.right if after else node.left
+        return best
+
+    def successor(self, root, key):
+        """Node with the smallest (x1, y1) greater than key's, or None. O(log n)."""
+        return self._bound(root, key, True, False)
+
+    def predecessor(self, root, key):
+        """Node with the largest (x1, y1) smaller than key's, or None. O(log n)."""
+        return self._bound(root, key, False, False)
+
+    def ceiling(self, root, key):
+        """Node with the smallest (x1, y1) >= key's, or None. O(log n)."""
+        return self._bound(root, key, True, True)
+
+    def floor(self, root, key):
+        """Node with the largest (x1, y1) <= key's, or None. O(log n)."""
+        return self._bound(root, key, False, True)
+
+    # ---- Order statistics ----
+    def get_size(self, node):
+        return node.size if node else 0
+
+    def select(self, root, k):
+        """Return the node at 0-based position k in (x1, y1) order, or None. O(log n)."""
+        node = root
+        while node is not None:
+            left = node.left.size if node.left is not None else 0
+            if k < left:
+                node = node.left
+            elif k == left:
+                return node
+            else:
+                k -= left + 1
+                node = node.right
+        return None
+
+    def rank(self, root, key):
+        """Number of stored values ordered before key=(x1, y1, ...). O(log n)."""
+        x, y = key[0], key[1]
+        count = 0
+        node = root
+        while node is not None:
+            nx, ny = node.value[0], node.value[1]
+            if x < nx or (x == nx and y <= ny):
+                node = node.left
+            else:
+                count += 1 + (node.left.size if node.left is not None else 0)
+                node = node.right
+        return count
+
+    def delete_at(self, root, k):
+        """Delete the node at position k (see select) and return the new root. O(log n)."""
+        node = self.select(root, k)
+        if node is None:
             return root
+        return self.delete(root, node.value)
 
-        cmp = self.compare(value, root.value)
-        if cmp < 0:
-            root.left = self.delete(root.left, value)
-        elif cmp > 0:
-            root.right = self.delete(root.right, value)
-        else:
-            # found
-            if root.left is None:
-                return root.right
-            elif root.right is None:
-                return root.left
-            temp = self.get_min(root.right)
-            root.value = temp.value
-            root.type = temp.tipo 
-            root.right = self.delete(root.right, temp.value)
-
-        self._update_height(root)
+    # ---- Rebalance (helper for delete/join) ----
+    def _rebalance(self, root):
+        """Restore the AVL property at root, assuming its children are balanced."""
         balance = self.get_balance(root)
 
         if balance > 1 and self.get_balance(root.left) >= 0:
             return self.right_rotate(root)
         if balance > 1 and self.get_balance(root.left) < 0:
+            if self.persistent:
+                root = self._own(root)
             root.left = self.left_rotate(root.left)
             return self.right_rotate(root)
         if balance < -1 and self.get_balance(root.right) <= 0:
             return self.left_rotate(root)
         if balance < -1 and self.get_balance(root.right) > 0:
+            if self.persistent:
+                root = self._own(root)
             root.right = self.right_rotate(root.right)
             return self.left_rotate(root)
 
         return root
 
+    # ---- Delete ----
+    def delete(self, root, value):
+        """
+        Delete node with value (x1,y1,x2,y2) and return new root.
+        """
+        if not isinstance(value, tuple):
+            raise TypeError("compare expects tuple values")
+
+        x, y = value[0], value[1]
+        path = []
+        node = root
+        while node is not None:
+            nx, ny = node.value[0], node.value[1]
+            if x < nx or (x == nx and y < ny):
+                path.append((node, -1))
+                node = node.left
+            elif x > nx or y > ny:
+                path.append((node, 1))
+                node = node.right
+            else:
+                break
+        if node is None:
+            self.visits += len(path)
+            return root
+        self.version += 1
+
+        if node.left is not None and node.right is not None:
+            # two children: pull the in-order successor up, then unlink it
+            target = len(path)
+            path.append((node, 1))
+            succ = node.right
+            while succ.left is not None:
+                path.append((succ, -1))
+                succ = succ.left
+            if self.persistent:
+                self._own_path(path)
+                node = path[target][0]
+            node.value = succ.value
+            node.tipo = succ.tipo
+            node, replacement = succ, succ.right
+        else:
+            replacement = node.left if node.left is not None else node.right
+            if self.persistent:
+                self._own_path(path)
+        self.visits += len(path) + 1
+
+        if not path:
+            return replacement
+        parent, side = path[-1]
+        if side < 0:
+            parent.left = replacement
+        else:
+            parent.right = replacement
+        return self._retrace(path)
+
+    # ---- Join / split ----
+    def join(self, left, node, right):
+        """
+        Join two trees around node and return the new root.
+        Every key in left must be smaller than node.value and every key in
+        right larger. Runs in O(|height(left) - height(right)| + 1).
+        """
+        self.version += 1
+        if self.persistent:
+            node = self._own(node)
+        if self.get_height(left) > self.get_height(right) + 1:
+            return self._join_right(left, node, right)
+        if self.get_height(right) > self.get_height(left) + 1:
+            return self._join_left(left, node, right)
+        node.left, node.right = left, right
+        self._update_node(node)
+        return node
+
+    def _join_right(self, left, node, right):
+        # left is the taller tree: walk down its right spine
+        if self.get_height(left) <= self.get_height(right) + 1:
+            node.left, node.right = left, right
+            self._update_node(node)
+            return node
+        if self.persistent:
+            left = self._own(left)
+        left.right = self._join_right(left.right, node, right)
+        self._update_node(left)
+        return self._rebalance(left)
+
+    def _join_left(self, left, node, right):
+        # right is the taller tree: walk down its left spine
+        if self.get_height(right) <= self.get_height(left) + 1:
+            node.left, node.right = left, right
+            self._update_node(node)
+            return node
+        if self.persistent:
+            right = self._own(right)
+        right.left = self._join_left(left, node, right.left)
+        self._update_node(right)
+        return self._rebalance(right)
+
+    def split(self, root, key):
+        """
+        Split the tree by key=(x1,y1,...) and return (smaller, rest):
+        smaller holds every value ordered before key, rest everything else.
+        O(log n).
+        """
+        if root is None:
+            return None, None
+        left, right = root.left, root.right
+        if self.compare(root.value, key) < 0:
+            smaller, rest = self.split(right, key)
+            return self.join(left, root, smaller), rest
+        smaller, rest = self.split(left, key)
+        return smaller, self.join(rest, root, right)
+
+    # ---- Trim ----
+    def trim_before(self, root, x):
+        """
+        Drop every obstacle that ends before x (x2 < x) and return the new root,
+        which is root itself (untouched) when nothing ends before x.
+
+        Whether anything is stale is read off the root's subtree min_x2 in O(1).
+        Otherwise the tree is split at x1 == x in O(log n); the part left of
+        the split is discarded unless some obstacle in it still reaches x
+        (checked with the subtree max_x2), in which case only those are
+        inserted back.
+        """
+        if root is None or root.min_x2 >= x:
+            return root
+
+        stale, root = self.split(root, (x, float("-inf")))
+        if stale and stale.max_x2 >= x:
+            for obs in self.range_query(stale, x, float("inf"), float("-inf"), float("inf")):
+                value = (obs["x1"], obs["y1"], obs["x2"], obs["y2"])
+                root = self.insert(root, value, obs["tipo"])
+        return root
+
+    # ---- Export ----
+    def export_sorted(self, root):
+        """Return every obstacle as (x1, y1, x2, y2, tipo), ordered by (x1, y1)."""
+        return [node.value + (node.tipo,) for node in self.inorder(root)]
+
     # ---- Traversals ----
     def inorder(self, root):
-        if root:
-            yield from self.inorder(root.left)
-            yield root
-            yield from self.inorder(root.right)
+        stack = []
+        node = root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
 
     def preorder(self, root):
-        if root:
-            yield root
-            yield from self.preorder(root.left)
-            yield from self.preorder(root.right)
+        stack = [root] if root else []
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
 
     def postorder(self, root):
-        if root:
-            yield from self.postorder(root.left)
-            yield from self.postorder(root.right)
-            yield root
+        stack = []
+        node = root
+        last = None
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            top = stack[-1]
+            if top.right and top.right is not last:
+                node = top.right
+            else:
+                yield top
+                last = stack.pop()
 
     def bfs(self, root):
         if not root:
             return
-        queue = [root]
+        queue = deque([root])
         while queue:
-            node = queue.pop(0)
+            node = queue.popleft()
             yield node
             if node.left:
                 queue.append(node.left)
@@ -183,6 +634,63 @@ class AVLTree:
                 queue.append(node.right)
 
     # ---- Range query ----
+    def iter_range(self, root, x_min, x_max, y_min, y_max):
+        """
+        Yield the nodes whose rectangle intersects the query box, in (x1, y1)
+        order, without building any intermediate container.
+
+        Subtrees are skipped when their bounds (max x2, min/max lane) cannot
+        intersect the box, and the walk stops at the first node with
+        x1 > x_max because the tree is ordered by x1.
+        Do not insert or delete while the generator is live.
+        """
+        stack = []
+        node = root
+        visited = 0
+        try:
+            while True:
+                # descend left, skipping subtrees that end before the box or live in other lanes
+                while node is not None and not (
+                    node.max_x2 < x_min or node.max_y < y_min or node.min_y > y_max
+                ):
+                    stack.append(node)
+                    visited += 1
+                    node = node.left
+                if not stack:
+                    return
+                node = stack.pop()
+
+                x1, y1, x2, y2 = node.value
+                if x1 > x_max:
+                    # this node and everything still on the stack start after the box
+                    return
+                if not (x2 < x_min or y2 < y_min or y1 > y_max):
+                    yield node
+                node = node.right
+        finally:
+            self.visits += visited
+
+    def iter_range_tuples(self, root, x_min, x_max, y_min, y_max):
+        """Like iter_range but yields (x1, y1, x2, y2, tipo) tuples."""
+        for node in self.iter_range(root, x_min, x_max, y_min, y_max):
+            yield node.value + (node.tipo,)
+
+    def range_into(self, root, x_min, x_max, y_min, y_max, buffer):
+        """
+        Write the matching nodes into buffer[0:k] and return k, reusing the
+        list between calls (it only grows when a query returns more hits than
+        ever before). Entries past k are left over from earlier calls.
+        """
+        k = 0
+        size = len(buffer)
+        for node in self.iter_range(root, x_min, x_max, y_min, y_max):
+            if k < size:
+                buffer[k] = node
+            else:
+                buffer.append(node)
+            k += 1
+        return k
+
     def range_query(self, root, x_min, x_max, y_min, y_max, result=None):
         """
         Collect obstacles whose rectangle intersects the query box.
@@ -190,18 +698,7 @@ class AVLTree:
         """
         if result is None:
             result = []
-        if not root:
-            return result
-
-        x1, y1, x2, y2 = root.value
-
-        if not (x2 < x_min or x1 > x_max or y2 < y_min or y1 > y_max):
-            result.append({"x1": x1, "y1": y1, "x2": x2, "y2": y2, "tipo": root.tipo})
-
-        # prune by comparing x-values (because tree ordered by x1)
-        if root.left and x1 >= x_min:
-            self.range_query(root.left, x_min, x_max, y_min, y_max, result)
-        if root.right and x2 <= x_max:
-            self.range_query(root.right, x_min, x_max, y_min, y_max, result)
-
-        return result
\ No newline at end of file
+        for node in self.iter_range(root, x_min, x_max, y_min, y_max):
+            x1, y1, x2, y2 = node.value
+            result.append({"x1": x1, "y1": y1, "x2": x2, "y2": y2, "tipo": node.tipo})
+        return result
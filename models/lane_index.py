@@ -0,0 +1,166 @@
+# models/lane_index.py
+from itertools import islice
+
+from models.avl import AVLTree
+
+
+class LaneIndex:
+    """
+    One AVL tree per lane over the same obstacles, so lane lookups never
+    touch obstacles of other lanes.
+
+    An obstacle spanning lanes y1..y2 is stored in every lane it covers.
+    Each lane tree is ordered by (x1, y1) and keeps the subtree max x2, so
+    "obstacles in lane L overlapping [x_min, x_max]" costs O(log n + k) and
+    "next obstacle ahead in lane L" costs O(log n).
+
+    With persistent=True the lane trees are persistent AVLTrees and the
+    whole index can be saved and put back with snapshot()/restore().
+
+    Memory: App keeps this index next to its main tree (which the tree
+    views, the editor and the renderer read). App hands both structures
+    the same (x1, y1, x2, y2) tuples and tipo strings, so a lane entry is
+    one more tree node referencing the main tree's value, per lane covered
+    (one more slot of the columns with ArrayAVLTree); bench reports it as
+    memory_lanes next to memory_tree. Each insert, delete, trim and
+    snapshot is still paid once per structure.
+    """
+
+    def __init__(self, tree_class=AVLTree, persistent=False):
+        self.tree_class = tree_class
+        self.persistent = persistent
+        self.lanes = {}  # lane -> tree
+
+    def _tree(self, lane):
+        tree = self.lanes.get(lane)
+        if tree is None:
+            if self.persistent:
+                tree = self.tree_class(persistent=True)
+            else:
+                tree = self.tree_class()
+            self.lanes[lane] = tree
+        return tree
+
+    # ---- Persistence ----
+    def snapshot(self):
+        """Freeze every lane tree and return {lane: root} for restore()."""
+        return {lane: tree.snapshot() for lane, tree in self.lanes.items()}
+
+    def restore(self, roots):
+        """Put back the lane roots of a snapshot(); lanes created since are emptied."""
+        for lane, tree in self.lanes.items():
+            tree.restore(roots.get(lane))
+        for lane, root in roots.items():
+            self._tree(lane).restore(root)
+
+    @staticmethod
+    def lanes_of(value):
+        return range(value[1], value[3] + 1)
+
+    # ---- Updates ----
+    def bulk_load(self, obstacles):
+        """Replace the index contents with obstacle dicts, building each lane tree in O(n)."""
+        ordered = sorted(obstacles, key=lambda o: (o["x1"], o["y1"]))
+        self.load_sorted(((o["x1"], o["y1"], o["x2"], o["y2"]), o.get("tipo", "obstaculo")) for o in ordered)
+
+    def load_sorted(self, items):
+        """Replace the index contents with (value, tipo) pairs sorted by (x1, y1), in O(n)."""
+        # dedupe by (x1, y1) across all lanes first, the same way the main tree does
+        per_lane = {}
+        last = None
+        for item in items:
+            value = item[0]
+            key = (value[0], value[1])
+            if key == last:
+                continue
+            last = key
+            for lane in range(value[1], value[3] + 1):
+                per_lane.setdefault(lane, []).append(item)
+        self.lanes = {}
+        for lane, lane_items in per_lane.items():
+            tree = self._tree(lane)
+            tree.root = tree.build_sorted(lane_items)
+
+    def append_sorted(self, items):
+        """
+        Add (value, tipo) pairs sorted by (x1, y1), typically the next chunk
+        of a stream; each lane tree joins them on the right. Repeated keys
+        are ignored.
+        """
+        per_lane = {}
+        last = None
+        for item in items:
+            value = item[0]
+            key = (value[0], value[1])
+            if key == last or self.contains_key(*key):
+                continue
+            last = key
+            for lane in range(value[1], value[3] + 1):
+                per_lane.setdefault(lane, []).append(item)
+        for lane, items in per_lane.items():
+            tree = self._tree(lane)
+            tree.root = tree.append_sorted(tree.root, items)
+
+    def contains_key(self, x1, y1):
+        """True if an obstacle starting at (x1, y1) is indexed. O(log n)."""
+        tree = self.lanes.get(y1)
+        if tree is None:
+            return False
+        node = tree.ceiling(tree.root, (x1, y1))
+        if node is None:
+            return False
+        value = node.value
+        return value[0] == x1 and value[1] == y1
+
+    def insert(self, value, tipo):
+        """Index value in every lane it covers; a repeated (x1, y1) key is ignored."""
+        if self.contains_key(value[0], value[1]):
+            return
+        for lane in self.lanes_of(value):
+            tree = self._tree(lane)
+            tree.root = tree.insert(tree.root, value, tipo)
+
+    def delete(self, value):
+        for lane in self.lanes_of(value):
+            tree = self.lanes.get(lane)
+            if tree is not None:
+                tree.root = tree.delete(tree.root, value)
+
+    def trim_before(self, x):
+        """Drop every obstacle with x2 < x from all lanes; True if anything was dropped."""
+        dropped = False
+        for tree in self.lanes.values():
+            root = tree.trim_before(tree.root, x)
+            if root is not tree.root:
+                tree.root = root
+                dropped = True
+        return dropped
+
+    # ---- Queries ----
+    def query(self, lane, x_min, x_max):
+        """Obstacles in lane overlapping [x_min, x_max], as range_query dicts in x order."""
+        tree = self.lanes.get(lane)
+        if tree is None:
+            return []
+        return tree.range_query(tree.root, x_min, x_max, lane, lane)
+
+    def iter_query(self, lane, x_min, x_max):
+        """Like query but yields the lane tree's nodes without building dicts."""
+        tree = self.lanes.get(lane)
+        if tree is None:
+            return iter(())
+        return tree.iter_range(tree.root, x_min, x_max, lane, lane)
+
+    def ahead(self, lane, x, k):
+        """The first k obstacle nodes in lane that reach x (x2 >= x), nearest first. O(log n + k)."""
+        tree = self.lanes.get(lane)
+        if tree is None or k <= 0:
+            return []
+        return list(islice(tree.iter_range(tree.root, x, float("inf"), lane, lane), k))
+
+    def next_ahead(self, lane, x):
+        """Nearest obstacle node in lane that reaches x (x2 >= x), or None."""
+        tree = self.lanes.get(lane)
+        if tree is None:
+            return None
+        return tree.first_reaching(tree.root, x)
@@ -13,10 +13,35 @@ class Node:
         Child references.
     height : int
         Node height in AVL tree (1 for a leaf).
+    size : int
+        Number of nodes in the subtree rooted at this node (order statistics).
+    max_x2, min_x2 : int
+        Largest and smallest x2 found in the subtree rooted at this node.
+    min_y, max_y : int
+        Lowest y1 and highest y2 (lanes) found in the subtree.
     """
+    # no per-instance __dict__: trees hold millions of these
+    __slots__ = ("value", "tipo", "left", "right", "height", "size", "max_x2", "min_x2", "min_y", "max_y")
+
     def __init__(self, value, tipo):
         self.value = value
         self.tipo = tipo
         self.left = None
         self.right = None
-        self.height = 1
\ No newline at end of file
+        self.height = 1
+        self.size = 1
+        # subtree bounds used to prune range queries
+        self.max_x2 = value[2]
+        self.min_x2 = value[2]
+        self.min_y = value[1]
+        self.max_y = value[3]
+
+    def copy(self):
+        """Shallow copy (children are shared), used by persistent trees."""
+        node = Node.__new__(Node)
+        node.value, node.tipo = self.value, self.tipo
+        node.left, node.right = self.left, self.right
+        node.height, node.size = self.height, self.size
+        node.max_x2, node.min_x2 = self.max_x2, self.min_x2
+        node.min_y, node.max_y = self.min_y, self.max_y
+        return node
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from models.array_avl import ArrayAVLTree
+from models.avl import AVLTree
+
+BACKENDS = {"avl": AVLTree, "array": ArrayAVLTree}
+
+
+def check_tree(tree, root):
+    """
+    Assert that root is a valid tree of `tree`: keys ordered by (x1, y1),
+    AVL-balanced, with correct heights, sizes and subtree bounds. Works on
+    Node and on ArrayAVLTree NodeView alike. Returns the values in order.
+    """
+    values = []
+
+    def walk(node):
+        if node is None:
+            return 0
+        left_height = walk(node.left)
+        values.append(node.value)
+        right_height = walk(node.right)
+        assert abs(left_height - right_height) <= 1, node.value
+        assert node.height == 1 + max(left_height, right_height), node.value
+        children = [c for c in (node.left, node.right) if c is not None]
+        assert node.size == 1 + sum(c.size for c in children), node.value
+        _, y1, x2, y2 = node.value
+        assert node.max_x2 == max([x2] + [c.max_x2 for c in children]), node.value
+        assert node.min_x2 == min([x2] + [c.min_x2 for c in children]), node.value
+        assert node.min_y == min([y1] + [c.min_y for c in children]), node.value
+        assert node.max_y == max([y2] + [c.max_y for c in children]), node.value
+        return node.height
+
+    walk(root)
+    keys = [(v[0], v[1]) for v in values]
+    assert keys == sorted(set(keys)), "keys out of order or repeated"
+    return values
+
+
+def random_obstacles(rng, n, span=1000, lanes=3, max_width=60):
+    """n obstacle values (x1, y1, x2, y2) with unique (x1, y1), in random order."""
+    keys = rng.sample([(x, y) for x in range(span) for y in range(lanes)], n)
+    values = []
+    for x1, y1 in keys:
+        y2 = min(lanes - 1, y1 + (rng.random() < 0.2))
+        values.append((x1, y1, x1 + rng.randint(0, max_width), y2))
+    return values
+
+
+@pytest.fixture(params=sorted(BACKENDS))
+def tree_class(request):
+    return BACKENDS[request.param]
+
+
+@pytest.fixture
+def rng():
+    return random.Random(1234)
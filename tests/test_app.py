@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+from app.app import App
+from app.simulation import Simulation
+from conftest import check_tree, random_obstacles
+from models.avl import AVLTree
+
+CONFIG = {"road_length": 6000, "car_speed": 15, "checkpoint_every": 25, "checkpoint_keep": 50}
+
+
+def policy(seed):
+    rng = random.Random(seed)
+    return [rng.choice([None, None, None, "up", "down", "jump"]) for _ in range(1000)]
+
+
+def obstacles(seed):
+    rng = random.Random(seed)
+    # few and mild enough that the car lasts the whole run
+    return [{"x1": x1, "y1": y1, "x2": x2, "y2": y2, "tipo": rng.choice(["cono", "aceite"])}
+            for x1, y1, x2, y2 in random_obstacles(rng, 60, span=6000, max_width=40)]
+
+
+def state(app):
+    car = app.car
+    return (
+        app.tick, car.x, car.y, car.energy, car.is_jumping, car.jump_progress, dict(app.collisions),
+        app.tree.export_sorted(app.tree.root),
+        {lane: tree.export_sorted(tree.root) for lane, tree in app.lanes.lanes.items() if tree.root},
+    )
+
+
+def fresh_run(config, seed, ticks):
+    sim = Simulation(config, obstacles(seed), tree=AVLTree(persistent=True))
+    states = {0: state(sim.app)}
+    inputs = policy(seed)
+    for tick in range(ticks):
+        if not sim.step(inputs[tick]):
+            break
+        states[sim.app.tick] = state(sim.app)
+    return sim, states
+
+
+# ---- persistent snapshots ----
+def test_snapshots_survive_later_edits(rng):
+    tree = AVLTree(persistent=True)
+    live = set()
+    snapshots = []
+    for step in range(1500):
+        if live and rng.random() < 0.4:
+            value = rng.choice(sorted(live))
+            tree.root = tree.delete(tree.root, value)
+            live.discard(value)
+        else:
+            value = random_obstacles(rng, 1, span=500)[0]
+            if all(v[:2] != value[:2] for v in live):
+                live.add(value)
+            tree.root = tree.insert(tree.root, value, "roca")
+        if step % 100 == 0:
+            tree.root = tree.trim_before(tree.root, step // 10)
+            live = {v for v in live if v[2] >= step // 10}
+            snapshots.append((tree.snapshot(), sorted(live)))
+    for root, values in snapshots:
+        assert check_tree(tree, root) == values
+
+    # going back to an old snapshot and editing it leaves the newer ones alone
+    root, values = snapshots[3]
+    tree.restore(root)
+    for value in values[:20]:
+        tree.root = tree.delete(tree.root, value)
+    assert check_tree(tree, tree.root) == values[20:]
+    for root, values in snapshots:
+        assert check_tree(tree, root) == values
+
+
+# ---- rewind / restart ----
+@pytest.mark.parametrize("seed", range(5))
+def test_rewind_and_restart_reproduce_earlier_states(seed):
+    sim, states = fresh_run(CONFIG, seed, 300)
+    app = sim.app
+    inputs = policy(seed)
+
+    app.rewind(4)
+    assert state(app) == states[app.tick]
+    # and playing on from there retraces the same game
+    while app.tick < 300 and sim.step(inputs[app.tick]):
+        assert state(app) == states[app.tick]
+    assert app.tick == max(states)
+
+    assert app.restart()
+    assert state(app) == states[0]
+    for tick in range(120):
+        assert sim.step(inputs[tick])
+    assert state(app) == states[120]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_rewind_replays_streamed_obstacles(seed):
+    config = dict(CONFIG, road_length=None, track={"seed": seed, "difficulty": 0.3})
+    sim, states = fresh_run(config, seed, 400)
+    app = sim.app
+    inputs = policy(seed)
+    app.rewind(6)
+    assert state(app) == states[app.tick]
+    while app.tick < 400 and sim.step(inputs[app.tick]):
+        assert state(app) == states[app.tick]
+    assert app.tick == max(states)
+
+
+# ---- lookahead ----
+def test_lookahead_defaults_to_the_cars_lane_and_position(tree_class):
+    app = App({"road_length": 1000}, tree_class(), verbose=False)
+    assert app.next_obstacle() is None
+    assert app.obstacles_ahead(k=3) == []
+    car = app.car
+    lane, x = car.y, car.x
+    app.load_obstacles([
+        {"x1": x - 50, "y1": lane, "x2": x - 1, "y2": lane, "tipo": "roca"},  # already passed
+        {"x1": x - 5, "y1": lane, "x2": x + 5, "y2": lane, "tipo": "cono"},  # under the car
+        {"x1": x + 40, "y1": lane, "x2": x + 45, "y2": lane, "tipo": "aceite"},
+        {"x1": x + 20, "y1": lane + 1, "x2": x + 25, "y2": lane + 1, "tipo": "roca"},
+    ])
+    assert app.next_obstacle().value == (x - 5, lane, x + 5, lane)
+    assert [n.tipo for n in app.obstacles_ahead(k=5)] == ["cono", "aceite"]
+    assert app.next_obstacle(x=x + 46) is None
+    assert app.next_obstacle(x=-10 ** 6).tipo == "roca"
+    assert app.next_obstacle(lane=lane + 1).value == (x + 20, lane + 1, x + 25, lane + 1)
+    assert app.next_obstacle(lane=lane + 5) is None
+    assert app.obstacles_ahead(k=0) == []
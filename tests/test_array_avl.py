@@ -0,0 +1,89 @@
+import pytest
+
+from conftest import check_tree, random_obstacles
+from models.array_avl import ArrayAVLTree, NodeView
+from models.avl import AVLTree
+from models.node import Node
+
+
+def test_parity_with_avltree(rng):
+    array_tree, tree = ArrayAVLTree(), AVLTree()
+    live = {}
+    tipos = ["roca", "cono", "hueco", "aceite", "peaton"]
+    for step in range(3000):
+        if live and rng.random() < 0.35:
+            value = rng.choice(list(live))
+            array_tree.root = array_tree.delete(array_tree.root, value)
+            tree.root = tree.delete(tree.root, value)
+            del live[value]
+        else:
+            value = random_obstacles(rng, 1, span=2000)[0]
+            tipo = rng.choice(tipos)
+            array_tree.root = array_tree.insert(array_tree.root, value, tipo)
+            tree.root = tree.insert(tree.root, value, tipo)
+            if all(v[:2] != value[:2] for v in live):
+                live[value] = tipo
+        if step % 500 == 0:
+            check_tree(array_tree, array_tree.root)
+    assert array_tree.export_sorted(array_tree.root) == tree.export_sorted(tree.root)
+    assert [n.value for n in array_tree.preorder(array_tree.root)] == [n.value for n in tree.preorder(tree.root)]
+    for _ in range(200):
+        x = rng.randint(0, 2100)
+        assert (array_tree.range_query(array_tree.root, x, x + 100, 0, 2)
+                == tree.range_query(tree.root, x, x + 100, 0, 2))
+
+
+def test_freed_slots_are_reused():
+    tree = ArrayAVLTree()
+    values = [(x, 0, x + 5, 0) for x in range(100)]
+    for value in values:
+        tree.root = tree.insert(tree.root, value, "roca")
+    slots = len(tree.x1)
+    for value in values[:60]:
+        tree.root = tree.delete(tree.root, value)
+    for x in range(1000, 1060):
+        tree.root = tree.insert(tree.root, (x, 1, x + 5, 1), "cono")
+    assert len(tree.x1) == slots
+    assert check_tree(tree, tree.root) == values[60:] + [(x, 1, x + 5, 1) for x in range(1000, 1060)]
+    assert {n.tipo for n in tree.inorder(tree.root)} == {"roca", "cono"}
+
+
+def test_at_most_256_types():
+    tree = ArrayAVLTree()
+    for i in range(256):
+        tree.root = tree.insert(tree.root, (i, 0, i + 1, 0), f"tipo{i}")
+    with pytest.raises(ValueError):
+        tree.insert(tree.root, (999, 0, 1000, 0), "one too many")
+    # known types can still be used
+    tree.root = tree.insert(tree.root, (999, 0, 1000, 0), "tipo0")
+    assert tree.search(tree.root, (999, 0, 1000, 0)).tipo == "tipo0"
+
+
+def test_int64_coordinates():
+    tree = ArrayAVLTree()
+    big = 2 ** 62
+    values = [(big, 0, 2 ** 63 - 1, 0), (-big, 1, -big + 10, 1), (0, 2, big, 2)]
+    for value in values:
+        tree.root = tree.insert(tree.root, value, "roca")
+    assert check_tree(tree, tree.root) == sorted(values)
+    assert [n.value for n in tree.iter_range(tree.root, big, big, 0, 2)] == [(0, 2, big, 2), values[0]]
+    with pytest.raises(OverflowError):
+        tree.insert(tree.root, (1, 0, 2 ** 63, 0), "roca")
+    # a rejected value leaves the tree usable, also when it would have reused a freed slot
+    tree.root = tree.insert(tree.root, (1, 0, 2, 0), "roca")
+    tree.root = tree.delete(tree.root, (1, 0, 2, 0))
+    with pytest.raises(OverflowError):
+        tree.insert(tree.root, (1, 0, 2, -2 ** 63 - 1), "roca")
+    tree.root = tree.insert(tree.root, (5, 0, 6, 0), "roca")
+    assert check_tree(tree, tree.root) == sorted(values + [(5, 0, 6, 0)])
+
+
+def test_node_views_compare_by_slot():
+    tree = ArrayAVLTree()
+    tree.root = tree.insert(tree.root, (1, 0, 2, 0), "roca")
+    assert tree.search(tree.root, (1, 0, 2, 0)) == tree.root
+    assert len({tree.root, NodeView(tree, tree.root.index)}) == 1
+
+
+def test_slotted_nodes_have_no_dict():
+    assert not hasattr(Node((0, 0, 1, 0), "roca"), "__dict__")
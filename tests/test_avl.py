@@ -0,0 +1,445 @@
+import pytest
+
+from conftest import check_tree, random_obstacles
+from models.avl import AVLTree
+
+
+def load(tree, values):
+    for value in values:
+        tree.root = tree.insert(tree.root, value, "roca")
+    return tree
+
+
+# ---- trim_before ----
+def test_trim_before_matches_a_filtered_list(tree_class, rng):
+    for _ in range(20):
+        values = random_obstacles(rng, rng.randint(0, 300), max_width=rng.choice([5, 60, 400]))
+        tree = load(tree_class(), values)
+        live = sorted(values)
+        x = 0
+        while live:
+            x += rng.randint(0, 120)
+            tree.root = tree.trim_before(tree.root, x)
+            live = [v for v in live if v[2] >= x]
+            assert check_tree(tree, tree.root) == live
+
+
+def test_trim_before_keeps_stale_keys_that_still_reach_x(tree_class):
+    # the long obstacle starts first but ends last: it must survive every trim below 500
+    values = [(0, 0, 500, 0)] + [(x, 1, x + 5, 1) for x in range(10, 200, 10)]
+    tree = load(tree_class(), values)
+    tree.root = tree.trim_before(tree.root, 100)
+    assert check_tree(tree, tree.root) == [v for v in sorted(values) if v[2] >= 100]
+    tree.root = tree.trim_before(tree.root, 501)
+    assert tree.root is None
+
+
+def test_trim_before_leaves_the_tree_alone_when_nothing_is_stale(tree_class):
+    # x1 < x for most keys, but every x2 reaches x: the min_x2 gate must not split
+    values = [(x, 0, 1000, 0) for x in range(0, 100, 5)]
+    tree = load(tree_class(), values)
+    root, version = tree.root, tree.version
+    assert tree.trim_before(root, 500) == root
+    assert tree.version == version
+
+
+def test_persistent_trim_leaves_snapshots_intact(rng):
+    values = random_obstacles(rng, 200)
+    tree = load(AVLTree(persistent=True), values)
+    before = tree.snapshot()
+    tree.root = tree.trim_before(tree.root, 400)
+    assert check_tree(tree, tree.root) == sorted(v for v in values if v[2] >= 400)
+    assert check_tree(tree, before) == sorted(values)
+
+
+@pytest.mark.parametrize("x", [-1, 0])
+def test_trim_before_on_an_empty_tree(tree_class, x):
+    tree = tree_class()
+    assert tree.trim_before(None, x) is None
+
+
+# ---- bulk_load ----
+def as_dict(value, tipo="roca"):
+    x1, y1, x2, y2 = value
+    return {"x1": x1, "y1": y1, "x2": x2, "y2": y2, "tipo": tipo}
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 7, 8, 100, 1023, 1024])
+def test_bulk_load_builds_a_perfectly_balanced_tree(tree_class, rng, n):
+    values = random_obstacles(rng, n)
+    tree = tree_class()
+    tree.root = tree.bulk_load([as_dict(v) for v in values])
+    assert check_tree(tree, tree.root) == sorted(values)
+    assert tree.get_size(tree.root) == n
+    assert tree.get_height(tree.root) == n.bit_length()
+
+
+def test_bulk_load_keeps_the_first_of_each_key_like_insert(tree_class, rng):
+    values = random_obstacles(rng, 200)
+    obstacles = [as_dict(v, "roca") for v in values]
+    # same keys again, other extent and type, after the originals
+    obstacles += [as_dict((v[0], v[1], v[2] + 7, v[1]), "cono") for v in values[:80]]
+    tree = tree_class()
+    tree.root = tree.bulk_load(obstacles)
+    inserted = tree_class()
+    for obs in obstacles:
+        inserted.root = inserted.insert(inserted.root, (obs["x1"], obs["y1"], obs["x2"], obs["y2"]), obs["tipo"])
+    assert check_tree(tree, tree.root) == sorted(values)
+    assert tree.export_sorted(tree.root) == inserted.export_sorted(inserted.root)
+
+
+def test_bulk_load_presorted_dedupes_adjacent_keys(tree_class):
+    obstacles = [
+        as_dict((0, 0, 10, 0), "roca"),
+        as_dict((0, 0, 99, 0), "cono"),
+        as_dict((0, 1, 10, 1), "roca"),
+        as_dict((5, 0, 20, 0), "hueco"),
+        as_dict((5, 0, 30, 0), "cono"),
+        as_dict((5, 0, 40, 0), "aceite"),
+    ]
+    tree = tree_class()
+    tree.root = tree.bulk_load(obstacles, presorted=True)
+    check_tree(tree, tree.root)
+    assert tree.export_sorted(tree.root) == [(0, 0, 10, 0, "roca"), (0, 1, 10, 1, "roca"), (5, 0, 20, 0, "hueco")]
+
+
+def test_bulk_loaded_tree_accepts_updates(tree_class, rng):
+    values = random_obstacles(rng, 300)
+    tree = tree_class()
+    tree.root = tree.bulk_load([as_dict(v) for v in values[:200]])
+    for v in values[200:]:
+        tree.root = tree.insert(tree.root, v, "roca")
+    for v in values[:100]:
+        tree.root = tree.delete(tree.root, v)
+    assert check_tree(tree, tree.root) == sorted(values[100:])
+
+
+# ---- iterative walks vs. the recursive originals ----
+class RecursiveAVL:
+    """The recursive insert/delete/traversals AVLTree had before they were made iterative."""
+
+    class Node:
+        def __init__(self, value):
+            self.value, self.left, self.right, self.height = value, None, None, 1
+
+    def height(self, node):
+        return node.height if node else 0
+
+    def balance(self, node):
+        return self.height(node.left) - self.height(node.right) if node else 0
+
+    def update(self, node):
+        node.height = 1 + max(self.height(node.left), self.height(node.right))
+
+    def right_rotate(self, z):
+        y = z.left
+        z.left, y.right = y.right, z
+        self.update(z)
+        self.update(y)
+        return y
+
+    def left_rotate(self, z):
+        y = z.right
+        z.right, y.left = y.left, z
+        self.update(z)
+        self.update(y)
+        return y
+
+    def insert(self, root, value):
+        if root is None:
+            return self.Node(value)
+        key, root_key = value[:2], root.value[:2]
+        if key < root_key:
+            root.left = self.insert(root.left, value)
+        elif key > root_key:
+            root.right = self.insert(root.right, value)
+        else:
+            return root
+        self.update(root)
+        balance = self.balance(root)
+        if balance > 1 and key < root.left.value[:2]:
+            return self.right_rotate(root)
+        if balance < -1 and key > root.right.value[:2]:
+            return self.left_rotate(root)
+        if balance > 1 and key > root.left.value[:2]:
+            root.left = self.left_rotate(root.left)
+            return self.right_rotate(root)
+        if balance < -1 and key < root.right.value[:2]:
+            root.right = self.right_rotate(root.right)
+            return self.left_rotate(root)
+        return root
+
+    def delete(self, root, value):
+        if root is None:
+            return root
+        key, root_key = value[:2], root.value[:2]
+        if key < root_key:
+            root.left = self.delete(root.left, value)
+        elif key > root_key:
+            root.right = self.delete(root.right, value)
+        else:
+            if root.left is None:
+                return root.right
+            if root.right is None:
+                return root.left
+            succ = root.right
+            while succ.left:
+                succ = succ.left
+            root.value = succ.value
+            root.right = self.delete(root.right, succ.value)
+        self.update(root)
+        balance = self.balance(root)
+        if balance > 1 and self.balance(root.left) >= 0:
+            return self.right_rotate(root)
+        if balance > 1:
+            root.left = self.left_rotate(root.left)
+            return self.right_rotate(root)
+        if balance < -1 and self.balance(root.right) <= 0:
+            return self.left_rotate(root)
+        if balance < -1:
+            root.right = self.right_rotate(root.right)
+            return self.left_rotate(root)
+        return root
+
+    def preorder(self, node):
+        if node:
+            yield node.value
+            yield from self.preorder(node.left)
+            yield from self.preorder(node.right)
+
+    def inorder(self, node):
+        if node:
+            yield from self.inorder(node.left)
+            yield node.value
+            yield from self.inorder(node.right)
+
+    def postorder(self, node):
+        if node:
+            yield from self.postorder(node.left)
+            yield from self.postorder(node.right)
+            yield node.value
+
+    def bfs(self, node):
+        level = [node] if node else []
+        while level:
+            yield from (n.value for n in level)
+            level = [c for n in level for c in (n.left, n.right) if c]
+
+
+def overlapping(values, x_min, x_max, y_min, y_max):
+    return [v for v in sorted(values) if not (v[2] < x_min or v[0] > x_max or v[3] < y_min or v[1] > y_max)]
+
+
+def test_iterative_walks_match_the_recursive_ones(tree_class, rng):
+    for _ in range(10):
+        tree, reference, ref_root = tree_class(), RecursiveAVL(), None
+        live = {}
+        for _ in range(600):
+            value = random_obstacles(rng, 1, span=300)[0]
+            if live and rng.random() < 0.4:
+                value = rng.choice(list(live.values()))
+                tree.root = tree.delete(tree.root, value)
+                ref_root = reference.delete(ref_root, value)
+                del live[value[:2]]
+            else:
+                tree.root = tree.insert(tree.root, value, "roca")
+                ref_root = reference.insert(ref_root, value)
+                live.setdefault(value[:2], value)
+            assert tree.get_height(tree.root) == reference.height(ref_root)
+        for order in ("inorder", "preorder", "postorder", "bfs"):
+            walked = [node.value for node in getattr(tree, order)(tree.root)]
+            assert walked == list(getattr(reference, order)(ref_root)), order
+        assert check_tree(tree, tree.root) == sorted(live.values())
+
+
+def test_search_and_range_query_match_a_sorted_list(tree_class, rng):
+    values = random_obstacles(rng, 500, max_width=80)
+    tree = tree_class()
+    for value in values:
+        tree.root = tree.insert(tree.root, value, "roca")
+    for value in values[:50]:
+        assert tree.search(tree.root, value).value == value
+        assert tree.search(tree.root, (value[0], value[1], value[2] + 1, value[3])) is None
+    for _ in range(300):
+        x_min = rng.randint(-50, 1100)
+        x_max = x_min + rng.randint(0, 200)
+        y_min = rng.randint(0, 2)
+        y_max = y_min + rng.randint(0, 2)
+        expected = overlapping(values, x_min, x_max, y_min, y_max)
+        found = tree.range_query(tree.root, x_min, x_max, y_min, y_max)
+        assert [(o["x1"], o["y1"], o["x2"], o["y2"]) for o in found] == expected
+        assert [n.value for n in tree.iter_range(tree.root, x_min, x_max, y_min, y_max)] == expected
+
+
+# ---- order statistics ----
+def test_select_rank_and_delete_at_match_a_sorted_list(tree_class, rng):
+    tree = tree_class()
+    live = {}
+    for _ in range(30):
+        for value in random_obstacles(rng, rng.randint(0, 40), span=400):
+            tree.root = tree.insert(tree.root, value, "roca")
+            live.setdefault(value[:2], value)
+        for _ in range(rng.randint(0, 15)):
+            if not live:
+                break
+            values = sorted(live.values())
+            k = rng.randrange(len(values))
+            tree.root = tree.delete_at(tree.root, k)
+            del live[values[k][:2]]
+        values = sorted(live.values())
+        assert check_tree(tree, tree.root) == values
+        assert tree.get_size(tree.root) == len(values)
+        for k, value in enumerate(values):
+            assert tree.select(tree.root, k).value == value
+            assert tree.rank(tree.root, value) == k
+        assert tree.select(tree.root, len(values)) is None
+        for _ in range(20):
+            key = (rng.randint(-10, 410), rng.randint(0, 2))
+            assert tree.rank(tree.root, key) == sum(v[:2] < key for v in values)
+
+
+def test_order_statistics_on_an_empty_tree(tree_class):
+    tree = tree_class()
+    assert tree.get_size(tree.root) == 0
+    assert tree.select(tree.root, 0) is None
+    assert tree.rank(tree.root, (5, 0)) == 0
+    assert tree.delete_at(tree.root, 0) is None
+
+
+def test_delete_at_out_of_range_leaves_the_tree_alone(tree_class, rng):
+    values = random_obstacles(rng, 50)
+    tree = load(tree_class(), values)
+    root = tree.root
+    assert tree.delete_at(root, 50) == root
+    assert check_tree(tree, root) == sorted(values)
+
+
+@pytest.mark.parametrize("order", ["ascending", "descending", "zigzag"])
+def test_sizes_survive_rotations(tree_class, order):
+    # monotone and alternating inserts force every kind of rotation
+    xs = list(range(500))
+    if order == "descending":
+        xs.reverse()
+    elif order == "zigzag":
+        xs = [x for pair in zip(xs[:250], reversed(xs[250:])) for x in pair]
+    tree = tree_class()
+    for x in xs:
+        tree.root = tree.insert(tree.root, (x, 0, x + 3, 0), "roca")
+    assert len(check_tree(tree, tree.root)) == 500
+    for x in xs[::3]:
+        tree.root = tree.delete(tree.root, (x, 0, x + 3, 0))
+    values = check_tree(tree, tree.root)
+    assert tree.get_size(tree.root) == len(values) == 500 - len(xs[::3])
+    assert [tree.select(tree.root, k).value for k in range(len(values))] == values
+
+
+def test_split_and_join_keep_sizes(tree_class, rng):
+    values = sorted(random_obstacles(rng, 300))
+    tree = load(tree_class(), values)
+    for _ in range(40):
+        key = rng.choice(values)
+        k = values.index(key)
+        smaller, rest = tree.split(tree.root, key)
+        assert check_tree(tree, smaller) == values[:k]
+        assert check_tree(tree, rest) == values[k:]
+        assert tree.get_size(smaller) == k
+        # peel key off rest to get the single pivot node join needs
+        pivot, rest = tree.split(rest, (key[0], key[1] + 0.5))
+        assert tree.get_size(pivot) == 1 and tree.get_size(rest) == len(values) - k - 1
+        tree.root = tree.join(smaller, pivot, rest)
+        assert check_tree(tree, tree.root) == values
+        assert tree.rank(tree.root, key) == k
+        assert tree.select(tree.root, k).value == key
+
+
+def test_split_at_the_ends(tree_class, rng):
+    values = sorted(random_obstacles(rng, 100))
+    tree = load(tree_class(), values)
+    smaller, rest = tree.split(tree.root, (-1, 0))
+    assert smaller is None and tree.get_size(rest) == 100
+    smaller, rest = tree.split(rest, (10 ** 6, 0))
+    assert rest is None and check_tree(tree, smaller) == values
+    assert tree.split(None, (0, 0)) == (None, None)
+
+
+def test_persistent_snapshots_keep_their_sizes(rng):
+    tree = AVLTree(persistent=True)
+    live = {}
+    snapshots = []
+    for _ in range(15):
+        for value in random_obstacles(rng, 30, span=300):
+            tree.root = tree.insert(tree.root, value, "roca")
+            live.setdefault(value[:2], value)
+        for _ in range(10):
+            tree.root = tree.delete_at(tree.root, rng.randrange(len(live)))
+            live = {node.value[:2]: node.value for node in tree.inorder(tree.root)}
+        snapshots.append((tree.snapshot(), sorted(live.values())))
+    # later edits (rotations, splits) on the live tree must not touch old sizes
+    tree.root = tree.trim_before(tree.root, 150)
+    for value in random_obstacles(rng, 200, span=300):
+        tree.root = tree.insert(tree.root, value, "roca")
+    for root, values in snapshots:
+        assert check_tree(tree, root) == values
+        assert tree.get_size(root) == len(values)
+        assert [tree.select(root, k).value for k in range(len(values))] == values
+
+
+# ---- neighbours and first_reaching ----
+def neighbours(values, key):
+    """(successor, predecessor, ceiling, floor) of key in the sorted values, by brute force."""
+    after = [v for v in values if v[:2] > key]
+    before = [v for v in values if v[:2] < key]
+    equal = [v for v in values if v[:2] == key]
+    successor = after[0] if after else None
+    predecessor = before[-1] if before else None
+    return successor, predecessor, (equal or [successor])[0], (equal or [predecessor])[0]
+
+
+def found(tree, root, key):
+    return tuple(
+        node.value if node is not None else None
+        for node in (tree.successor(root, key), tree.predecessor(root, key),
+                     tree.ceiling(root, key), tree.floor(root, key))
+    )
+
+
+def test_neighbours_match_a_sorted_list(tree_class, rng):
+    values = sorted(random_obstacles(rng, 400))
+    tree = load(tree_class(), values)
+    keys = [v[:2] for v in values[::7]] + [(rng.randint(0, 999), rng.randint(0, 2)) for _ in range(200)]
+    for key in keys:
+        assert found(tree, tree.root, key) == neighbours(values, key), key
+
+
+def test_neighbours_at_the_boundaries(tree_class, rng):
+    values = sorted(random_obstacles(rng, 50))
+    tree = load(tree_class(), values)
+    low, high = values[0], values[-1]
+    # below the minimum, at it, at the maximum and above it
+    assert found(tree, tree.root, (low[0] - 1, 0)) == (low, None, low, None)
+    assert found(tree, tree.root, low[:2]) == (values[1], None, low, low)
+    assert found(tree, tree.root, high[:2]) == (None, values[-2], high, high)
+    assert found(tree, tree.root, (high[0] + 1, 0)) == (None, high, None, high)
+    # a key with a wider tail still compares on (x1, y1) only
+    assert tree.ceiling(tree.root, (low[0], low[1], 10 ** 6, 9)).value == low
+
+
+def test_neighbours_on_an_empty_and_a_single_node_tree(tree_class):
+    tree = tree_class()
+    assert found(tree, tree.root, (5, 0)) == (None, None, None, None)
+    assert tree.first_reaching(tree.root, 0) is None
+    tree.root = tree.insert(tree.root, (5, 1, 9, 1), "roca")
+    assert found(tree, tree.root, (5, 0)) == ((5, 1, 9, 1), None, (5, 1, 9, 1), None)
+    assert found(tree, tree.root, (5, 1)) == (None, None, (5, 1, 9, 1), (5, 1, 9, 1))
+    assert found(tree, tree.root, (5, 2)) == (None, (5, 1, 9, 1), None, (5, 1, 9, 1))
+
+
+def test_first_reaching_matches_a_sorted_list(tree_class, rng):
+    values = sorted(random_obstacles(rng, 400, max_width=rng.choice([5, 300])))
+    tree = load(tree_class(), values)
+    low = min(v[2] for v in values)
+    high = max(v[2] for v in values)
+    for x in [-10**6, low - 1, low, high, high + 1, 10**6] + [rng.randint(0, 1300) for _ in range(200)]:
+        expected = next((v for v in values if v[2] >= x), None)
+        node = tree.first_reaching(tree.root, x)
+        assert (node.value if node is not None else None) == expected, x
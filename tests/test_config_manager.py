@@ -0,0 +1,90 @@
+import json
+
+from app.config_manager import ConfigManager
+from app.streaming import ObstacleStream
+
+OBSTACLES = [
+    {"x1": 100 * i, "y1": i % 3, "x2": 100 * i + 30, "y2": i % 3, "tipo": "roca"}
+    for i in range(1, 14)
+]
+
+
+def write_ndjson(path, config, obstacles):
+    with open(path, "w") as f:
+        f.write(json.dumps({"config": config}) + "\n")
+        for obs in obstacles:
+            f.write(json.dumps(obs) + "\n")
+
+
+def stream_all(path):
+    stream = ObstacleStream(str(path))
+    try:
+        return stream.take_until(float("inf"))
+    finally:
+        stream.close()
+
+
+def test_ndjson_edits_keep_the_map_streamable(tmp_path):
+    path = tmp_path / "map.ndjson"
+    write_ndjson(path, {"road_length": 2000}, OBSTACLES)
+
+    mgr = ConfigManager(str(path))
+    added = {"x1": 150, "y1": 2, "x2": 180, "y2": 2, "tipo": "cono"}
+    mgr.add_obstacle(added)
+    # the first edit rewrites the map sorted, so the new obstacle is at position 1
+    assert mgr.remove_obstacle_by_index(3) == OBSTACLES[2]
+    mgr.close()
+
+    # the first edit starts the journal with a compaction, the second is journaled
+    reloaded = ConfigManager(str(path))
+    assert reloaded.pending == 1
+    assert len(reloaded.get_obstacles()) == len(OBSTACLES)
+    reloaded.compact()
+    reloaded.close()
+
+    # the compacted file is still an NDJSON map, sorted for ObstacleStream
+    with open(path) as f:
+        assert json.loads(f.readline()) == {"config": {"road_length": 2000}}
+    streamed = stream_all(path)
+    expected = sorted([o for o in OBSTACLES if (o["x1"], o["y1"]) != (300, 0)] + [added],
+                      key=lambda o: (o["x1"], o["y1"]))
+    assert streamed == expected
+    assert ConfigManager(str(path)).pending == 0
+
+
+def test_ndjson_compaction_on_a_small_log_limit(tmp_path):
+    path = tmp_path / "map.ndjson"
+    write_ndjson(path, {}, OBSTACLES)
+
+    mgr = ConfigManager(str(path), log_limit=1)
+    mgr.add_obstacle({"x1": 5, "y1": 1, "x2": 35, "y2": 1, "tipo": "hueco"})
+    mgr.close()
+
+    streamed = stream_all(path)
+    assert len(streamed) == len(OBSTACLES) + 1
+    assert streamed[0]["x1"] == 5
+
+
+def test_json_edits_keep_map_order_and_duplicates(tmp_path):
+    path = tmp_path / "map.json"
+    obstacles = [dict(OBSTACLES[i]) for i in (7, 2, 11, 2, 0, 5)]
+    obstacles[3]["tipo"] = "cono"  # same (x1, y1) as obstacles[1]
+    with open(path, "w") as f:
+        json.dump({"config": {}, "obstacles": obstacles}, f)
+
+    mgr = ConfigManager(str(path))
+    assert mgr.count() == len(obstacles)
+    assert mgr.select(0) == obstacles[0]
+    assert mgr.remove_obstacle_by_index(2) == obstacles[2]
+    added = {"x1": 1, "y1": 0, "x2": 9, "y2": 0, "tipo": "cono"}
+    mgr.add_obstacle(added)
+    assert mgr.remove_obstacle_by_index(len(obstacles)) is None
+    mgr.close()
+
+    expected = obstacles[:2] + obstacles[3:] + [added]
+    reloaded = ConfigManager(str(path))
+    assert reloaded.get_obstacles() == expected
+    reloaded.compact()
+    reloaded.close()
+    with open(path) as f:
+        assert json.load(f)["obstacles"] == expected
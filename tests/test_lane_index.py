@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import random_obstacles
+from models.lane_index import LaneIndex
+
+
+def in_lane(values, lane, x):
+    """Obstacles covering lane that reach x, nearest first, by brute force."""
+    return [v for v in sorted(values) if v[1] <= lane <= v[3] and v[2] >= x]
+
+
+def build(tree_class, values):
+    lanes = LaneIndex(tree_class)
+    for value in values:
+        lanes.insert(value, "roca")
+    return lanes
+
+
+def test_lookahead_matches_a_sorted_list(tree_class, rng):
+    values = random_obstacles(rng, 300, max_width=120)
+    lanes = build(tree_class, values)
+    for _ in range(200):
+        lane, x, k = rng.randint(0, 2), rng.randint(-20, 1150), rng.randint(0, 8)
+        expected = in_lane(values, lane, x)
+        node = lanes.next_ahead(lane, x)
+        assert (node.value if node is not None else None) == (expected[0] if expected else None)
+        assert [n.value for n in lanes.ahead(lane, x, k)] == expected[:k]
+
+
+def test_lookahead_at_the_boundaries(tree_class, rng):
+    values = random_obstacles(rng, 60, lanes=1)
+    lanes = build(tree_class, values)
+    first, last = min(values), max(values, key=lambda v: v[2])
+    # before every obstacle, on the first one, on the far end of the last one, past it
+    assert lanes.next_ahead(0, -10 ** 6).value == first
+    assert lanes.next_ahead(0, first[0]).value == in_lane(values, 0, first[0])[0]
+    assert lanes.next_ahead(0, last[2]).value == in_lane(values, 0, last[2])[0]
+    assert lanes.next_ahead(0, last[2] + 1) is None
+    assert [n.value for n in lanes.ahead(0, -10 ** 6, 1000)] == sorted(values)
+    assert lanes.ahead(0, last[2] + 1, 5) == []
+    assert lanes.ahead(0, 0, 0) == []
+
+
+@pytest.mark.parametrize("lane", [-1, 1, 7])
+def test_lookahead_in_an_empty_or_unknown_lane(tree_class, lane):
+    lanes = build(tree_class, [(10, 0, 20, 0)])
+    assert lanes.next_ahead(lane, 0) is None
+    assert lanes.ahead(lane, 0, 3) == []
+    # a lane emptied by deletes answers the same as one never used
+    lanes.delete((10, 0, 20, 0))
+    assert lanes.next_ahead(0, 0) is None
+    assert lanes.ahead(0, 0, 3) == []
+    assert not lanes.contains_key(10, 0)
+
+
+def test_obstacles_spanning_lanes_are_seen_from_each(tree_class):
+    lanes = build(tree_class, [(10, 0, 20, 2), (15, 1, 30, 1)])
+    assert [lanes.next_ahead(lane, 0).value for lane in range(3)] == [(10, 0, 20, 2)] * 3
+    assert [n.value for n in lanes.ahead(1, 21, 5)] == [(15, 1, 30, 1)]
+    assert lanes.contains_key(10, 0) and not lanes.contains_key(10, 1)
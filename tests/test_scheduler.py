@@ -0,0 +1,44 @@
+import pytest
+
+from main.scheduler import FrameScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_due_runs_whole_steps_and_keeps_the_remainder():
+    clock = FakeClock()
+    scheduler = FrameScheduler(250, clock=clock)  # binary-exact times below
+    assert scheduler.due() == 0
+    clock.now = 0.625
+    assert scheduler.due() == 2
+    assert scheduler.alpha == pytest.approx(0.5)
+    assert scheduler.skipped == 1
+    clock.now = 0.75
+    assert scheduler.due() == 1
+    assert scheduler.alpha == pytest.approx(0.0)
+    assert scheduler.delay_ms() == 250
+    assert scheduler.delay_ms(frame_ms=16) == 16
+
+
+def test_due_drops_the_backlog_after_a_stall():
+    clock = FakeClock()
+    scheduler = FrameScheduler(250, max_steps=5, clock=clock)
+    clock.now = 3.125
+    assert scheduler.due() == 5
+    assert scheduler.dropped == 7
+    assert scheduler.alpha == pytest.approx(0.5)
+
+
+def test_zero_step_is_clamped_to_one_millisecond():
+    clock = FakeClock()
+    scheduler = FrameScheduler(0, clock=clock)
+    clock.now = 0.0035
+    assert scheduler.due() == 3
+    assert 0 <= scheduler.alpha < 1
+    assert scheduler.delay_ms() == 1
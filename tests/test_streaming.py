@@ -0,0 +1,61 @@
+import json
+import threading
+import time
+
+from app.streaming import ObstacleStream
+
+OBSTACLES = [{"x1": 10 * i, "y1": i % 3, "x2": 10 * i + 5, "y2": i % 3, "tipo": "roca"} for i in range(2500)]
+
+
+def write_map(path):
+    with open(path, "w") as f:
+        f.write(json.dumps({"config": {}}) + "\n")
+        for obs in OBSTACLES:
+            f.write(json.dumps(obs) + "\n")
+
+
+class StalledStream(ObstacleStream):
+    """A stream whose reader thread does not start reading until `go` is set."""
+
+    def __init__(self, path, go, **kwargs):
+        self.go = go
+        super().__init__(path, **kwargs)
+
+    def _reader(self):
+        self.go.wait()
+        super()._reader()
+
+
+def test_take_until_blocks_by_default(tmp_path):
+    path = tmp_path / "map.ndjson"
+    write_map(path)
+    stream = ObstacleStream(str(path), chunk_size=100)
+    try:
+        assert stream.take_until(5000) == [o for o in OBSTACLES if o["x1"] < 5000]
+        assert stream.take_until(float("inf")) == [o for o in OBSTACLES if o["x1"] >= 5000]
+        assert stream.exhausted
+    finally:
+        stream.close()
+
+
+def test_take_until_with_timeout_returns_what_has_arrived(tmp_path):
+    path = tmp_path / "map.ndjson"
+    write_map(path)
+    go = threading.Event()
+    stream = StalledStream(str(path), go, chunk_size=100, timeout=0)
+    try:
+        start = time.perf_counter()
+        assert stream.take_until(float("inf")) == []
+        assert time.perf_counter() - start < 0.5
+        assert not stream.exhausted
+
+        go.set()
+        taken = []
+        deadline = time.perf_counter() + 10
+        while not stream.exhausted and time.perf_counter() < deadline:
+            taken.extend(stream.take_until(float("inf")))
+            time.sleep(0.001)
+        assert taken == OBSTACLES
+    finally:
+        go.set()
+        stream.close()